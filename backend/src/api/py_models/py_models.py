@@ -3,7 +3,7 @@
 # Enthält alle Pydantic-Modelle zur Validierung und Serialisierung
 # für die FastAPI-Endpunkte
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 from pydantic import BaseModel, field_validator
 
@@ -19,6 +19,8 @@ class KIImageMetadata(BaseModel):
     image_reference: Optional[str] = None
     image_provider_id: int
     image_created_at: datetime  # ✅ NEU hinzugefügt
+    image_digest: Optional[str] = None
+    image_size: Optional[int] = None
 
     class Config:
         from_attributes = True # betrifft nur die Ausgabe, wenn FastAPI ein SQLAlchemy-Objekt als response_model in JSON umwandelt.
@@ -51,6 +53,16 @@ class DICOMMetadata(BaseModel):
     dicom_id: int
     dicom_uuid: str
     dicom_modality: Optional[str] = None
+    dicom_pixel_array_file: Optional[str] = None
+    dicom_anonymized_file: Optional[str] = None
+    dicom_content_hash: Optional[str] = None
+    dicom_study_uid: Optional[str] = None
+    dicom_series_uid: Optional[str] = None
+    dicom_study_date: Optional[date] = None
+    dicom_instance_number: Optional[int] = None
+    dicom_rows: Optional[int] = None
+    dicom_columns: Optional[int] = None
+    dicom_frames: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -82,9 +94,112 @@ class UploadResultItem(BaseModel):
     file: Optional[str] = Field(None, description="Dateiname der Originaldatei (bei Fehlern)")
     error: Optional[str] = Field(None, description="Fehlermeldung, falls Verarbeitung fehlgeschlagen ist")
 
+# ========================================
+# SeriesVolumeItem: Zusammengesetztes 3D-Volumen einer Serie
+# ========================================
+class SeriesVolumeItem(BaseModel):
+    series_instance_uid: str = Field(..., description="SeriesInstanceUID der Serie")
+    volume_file: str = Field(..., description="Pfad zum memory-mappable .npy-Volumen")
+    index_file: str = Field(..., description="Pfad zum JSON-Index mit Schicht-Offsets und Abständen")
+    slices: int = Field(..., description="Anzahl der Schichten im Volumen")
+
 # ========================================
 # UploadDICOMResponseModel: Antwortmodell für Upload-Endpunkt
 # ========================================
 class UploadDICOMResponseModel(BaseModel):
     message: str = Field(..., description="Statusmeldung zur Verarbeitung")
     data: List[UploadResultItem] = Field(..., description="Liste der Ergebnisse pro Datei")
+    volumes: Optional[List[SeriesVolumeItem]] = Field(None, description="Pro Serie zusammengesetzte Volumen (nur bei ZIP-Uploads mit DICOM_ASSEMBLE_VOLUMES=true)")
+
+
+# ========================================
+# DICOMIngestJob: Status eines asynchronen DICOM-Ingest-Jobs
+# ========================================
+class DICOMIngestJob(BaseModel):
+    job_id: str = Field(..., description="ID des Ingest-Jobs")
+    status: str = Field(..., description="queued, running, completed oder failed")
+    filename: str = Field(..., description="Name der hochgeladenen Datei")
+    total: int = Field(0, description="Anzahl der zu verarbeitenden DICOM-Dateien")
+    processed: int = Field(0, description="Bereits verarbeitete Dateien (erfolgreich oder fehlerhaft)")
+    done: int = Field(0, description="Erfolgreich verarbeitete und gespeicherte Dateien")
+    failed: int = Field(0, description="Fehlgeschlagene Dateien")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = Field(None, description="Fehlermeldung, falls der gesamte Job fehlgeschlagen ist")
+    results: Optional[List[UploadResultItem]] = Field(None, description="Ergebnisse pro Datei (nur in der Detailansicht)")
+    volumes: Optional[List[SeriesVolumeItem]] = Field(None, description="Pro Serie zusammengesetzte Volumen (nur in der Detailansicht)")
+    volume_error: Optional[str] = Field(None, description="Fehlermeldung, falls das Zusammensetzen der Volumen fehlgeschlagen ist (die Dateien bleiben gespeichert)")
+
+
+# ========================================
+# DBPoolStats: Zustand eines Datenbank-Verbindungspools (je Engine)
+# ========================================
+class DBPoolStats(BaseModel):
+    name: str = Field(..., description="Engine des Pools (sync, async)")
+    pool_class: str = Field(..., description="Verwendete Pool-Klasse")
+    pre_ping: bool = Field(..., description="Verbindungen werden vor der Ausgabe geprüft")
+    size: Optional[int] = Field(None, description="Konfigurierte Pool-Größe")
+    checked_out: Optional[int] = Field(None, description="Aktuell ausgegebene Verbindungen")
+    checked_in: Optional[int] = Field(None, description="Freie Verbindungen im Pool")
+    overflow: Optional[int] = Field(None, description="Aktueller Overflow (negativ = noch nicht angelegte Verbindungen)")
+    max_overflow: Optional[int] = Field(None, description="Maximal zusätzliche Verbindungen")
+    timeout: Optional[float] = Field(None, description="Maximale Wartezeit auf eine Verbindung in Sekunden")
+    recycle: Optional[int] = Field(None, description="Verbindungen werden nach so vielen Sekunden erneuert")
+    checkouts: int = Field(0, description="Anzahl der Verbindungsausgaben seit dem Start")
+    timeouts: int = Field(0, description="Anzahl der Zeitüberschreitungen beim Warten auf eine Verbindung")
+    avg_wait_ms: float = Field(0.0, description="Durchschnittliche Wartezeit pro Ausgabe in Millisekunden")
+    max_wait_ms: float = Field(0.0, description="Längste Wartezeit in Millisekunden")
+
+
+# ========================================
+# DBCacheStats: Zähler eines Metadaten-Caches der CRUD-Schicht
+# ========================================
+class DBCacheStats(BaseModel):
+    name: str = Field(..., description="Name des Caches (ki_image, dicom)")
+    enabled: bool = Field(..., description="Cache aktiv (DB_CACHE_TTL > 0)")
+    size: int = Field(..., description="Aktuelle Anzahl Einträge")
+    maxsize: int = Field(..., description="Maximale Anzahl Einträge (LRU)")
+    ttl: float = Field(..., description="Gültigkeitsdauer eines Eintrags in Sekunden")
+    hits: int = Field(0, description="Treffer seit dem Start")
+    misses: int = Field(0, description="Fehlgriffe (Datenbankzugriffe) seit dem Start")
+    hit_ratio: float = Field(0.0, description="Anteil der Treffer an allen Abfragen")
+    evictions: int = Field(0, description="Wegen der Größenbegrenzung verdrängte Einträge")
+    invalidations: int = Field(0, description="Durch Schreibvorgänge entfernte Einträge")
+
+
+# ========================================
+# WarmPoolStats: Füllstand des Warm-Pools eines Images
+# ========================================
+class WarmPoolStats(BaseModel):
+    image_reference: str = Field(..., description="Image, für das Container vorgewärmt werden")
+    target: int = Field(..., description="Angestrebte Anzahl pausierter Container")
+    idle: int = Field(..., description="Aktuell bereitstehende Container")
+
+
+# ========================================
+# KIImagePullLayer / KIImagePullJob: Hintergrund-Pull eines Images aus einer Registry
+# ========================================
+class KIImagePullLayer(BaseModel):
+    id: str = Field(..., description="Layer-ID laut Docker-Daemon")
+    status: str = Field(..., description="Letzter Status (z. B. Downloading, Extracting, Pull complete, Already exists)")
+    download_current: int = Field(0, description="Heruntergeladene Bytes")
+    download_total: int = Field(0, description="Größe des Layers in Bytes (0 = unbekannt)")
+    extract_current: int = Field(0, description="Entpackte Bytes")
+    extract_total: int = Field(0, description="Zu entpackende Bytes (0 = unbekannt)")
+
+
+class KIImagePullJob(BaseModel):
+    job_id: str = Field(..., description="ID des Pull-Jobs")
+    status: str = Field(..., description="queued, running, completed oder failed")
+    image_reference: str = Field(..., description="Angeforderte Image-Referenz (z. B. nginx:latest)")
+    image_name: str = Field(..., description="Image-Name ohne Tag")
+    image_id: Optional[int] = Field(None, description="ID des angelegten KI-Images (nach Abschluss)")
+    layers: List[KIImagePullLayer] = Field(default_factory=list, description="Fortschritt pro Layer")
+    downloaded_bytes: int = Field(0, description="Summe der heruntergeladenen Bytes aller Layer")
+    total_bytes: int = Field(0, description="Summe der bekannten Layer-Größen")
+    version: int = Field(0, description="Wird bei jeder Fortschrittsänderung erhöht")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = Field(None, description="Fehlermeldung, falls der Pull fehlgeschlagen ist")
@@ -0,0 +1,41 @@
+# responses.py
+# ----------------------------------------------
+# Schnelle Antworten für die Listen-Endpunkte: Zeilen-Tupel aus Spalten-Projektionen
+# (siehe *_LIST_COLUMNS in den CRUD-Modulen) werden ohne ORM-Instanzen und ohne
+# Pydantic-Validierung in einem Durchgang zu JSON bzw. NDJSON kodiert.
+
+import json
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Optional, Sequence
+from fastapi.responses import Response, StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+# Wird vom Encoder nur für nicht-JSON-Typen aufgerufen – einfache Spalten laufen ohne Python-Umweg durch
+def _encode_value(value):
+    if isinstance(value, datetime):
+        # wie bisher in list_ki_images: Zeitstempel in UTC, ISO-8601
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Typ {type(value).__name__} ist nicht JSON-serialisierbar")
+
+
+_encoder = json.JSONEncoder(default=_encode_value, ensure_ascii=False, separators=(",", ":"))
+
+
+# Kodiert eine Seite als JSON-Array; der Cursor der nächsten Seite steht im Header X-Next-Cursor
+def json_rows_response(rows: Sequence, next_cursor: Optional[str] = None) -> Response:
+    body = _encoder.encode([row._asdict() for row in rows]).encode()
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Streamt Pakete von Zeilen als NDJSON (eine JSON-Zeile pro Datensatz, ein Chunk pro Paket)
+def ndjson_rows_response(partitions: AsyncIterator[Sequence]) -> StreamingResponse:
+    async def body():
+        async for partition in partitions:
+            yield "".join(_encoder.encode(row._asdict()) + "\n" for row in partition).encode()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
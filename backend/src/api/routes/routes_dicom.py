@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
-from sqlalchemy.orm import Session
-from api.py_models.py_models import DICOMMetadata, UploadDICOMResponseModel, UploadResultItem
-from db.database.database import get_db
-from db.crud import crud_dicom
-from db.core.exceptions import DICOMNotFound, NoDICOMInTheList, DatabaseError
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.py_models.py_models import DICOMMetadata, UploadDICOMResponseModel, UploadResultItem, DICOMIngestJob
+from src.db.database.database_async import AsyncSessionLocal, get_async_db
+from src.db.crud import crud_dicom_async
+from src.db.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from api.responses import json_rows_response, ndjson_rows_response
+from src.db.core.exceptions import DICOMNotFound, NoDICOMInTheList, DatabaseError, InvalidCursor  # dieselben Klassen wie in crud_dicom
 from services.dicom.service_dicom import handle_dicom_upload  # ✅ Artık doğrudan erişilir
+from services.dicom.zip_ingest import process_zip
+from services.dicom import ingest_jobs
+from services.dicom.volume import assemble_series_volumes, DICOM_ASSEMBLE_VOLUMES
+from services.dicom.pixel_store import read_region, iter_array_bytes
 import shutil, os, uuid, zipfile
 import logging
 
@@ -28,12 +37,14 @@ async def upload_dicom(file: UploadFile = File(...)):
         try:
             with open(tmp_filepath, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
-            result = handle_dicom_upload(tmp_filepath)
+            result = await run_in_threadpool(handle_dicom_upload, tmp_filepath)
             logger.info(f"Successfully uploaded single DICOM file: {filename}")
             return UploadDICOMResponseModel(
                 message="Einzelne DICOM-Datei verarbeitet",
                 data=[UploadResultItem(**result)]
             )
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error processing single DICOM file: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Fehler bei Verarbeitung: {str(e)}")
@@ -42,55 +53,84 @@ async def upload_dicom(file: UploadFile = File(...)):
                 os.remove(tmp_filepath)  # 🧹 Temporäre Datei löschen
 
     elif filename.endswith(".zip"):
-        zip_id = str(uuid.uuid4())
-        zip_path = os.path.join(UPLOAD_DIR, f"{zip_id}.zip")
-        extract_dir = os.path.join(UPLOAD_DIR, zip_id)
-        results = []
-
         try:
-            with open(zip_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
-            os.makedirs(extract_dir, exist_ok=True)
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-
-            for root, dirs, files in os.walk(extract_dir):  # 🔁 ZIP rekursiv verarbeiten
-                for entry in files:
-                    if entry.endswith(".dcm"):
-                        full_path = os.path.join(root, entry)
-                        try:
-                            result = handle_dicom_upload(full_path)
-                            logger.info(f"Successfully processed DICOM from ZIP: {entry}")
-                            results.append(UploadResultItem(**result))
-                        except Exception as e:
-                            logger.error(f"Error while processing file from ZIP: {entry} → {str(e)}")
-                            results.append(UploadResultItem(file=entry, error=str(e)))
+            # ZIP wird direkt aus dem Upload-Stream gelesen – keine Kopie, kein extractall
+            raw_results = await run_in_threadpool(process_zip, file.file)
+            volumes = None
+            if DICOM_ASSEMBLE_VOLUMES:
+                volumes = await run_in_threadpool(assemble_series_volumes, raw_results)
 
             return UploadDICOMResponseModel(
                 message="ZIP-Datei verarbeitet",
-                data=results
+                data=[UploadResultItem(**result) for result in raw_results],
+                volumes=volumes
             )
+        except HTTPException:
+            raise
+        except zipfile.BadZipFile as e:
+            logger.warning(f"Invalid ZIP uploaded: {filename} → {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Ungültige ZIP-Datei: {str(e)}")
         except Exception as e:
             logger.error(f"Unhandled exception during ZIP processing: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Fehler bei ZIP-Verarbeitung: {str(e)}")
-        finally:
-            # 🧹 Temporäre ZIP-Datei und extrahiertes Verzeichnis löschen
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            if os.path.exists(extract_dir):
-                shutil.rmtree(extract_dir, ignore_errors=True)
 
     else:
         logger.warning(f"Invalid file type uploaded: {filename}")
         raise HTTPException(status_code=400, detail="Nur .dcm oder .zip-Dateien erlaubt.")
 
 
-# Liefert eine Liste aller verfügbaren DICOM-Datensätze
-@router.get("/dicoms")
-async def list_dicoms(db: Session = Depends(get_db)):
+# Startet einen asynchronen Ingest-Job für eine .dcm- oder .zip-Datei und gibt sofort die Job-ID zurück
+@router.post("/dicom/jobs", response_model=DICOMIngestJob, status_code=202)
+async def create_dicom_ingest_job(file: UploadFile = File(...)):
+    filename = file.filename.lower()
+    if not (filename.endswith(".dcm") or filename.endswith(".zip")):
+        logger.warning(f"Invalid file type uploaded: {filename}")
+        raise HTTPException(status_code=400, detail="Nur .dcm oder .zip-Dateien erlaubt.")
+
+    try:
+        job = await run_in_threadpool(ingest_jobs.submit_ingest_job, file.file, file.filename)
+        return DICOMIngestJob(**{**ingest_jobs.job_registry.snapshot(job), "results": None, "volumes": None})
+    except Exception as e:
+        logger.error(f"Error while creating ingest job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Fehler beim Anlegen des Ingest-Jobs: {str(e)}")
+
+
+# Liefert alle bekannten Ingest-Jobs (ohne Einzelergebnisse)
+@router.get("/dicom/jobs", response_model=List[DICOMIngestJob])
+async def list_dicom_ingest_jobs():
+    snapshots = [ingest_jobs.job_registry.snapshot(job) for job in ingest_jobs.list_ingest_jobs()]
+    return [DICOMIngestJob(**{**snapshot, "results": None, "volumes": None}) for snapshot in snapshots]
+
+
+# Liefert Fortschritt und Ergebnisse eines Ingest-Jobs
+@router.get("/dicom/jobs/{job_id}", response_model=DICOMIngestJob)
+async def get_dicom_ingest_job(job_id: str):
+    job = ingest_jobs.get_ingest_job(job_id)
+    if job is None:
+        logger.warning(f"Ingest job not found: {job_id}")
+        raise HTTPException(status_code=404, detail=f"Ingest-Job {job_id} nicht gefunden.")
+    return DICOMIngestJob(**ingest_jobs.job_registry.snapshot(job))
+
+
+# Liefert eine Seite der DICOM-Datensätze; der Cursor der nächsten Seite steht im Header X-Next-Cursor
+# format=ndjson streamt stattdessen alle passenden Datensätze ab dem Cursor (limit wird ignoriert)
+@router.get("/dicoms", response_model=List[DICOMMetadata])
+async def list_dicoms(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Anzahl der Einträge pro Seite"),
+    cursor: Optional[str] = Query(None, description="Wert aus X-Next-Cursor der vorherigen Seite"),
+    modality: Optional[str] = Query(None, description="Nur Datensätze dieser Modalität (z. B. CT, MR)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json (eine Seite) oder ndjson (Stream)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     try:
-        return crud_dicom.get_all_dicoms(db)
+        if format == "ndjson":
+            if cursor:
+                decode_cursor(cursor)
+            return ndjson_rows_response(_stream_dicom_rows(cursor, modality))
+        rows, next_cursor = await crud_dicom_async.get_dicom_rows(db, limit=limit, cursor=cursor, modality=modality)
+        return json_rows_response(rows, next_cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except NoDICOMInTheList as e:
         logger.warning(f"No DICOMs found: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -99,11 +139,37 @@ async def list_dicoms(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Der Stream nutzt eine eigene Session, da er erst nach dem Ende des Endpunkts gelesen wird
+async def _stream_dicom_rows(cursor: Optional[str], modality: Optional[str]):
+    async with AsyncSessionLocal() as db:
+        async for partition in crud_dicom_async.stream_dicom_rows(db, cursor=cursor, modality=modality):
+            yield partition
+
+
 # Gibt einen spezifischen DICOM-Datensatz anhand der ID zurück
 @router.get("/dicoms/{dicom_id}", response_model=DICOMMetadata)
-async def get_dicom(dicom_id: int, db: Session = Depends(get_db)):
+async def get_dicom(dicom_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await crud_dicom_async.get_dicom_by_id(db, dicom_id)
+    except DICOMNotFound as e:
+        logger.warning(f"DICOM not found: ID {dicom_id}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except DatabaseError as e:
+        logger.error(f"Database error while retrieving DICOM {dicom_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Liefert die gespeicherten Pixel-Daten eines DICOM-Datensatzes als Rohbytes (optional Ausschnitt/Frame/Schrittweite)
+@router.get("/dicoms/{dicom_id}/pixels")
+async def get_dicom_pixels(
+    dicom_id: int,
+    frame: Optional[int] = Query(None, ge=0, description="Frame-Index bei Multi-Frame-Objekten"),
+    rows: Optional[str] = Query(None, description="Zeilenbereich 'start:stop'"),
+    cols: Optional[str] = Query(None, description="Spaltenbereich 'start:stop'"),
+    step: int = Query(1, ge=1, description="Schrittweite für Downsampling in Zeilen und Spalten"),
+    db: AsyncSession = Depends(get_async_db)
+):
     try:
-        return crud_dicom.get_dicom_by_id(db, dicom_id)
+        entry = await crud_dicom_async.get_dicom_by_id(db, dicom_id)
     except DICOMNotFound as e:
         logger.warning(f"DICOM not found: ID {dicom_id}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -111,11 +177,46 @@ async def get_dicom(dicom_id: int, db: Session = Depends(get_db)):
         logger.error(f"Database error while retrieving DICOM {dicom_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    pixel_file = entry.dicom_pixel_array_file
+    if not pixel_file or not os.path.exists(pixel_file):
+        logger.warning(f"No pixel data stored for DICOM {dicom_id}")
+        raise HTTPException(status_code=404, detail=f"Keine Pixel-Daten für DICOM mit der ID {dicom_id} gespeichert.")
+
+    try:
+        # Entpacken (.pxz) läuft im Threadpool, damit der Event-Loop nicht blockiert
+        region = await run_in_threadpool(
+            read_region, pixel_file, frame=frame, rows=_parse_range(rows), cols=_parse_range(cols),
+            step=step, number_of_frames=entry.dicom_frames
+        )
+    except (ValueError, IndexError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Memory-map: es werden nur die Seiten des angefragten Ausschnitts gelesen und blockweise gestreamt
+    return StreamingResponse(
+        iter_array_bytes(region),
+        media_type="application/octet-stream",
+        headers={
+            "X-Array-Shape": ",".join(str(n) for n in region.shape),
+            "X-Array-Dtype": region.dtype.str,
+        }
+    )
+
+
+def _parse_range(value: Optional[str]) -> slice:
+    if not value:
+        return slice(None)
+    try:
+        start, stop = value.split(":")
+        return slice(int(start) if start else None, int(stop) if stop else None)
+    except ValueError:
+        raise ValueError(f"Ungültiger Bereich '{value}'. Erwartet: 'start:stop'.")
+
+
 # Löscht einen DICOM-Datensatz anhand der ID
 @router.delete("/dicoms/{dicom_id}")
-async def delete_dicom(dicom_id: int, db: Session = Depends(get_db)):
+async def delete_dicom(dicom_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        deleted_dicom = crud_dicom.delete_dicom(db, dicom_id)
+        deleted_dicom = await crud_dicom_async.delete_dicom(db, dicom_id)
         logger.info(f"DICOM with ID {dicom_id} deleted.")
         return {"message": f"DICOM mit der ID {dicom_id} wurde gelöscht."}
     except DICOMNotFound as e:
@@ -7,7 +7,7 @@ from src.db.database.database import get_db
 from src.db.core.exceptions import DatabaseError
 
 # API Models (Pydantic)
-from src.api.py_models.py_models import ContainerResponse 
+from src.api.py_models.py_models import ContainerResponse, WarmPoolStats
 
 # Services (Docker-Logik)
 from src.services.container_management.service_container import ContainerService
@@ -51,12 +51,12 @@ async def start_user_container(
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
     
 # ========================================
-# Liste aller Container (optional filterbar nach user_id)
+# Liste aller Container (optional filterbar nach user_id und Image "name:tag")
 # ========================================
 @router.get("/containers/", response_model=List[ContainerResponse])
-async def list_containers(user_id: Optional[int] = None):
+async def list_containers(user_id: Optional[int] = None, image_reference: Optional[str] = None):
     try:
-        containers = container_service.list_containers(user_id=user_id)
+        containers = container_service.list_containers(user_id=user_id, image_reference=image_reference)
         return [ContainerResponse(**c) for c in containers]
     except Exception as e:
         logger.exception("Unexpected error during list_containers")
@@ -76,6 +76,41 @@ async def stop_container(container_id_or_name: str):
         logger.exception("Unexpected error during stop_container")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
     
+# ========================================
+# Container freigeben (pausieren statt stoppen, per Name oder ID)
+# ========================================
+@router.post("/containers/{container_id_or_name}/release", response_model=ContainerResponse)
+async def release_container(container_id_or_name: str):
+    try:
+        result = container_service.release_container(container_id_or_name)
+        return ContainerResponse(**result)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Container not found")
+        logger.exception("Unexpected error during release_container")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+# ========================================
+# Füllstand des Warm-Pools (vorgewärmte Container pro Image)
+# ========================================
+@router.get("/containers/pool", response_model=List[WarmPoolStats])
+async def warm_pool_stats():
+    return [WarmPoolStats(**stats) for stats in container_service.warm_pool.stats()]
+
+# ========================================
+# Status eines Containers (per Name oder ID)
+# ========================================
+@router.get("/containers/{container_id_or_name}", response_model=ContainerResponse)
+async def get_container_status(container_id_or_name: str):
+    try:
+        result = container_service.get_container_status(container_id_or_name)
+        return ContainerResponse(**result)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Container not found")
+        logger.exception("Unexpected error during get_container_status")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
 # ========================================
 # Container löschen (per Name oder ID)
 # ========================================
@@ -1,23 +1,29 @@
 # FastAPI & Dependency Injection
 from datetime import timezone
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 # Datenbank (SQLAlchemy)
-from sqlalchemy.orm import Session
-from src.db.database.database import get_db
-from src.db.crud import crud_kiImage
-from src.db.core.exceptions import NoKIImagesInTheList, KIImageNotFound, DatabaseError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.database.database_async import AsyncSessionLocal, get_async_db
+from src.db.crud import crud_kiImage_async
+from src.db.core.exceptions import NoKIImagesInTheList, KIImageNotFound, DatabaseError, InvalidCursor
+from src.db.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from src.api.responses import json_rows_response, ndjson_rows_response
 
 # API Models (Pydantic)
 from src.api.py_models.py_models import *
 
 # Services (Image-Logik)
-from src.services.image_upload import service_KIImage
+from src.services.image_upload import service_KIImage, pull_jobs
 
 # Externe Libraries
+import os
+import asyncio
 import logging
 import docker
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(tags=["KI-Image"])
 logger = logging.getLogger(__name__)
@@ -27,28 +33,51 @@ docker_client = docker.from_env()
 # Liste aller KI-Images holen
 # ========================================
 @router.get("/ki-images", response_model= List[KIImageMetadata], description="""
-Returns a list of all currently stored KI-images from the database.
--> If at least one KI-image exists, the response is a JSON array of image objects.
--> If no KI-images are found, an error with status code 404 is returned.
+Returns one page of stored KI-images from the database, ordered by image ID.
+-> The response is a JSON array of image objects; optional filters: `image_name`, `image_tag`, `provider_id`.
+-> If more images exist, the `X-Next-Cursor` response header contains the cursor for the next page.
+-> With `format=ndjson`, all matching images after the cursor are streamed as newline-delimited JSON (`limit` is ignored).
+-> If no KI-images are found on the first page, an error with status code 404 is returned.
+-> If the cursor is invalid, an error with status code 400 is returned.
 -> If a database error occurs, an error with status code 500 is returned.
 """,
     responses={
-        200: {"description": "List of stored KI-images"},
+        200: {"description": "Page of stored KI-images"},
+        400: {"description": "Invalid cursor"},
         404: {"description": "No KI-images found in the database"},
         500: {"description": "Internal server error due to a database issue"}
     })
-async def list_ki_images(db: Session = Depends(get_db)):
+async def list_ki_images(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    image_name: Optional[str] = Query(None),
+    image_tag: Optional[str] = Query(None),
+    provider_id: Optional[int] = Query(None),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    filters = {"image_name": image_name, "image_tag": image_tag, "provider_id": provider_id}
     try:
-        images = crud_kiImage.get_all_ki_images(db)
-        # Konvertiere image_created_at zu UTC mit ISO-Format
-        for image in images:
-            image.image_created_at = image.image_created_at.astimezone(timezone.utc).isoformat()
-        return images
+        if format == "ndjson":
+            if cursor:
+                decode_cursor(cursor)
+            return ndjson_rows_response(_stream_ki_image_rows(cursor, filters))
+        # Nur die benötigten Spalten als Tupel; image_created_at wird beim Kodieren nach UTC/ISO umgewandelt
+        rows, next_cursor = await crud_kiImage_async.get_ki_image_rows(db, limit=limit, cursor=cursor, **filters)
+        return json_rows_response(rows, next_cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except NoKIImagesInTheList as e:
         raise HTTPException(status_code=404, detail=str(e))
     except DatabaseError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Der Stream nutzt eine eigene Session, da er erst nach dem Ende des Endpunkts gelesen wird
+async def _stream_ki_image_rows(cursor: Optional[str], filters: dict):
+    async with AsyncSessionLocal() as db:
+        async for partition in crud_kiImage_async.stream_ki_image_rows(db, cursor=cursor, **filters):
+            yield partition
+
 # ========================================
 # Bestimmtes KI-Image per Image-ID holen
 # ========================================
@@ -63,9 +92,9 @@ Retrieves a single KI-image by its unique ID.
         404: {"description": "No KI-image found with the given ID"},
         500: {"description": "Internal server error due to a database issue"}
     })
-async def get_ki_image(image_id: int, db: Session = Depends(get_db)):
+async def get_ki_image(image_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        image = crud_kiImage.get_ki_image_by_id(db, image_id)
+        image = await crud_kiImage_async.get_ki_image_by_id(db, image_id)
         # Konvertiere image_created_at zu UTC mit ISO-Format
         image.image_created_at = image.image_created_at.astimezone(timezone.utc).isoformat()
         return image 
@@ -81,6 +110,9 @@ async def get_ki_image(image_id: int, db: Session = Depends(get_db)):
 Uploads a Docker image as a `.tar` file and stores its metadata in the database.
 -> Requires a `.tar` file upload containing the Docker image.
 -> Extracts image name and tag from the loaded image.
+-> The image ID is read from `manifest.json` first; if Docker already has the image, it is not loaded again.
+-> If an image with the same ID and the same name and tag is already stored, the existing KI-Image object is returned instead of a duplicate.
+-> The same image under a new name or tag is tagged in Docker (no reload) and stored as a new KI-Image object with the same `image_digest`.
 -> If successful, stores the image metadata in the database and returns the created KI-Image object.
 -> If the file is missing or invalid (e.g., cannot extract image data), a 400 error is returned.
 -> If a database error occurs while saving the image metadata, a 500 error is returned.
@@ -94,12 +126,14 @@ responses={
 )
 async def upload_local_ki_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        file_bytes = await file.read()
-        image_data = service_KIImage.import_local_image(file_bytes=file_bytes)
-        db_image = crud_kiImage.create_ki_image(db, image_data)
+        # Kein file.read(): das gespoolte Upload-Archiv wird als Dateiobjekt an Docker gestreamt,
+        # der blockierende Docker-Aufruf läuft außerhalb der Event-Loop
+        image_data = await run_in_threadpool(service_KIImage.import_local_image, file.file)
+        # Bereits gespeichertes Image (gleiche Image-ID) → vorhandener Eintrag statt Duplikat
+        db_image = await crud_kiImage_async.create_or_get_ki_image(db, image_data)
         return db_image
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -115,6 +149,7 @@ async def upload_local_ki_image(
 @router.post("/ki-images/hub", response_model=KIImageMetadata, description="""
 Pulls a Docker image from Docker Hub and stores its metadata in the database.
 -> If the image is successfully pulled and metadata stored, the new KI-Image object is returned.
+-> If the same image (`image_digest`) is already stored under the same name and tag, the existing KI-Image object is returned.
 -> If the image reference is missing or invalid, a 400 error is returned.
 -> If a database error occurs while storing the image, a 500 error is returned.
 -> If any other unexpected error occurs during the process, a 500 error is returned.
@@ -127,11 +162,12 @@ responses={
 )
 async def pull_ki_image(
     image_reference: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        image_data = service_KIImage.import_hub_repositorie_image(image_reference=image_reference)
-        db_image = crud_kiImage.create_ki_image(db, image_data)
+        # Blockierender Pull außerhalb der Event-Loop; für große Images besser /ki-images/hub/jobs verwenden
+        image_data = await run_in_threadpool(service_KIImage.import_hub_repositorie_image, image_reference)
+        db_image = await crud_kiImage_async.create_or_get_ki_image(db, image_data)
         return db_image
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -141,6 +177,75 @@ async def pull_ki_image(
         logger.exception("Unexpected error during dockerhub pull")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ========================================
+# KI-Image im Hintergrund pullen (Pull-Jobs)
+# ========================================
+# Abstand, in dem der Fortschritts-Stream den Job-Zustand prüft (Sekunden)
+KI_PULL_PROGRESS_INTERVAL = float(os.getenv("KI_PULL_PROGRESS_INTERVAL", "0.5"))
+
+@router.post("/ki-images/hub/jobs", response_model=KIImagePullJob, status_code=202, description="""
+Starts pulling a Docker image from Docker Hub (or another registry) in the background and returns immediately.
+-> The response contains the job ID; progress is available via `/ki-images/hub/jobs/{job_id}` and `/ki-images/hub/jobs/{job_id}/progress`.
+-> The KI-Image database record is created when the pull has completed (`image_id` in the job); an existing record with the same `image_digest`, name and tag is reused.
+-> If the image reference is missing, a 400 error is returned.
+""",
+responses={
+    202: {"description": "Pull job accepted"},
+    400: {"description": "Invalid or missing image reference"}
+}
+)
+async def create_pull_job(image_reference: str = Form(...)):
+    try:
+        job = pull_jobs.submit_pull_job(image_reference)
+        return KIImagePullJob(**pull_jobs.pull_progress(job))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/ki-images/hub/jobs", response_model=List[KIImagePullJob], description="""
+Returns all known pull jobs of this backend process, newest first.
+""")
+async def list_pull_jobs():
+    return [KIImagePullJob(**pull_jobs.pull_progress(job)) for job in pull_jobs.list_pull_jobs()]
+
+@router.get("/ki-images/hub/jobs/{job_id}", response_model=KIImagePullJob, description="""
+Returns the current state and per-layer progress of a pull job.
+-> If no job with the given ID exists (or it has expired), a 404 error is returned.
+""")
+async def get_pull_job(job_id: str):
+    return KIImagePullJob(**pull_jobs.pull_progress(_get_pull_job_or_404(job_id)))
+
+@router.get("/ki-images/hub/jobs/{job_id}/progress", description="""
+Streams the progress of a pull job as newline-delimited JSON (`application/x-ndjson`).
+-> Each line is a complete job state (same fields as `/ki-images/hub/jobs/{job_id}`), sent whenever a layer's download/extract progress changes.
+-> The stream ends after the line with status `completed` or `failed`.
+-> If no job with the given ID exists, a 404 error is returned.
+""",
+responses={
+    200: {"description": "NDJSON stream of pull progress", "content": {"application/x-ndjson": {}}},
+    404: {"description": "Pull job not found"}
+})
+async def stream_pull_progress(job_id: str):
+    job = _get_pull_job_or_404(job_id)
+
+    async def events():
+        version = -1
+        while True:
+            if job.version != version:
+                progress = pull_jobs.pull_progress(job)
+                version = progress["version"]
+                yield KIImagePullJob(**progress).model_dump_json() + "\n"
+                if progress["status"] in ("completed", "failed"):
+                    return
+            await asyncio.sleep(KI_PULL_PROGRESS_INTERVAL)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def _get_pull_job_or_404(job_id: str):
+    job = pull_jobs.get_pull_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Pull-Job {job_id} nicht gefunden.")
+    return job
+
 # ========================================
 # KI-Image löschen 
 # ========================================
@@ -155,9 +260,9 @@ Deletes a specific KI-Image from the database by its ID.
         404: {"description": "No KI-Image found with the given ID"},
         500: {"description": "Internal server error due to a database issue"}
     })
-async def delete_ki_image_route(image_id: int, db: Session = Depends(get_db)):
+async def delete_ki_image_route(image_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        deleted_image = crud_kiImage.delete_ki_image(db, image_id)
+        deleted_image = await crud_kiImage_async.delete_ki_image(db, image_id)
         return {"message": f"KI-Image mit der ID {image_id} wurde gelöscht."}
     except KIImageNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -179,10 +284,10 @@ Updates the metadata of a KI-Image by its ID.
         422: {"description": "Validation failed – empty or invalid fields"},
         500: {"description": "Database error during update"}
     })
-async def patch_ki_image(image_id: int, updated_ki_image: KIImageUpdate, db: Session = Depends(get_db)):
+async def patch_ki_image(image_id: int, updated_ki_image: KIImageUpdate, db: AsyncSession = Depends(get_async_db)):
     try:
         update_data = updated_ki_image.model_dump(exclude_unset=True)
-        return crud_kiImage.update_ki_image(db, image_id, update_data)
+        return await crud_kiImage_async.update_ki_image(db, image_id, update_data)
     except KIImageNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
     except DatabaseError as e:
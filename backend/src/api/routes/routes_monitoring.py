@@ -0,0 +1,20 @@
+from typing import List
+from fastapi import APIRouter
+from api.py_models.py_models import DBPoolStats, DBCacheStats
+from src.db.database.database import get_pool_stats
+from src.db.database.database_async import get_async_pool_stats
+from src.db.crud.cache import get_cache_stats  # gleicher Modulpfad wie in den CRUD-Modulen (ein Cache pro Prozess)
+
+router = APIRouter(tags=["Monitoring"])
+
+
+# Zustand und Wartezeiten der Verbindungspools beider Engines (z. B. für Dashboards oder Alarmierung)
+@router.get("/monitoring/db-pool", response_model=List[DBPoolStats])
+def db_pool_stats():
+    return [DBPoolStats(**get_pool_stats()), DBPoolStats(**get_async_pool_stats())]
+
+
+# Treffer/Fehlgriffe der Metadaten-Caches vor crud_kiImage und crud_dicom
+@router.get("/monitoring/db-cache", response_model=List[DBCacheStats])
+def db_cache_stats():
+    return [DBCacheStats(**stats) for stats in get_cache_stats()]
@@ -19,4 +19,8 @@ class DICOMNotFound(Exception):
     pass
 
 class NoDICOMInTheList(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class InvalidCursor(Exception):
+    """Wird geworfen, wenn ein Pagination-Cursor nicht gelesen werden kann."""
+    pass
@@ -0,0 +1,153 @@
+"""
+cache.py
+-----------------
+In-Process-Cache (LRU + TTL) für Einzelabfragen der CRUD-Module.
+Gespeichert werden nur die Spaltenwerte eines Datensatzes; jeder Treffer liefert eine neue,
+von der Session gelöste Instanz, damit Änderungen eines Aufrufers den Cache nicht verfälschen.
+Schreibende CRUD-Funktionen invalidieren die betroffenen Einträge. Der Cache gilt pro Prozess –
+Änderungen aus anderen Prozessen werden spätestens nach DB_CACHE_TTL Sekunden sichtbar.
+Pfad: backend/src/db/crud/cache.py
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+# Maximale Anzahl Einträge pro Cache und Gültigkeitsdauer in Sekunden (0 = Cache deaktiviert)
+DB_CACHE_MAXSIZE = int(os.getenv("DB_CACHE_MAXSIZE", "1024"))
+DB_CACHE_TTL = float(os.getenv("DB_CACHE_TTL", "30"))
+
+
+class RecordCache:
+    """
+    Thread-sicherer LRU-Cache mit Ablaufzeit; Werte sind Dictionaries mit Spaltenwerten.
+    """
+
+    def __init__(self, name: str, maxsize: int = DB_CACHE_MAXSIZE, ttl: float = DB_CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()   # key → (Ablaufzeitpunkt, Spaltenwerte)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Wird bei jeder Invalidierung erhöht; verhindert, dass ein Leser, der vor einem Schreibvorgang
+        # geladen hat, danach einen veralteten Wert in den Cache legt
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, values: dict, generation: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    # Entfernt alle Einträge, deren Spaltenwerte die Bedingung erfüllen (z. B. nach Bulk-Schreibvorgängen)
+    def invalidate_where(self, predicate: Callable[[dict], bool]) -> None:
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, (_, values) in self._entries.items() if predicate(values)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Spaltenwerte einer ORM-Instanz (ohne Beziehungen oder Session-Zustand)
+def to_columns(instance) -> dict:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+# Baut aus gecachten Spaltenwerten eine gelöste (detached) Instanz, als wäre sie aus der Datenbank geladen
+def to_instance(model, values: dict):
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
+
+
+# Liefert eine neue Instanz aus dem Cache oder None
+def cached_instance(cache: RecordCache, model, key: Hashable):
+    values = cache.get(key)
+    return to_instance(model, values) if values is not None else None
+
+
+# Caches der CRUD-Module; DICOM-Einträge liegen unter ("id", dicom_id) und ("uuid", dicom_uuid)
+ki_image_cache = RecordCache("ki_image")
+dicom_cache = RecordCache("dicom")
+
+CACHES: Dict[str, RecordCache] = {cache.name: cache for cache in (ki_image_cache, dicom_cache)}
+
+
+def get_cache_stats() -> list:
+    return [cache.stats() for cache in CACHES.values()]
+
+
+# Hilfsfunktionen für DICOM-Einträge (beide Schlüssel gemeinsam pflegen)
+def cache_dicom(entry, generation: Optional[int] = None) -> None:
+    values = to_columns(entry)
+    dicom_cache.set(("id", values["dicom_id"]), values, generation)
+    dicom_cache.set(("uuid", values["dicom_uuid"]), values, generation)
+
+
+def invalidate_dicom(dicom_id: int, uuid: str) -> None:
+    dicom_cache.invalidate([("id", dicom_id), ("uuid", uuid)])
+
+
+def invalidate_dicom_uuids(uuids: Iterable[str]) -> None:
+    uuids = set(uuids)
+    dicom_cache.invalidate_where(lambda values: values["dicom_uuid"] in uuids)
@@ -1,9 +1,18 @@
+import os
+from collections import defaultdict
+from typing import Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql, sqlite
 from src.db.db_models.db_models import DICOMMetadata
-from src.db.core.exceptions import DICOMNotFound, DatabaseError
+from src.db.core.exceptions import DICOMNotFound, NoDICOMInTheList, DatabaseError
+from src.db.crud.pagination import DEFAULT_PAGE_SIZE, keyset_select, split_page
+from src.db.crud.cache import dicom_cache, cached_instance, cache_dicom, invalidate_dicom, invalidate_dicom_uuids
 import logging
 
+# Maximale Zeilen pro mehrzeiligem UPSERT (begrenzt die Anzahl gebundener Parameter)
+DICOM_UPSERT_BATCH_SIZE = int(os.getenv("DICOM_UPSERT_BATCH_SIZE", "500"))
+
 
 # Erstellt einen neuen DICOM-Metadatensatz in der Datenbank
 def create_dicom(db: Session, metadata: dict) -> DICOMMetadata:
@@ -19,12 +28,64 @@ def create_dicom(db: Session, metadata: dict) -> DICOMMetadata:
         raise
 
 
-# Ruft einen DICOM-Metadatensatz anhand der UUID ab
+# Spalten der Listen-Projektion (entspricht dem Pydantic-Modell DICOMMetadata); Zeilen werden als Tupel gelesen
+DICOM_LIST_COLUMNS = (
+    DICOMMetadata.dicom_id, DICOMMetadata.dicom_uuid, DICOMMetadata.dicom_modality,
+    DICOMMetadata.dicom_pixel_array_file, DICOMMetadata.dicom_anonymized_file, DICOMMetadata.dicom_content_hash,
+    DICOMMetadata.dicom_study_uid, DICOMMetadata.dicom_series_uid, DICOMMetadata.dicom_study_date,
+    DICOMMetadata.dicom_instance_number, DICOMMetadata.dicom_rows, DICOMMetadata.dicom_columns,
+    DICOMMetadata.dicom_frames,
+)
+
+
+# Filterbedingungen für die DICOM-Liste (gestützt durch ix_dicom_modality_id)
+def dicom_filters(modality: Optional[str] = None) -> list:
+    filters = []
+    if modality:
+        filters.append(DICOMMetadata.dicom_modality == modality)
+    return filters
+
+
+# Liefert eine Seite DICOM-Metadatensätze (Keyset auf dicom_id) und den Cursor der nächsten Seite
+def get_all_dicoms(db: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                   modality: Optional[str] = None) -> Tuple[List[DICOMMetadata], Optional[str]]:
+    try:
+        stmt = keyset_select(DICOMMetadata, DICOMMetadata.dicom_id, dicom_filters(modality), cursor, limit)
+        entries, next_cursor = split_page(db.scalars(stmt).all(), "dicom_id", limit)
+        if not entries and not cursor:
+            raise NoDICOMInTheList("Es befinden sich keine DICOM-Datensätze in der Datenbank.")
+        return entries, next_cursor
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+# Ruft einen DICOM-Metadatensatz anhand der ID ab (über den Metadaten-Cache, siehe cache.py)
+def get_dicom_by_id(db: Session, dicom_id: int) -> DICOMMetadata:
+    cached = cached_instance(dicom_cache, DICOMMetadata, ("id", dicom_id))
+    if cached is not None:
+        return cached
+    try:
+        generation = dicom_cache.generation
+        entry = db.query(DICOMMetadata).filter(DICOMMetadata.dicom_id == dicom_id).first()
+        if not entry:
+            raise DICOMNotFound(f"DICOM-Metadaten mit ID {dicom_id} nicht gefunden.")
+        cache_dicom(entry, generation)
+        return entry
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Abrufen eines DICOM-Metadatensatzes.") from e
+
+
+# Ruft einen DICOM-Metadatensatz anhand der UUID ab (über den Metadaten-Cache, siehe cache.py)
 def get_dicom_metadata_by_uuid(db: Session, uuid: str) -> DICOMMetadata:
+    cached = cached_instance(dicom_cache, DICOMMetadata, ("uuid", uuid))
+    if cached is not None:
+        return cached
     try:
+        generation = dicom_cache.generation
         entry = db.query(DICOMMetadata).filter(DICOMMetadata.dicom_uuid == uuid).first()
         if not entry:
             raise DICOMNotFound(f"DICOM-Metadaten mit UUID {uuid} nicht gefunden.")
+        cache_dicom(entry, generation)
         return entry
     except SQLAlchemyError as e:
         raise DatabaseError("Fehler beim Abrufen eines DICOM-Metadatensatzes.") from e
@@ -42,6 +103,7 @@ def update_dicom_metadata(db: Session, uuid: str, updates: dict) -> DICOMMetadat
                 setattr(entry, key, value)
 
         db.commit()
+        invalidate_dicom(entry.dicom_id, uuid)
         db.refresh(entry)
         return entry
     except SQLAlchemyError as e:
@@ -57,6 +119,7 @@ def delete_dicom_metadata(db: Session, uuid: str) -> bool:
 
         db.delete(entry)
         db.commit()
+        invalidate_dicom(entry.dicom_id, uuid)
         return True
     except SQLAlchemyError as e:
         raise DatabaseError("Fehler beim Löschen eines DICOM-Eintrags.") from e
@@ -64,24 +127,85 @@ def delete_dicom_metadata(db: Session, uuid: str) -> bool:
 
 # Erstellt einen neuen DICOM-Metadatensatz oder ersetzt einen vorhandenen mit derselben UUID
 def create_or_replace_dicom_metadata(db: Session, metadata: dict) -> DICOMMetadata:
+    """
+    Ein einzelnes INSERT ... ON CONFLICT (dicom_uuid) DO UPDATE mit einem Commit;
+    der Primärschlüssel eines vorhandenen Eintrags bleibt erhalten.
+    """
     try:
-        existing = db.query(DICOMMetadata).filter_by(
-            dicom_uuid=metadata["dicom_uuid"]
-        ).first()
-
-        if existing:
-            db.delete(existing)
-            db.commit()
-
-        new_entry = DICOMMetadata(**metadata)
-        db.add(new_entry)
+        stmt = dicom_upsert_statement(db.get_bind().dialect.name, [metadata])
+        if stmt is None:
+            entry = _merge_by_uuid(db, metadata)
+        else:
+            entry = db.scalars(stmt.returning(DICOMMetadata), execution_options={"populate_existing": True}).one()
         db.commit()
-        db.refresh(new_entry)
-
-        return new_entry
+        invalidate_dicom(entry.dicom_id, entry.dicom_uuid)
+        return entry
 
     except Exception as e:
         db.rollback()
         raise DatabaseError(f"[DB] Fehler beim Erstellen oder Ersetzen des DICOM-Eintrags: {str(e)}")
 
- 
\ No newline at end of file
+
+# Schreibt viele DICOM-Metadatensätze (z. B. alle Instanzen eines ZIP-Uploads) in einer Transaktion
+def bulk_upsert_dicom_metadata(db: Session, items: List[dict]) -> int:
+    """
+    Doppelte UUIDs werden vorab zusammengefasst (der letzte Eintrag gewinnt), da ein UPSERT
+    dieselbe Zeile nicht zweimal ändern darf. Die Zeilen werden in Paketen von
+    DICOM_UPSERT_BATCH_SIZE Einträgen gesendet, aber nur einmal committet.
+    Rückgabe: Anzahl der geschriebenen Datensätze.
+    """
+    rows = list({item["dicom_uuid"]: item for item in items}.values())
+    if not rows:
+        return 0
+
+    try:
+        dialect = db.get_bind().dialect.name
+        if dicom_upsert_statement(dialect, rows[:1]) is None:
+            for row in rows:
+                _merge_by_uuid(db, row)
+        else:
+            for batch in upsert_batches(rows):
+                db.execute(dicom_upsert_statement(dialect, batch))
+        db.commit()
+        invalidate_dicom_uuids(row["dicom_uuid"] for row in rows)
+        logging.info(f"[DB] {len(rows)} DICOM-Einträge in einer Transaktion geschrieben")
+        return len(rows)
+
+    except Exception as e:
+        db.rollback()
+        raise DatabaseError(f"[DB] Fehler beim Speichern mehrerer DICOM-Einträge: {str(e)}")
+
+
+# Baut INSERT ... ON CONFLICT (dicom_uuid) DO UPDATE für PostgreSQL/SQLite; None bei anderen Dialekten
+def dicom_upsert_statement(dialect: str, rows: List[dict]):
+    insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(dialect)
+    if insert is None:
+        return None
+    stmt = insert(DICOMMetadata).values(rows)
+    updates = {key: stmt.excluded[key] for key in rows[0] if key not in ("dicom_id", "dicom_uuid")}
+    # Ohne weitere Spalten: No-op-Update, damit RETURNING auch vorhandene Zeilen liefert
+    updates = updates or {"dicom_uuid": stmt.excluded.dicom_uuid}
+    return stmt.on_conflict_do_update(index_elements=[DICOMMetadata.dicom_uuid], set_=updates)
+
+
+# Teilt Zeilen in Pakete mit einheitlichen Spalten (Voraussetzung für mehrzeilige VALUES-Listen)
+def upsert_batches(rows: List[dict]) -> Iterator[List[dict]]:
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(sorted(row))].append(row)
+    for group in groups.values():
+        for start in range(0, len(group), DICOM_UPSERT_BATCH_SIZE):
+            yield group[start:start + DICOM_UPSERT_BATCH_SIZE]
+
+
+# Fallback für Datenbanken ohne ON CONFLICT: Aktualisieren oder Anlegen innerhalb der laufenden Transaktion
+def _merge_by_uuid(db: Session, metadata: dict) -> DICOMMetadata:
+    entry = db.query(DICOMMetadata).filter_by(dicom_uuid=metadata["dicom_uuid"]).first()
+    if entry is None:
+        entry = DICOMMetadata(**metadata)
+        db.add(entry)
+    else:
+        for key, value in metadata.items():
+            setattr(entry, key, value)
+    db.flush()
+    return entry
@@ -0,0 +1,182 @@
+"""
+crud_dicom_async.py
+-----------------
+Asynchrone CRUD-Operationen für die DICOM-Metadaten (für die FastAPI-Routen).
+Gleiches Verhalten und gleiche Exceptions wie crud_dicom.py.
+Pfad: backend/src/db/crud/crud_dicom_async.py
+"""
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.db_models.db_models import DICOMMetadata
+from src.db.core.exceptions import DICOMNotFound, NoDICOMInTheList, DatabaseError
+from src.db.crud.crud_dicom import DICOM_LIST_COLUMNS, dicom_filters, dicom_upsert_statement, upsert_batches
+from src.db.crud.pagination import DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, keyset_select, split_page
+from src.db.crud.cache import dicom_cache, cached_instance, cache_dicom, invalidate_dicom, invalidate_dicom_uuids
+
+
+# Liefert eine Seite DICOM-Metadatensätze (Keyset auf dicom_id) und den Cursor der nächsten Seite
+async def get_all_dicoms(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                         modality: Optional[str] = None) -> Tuple[List[DICOMMetadata], Optional[str]]:
+    try:
+        stmt = keyset_select(DICOMMetadata, DICOMMetadata.dicom_id, dicom_filters(modality), cursor, limit)
+        entries, next_cursor = split_page((await db.scalars(stmt)).all(), "dicom_id", limit)
+        if not entries and not cursor:
+            raise NoDICOMInTheList("Es befinden sich keine DICOM-Datensätze in der Datenbank.")
+        return entries, next_cursor
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+# Wie get_all_dicoms, liest aber nur die Spalten aus DICOM_LIST_COLUMNS als Tupel (keine ORM-Instanzen)
+async def get_dicom_rows(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                         modality: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    try:
+        stmt = keyset_select(DICOM_LIST_COLUMNS, DICOMMetadata.dicom_id, dicom_filters(modality), cursor, limit)
+        rows, next_cursor = split_page((await db.execute(stmt)).all(), "dicom_id", limit)
+        if not rows and not cursor:
+            raise NoDICOMInTheList("Es befinden sich keine DICOM-Datensätze in der Datenbank.")
+        return rows, next_cursor
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+# Liefert alle passenden Zeilen ab dem Cursor in Paketen von STREAM_BATCH_SIZE (serverseitiger Cursor)
+async def stream_dicom_rows(db: AsyncSession, cursor: Optional[str] = None,
+                            modality: Optional[str] = None) -> AsyncIterator[List]:
+    try:
+        stmt = keyset_select(DICOM_LIST_COLUMNS, DICOMMetadata.dicom_id, dicom_filters(modality), cursor, limit=None)
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+# Ruft einen DICOM-Metadatensatz anhand der ID ab (über den Metadaten-Cache, siehe cache.py)
+async def get_dicom_by_id(db: AsyncSession, dicom_id: int) -> DICOMMetadata:
+    cached = cached_instance(dicom_cache, DICOMMetadata, ("id", dicom_id))
+    if cached is not None:
+        return cached
+    generation = dicom_cache.generation
+    entry = await _load_by_id(db, dicom_id)
+    cache_dicom(entry, generation)
+    return entry
+
+
+# Ruft einen DICOM-Metadatensatz anhand der UUID ab (über den Metadaten-Cache, siehe cache.py)
+async def get_dicom_metadata_by_uuid(db: AsyncSession, uuid: str) -> DICOMMetadata:
+    cached = cached_instance(dicom_cache, DICOMMetadata, ("uuid", uuid))
+    if cached is not None:
+        return cached
+    generation = dicom_cache.generation
+    entry = await _load_by_uuid(db, uuid)
+    cache_dicom(entry, generation)
+    return entry
+
+
+# Aktualisiert bestimmte Felder eines vorhandenen DICOM-Metadatensatzes
+async def update_dicom_metadata(db: AsyncSession, uuid: str, updates: dict) -> DICOMMetadata:
+    try:
+        entry = await _load_by_uuid(db, uuid)
+        for key, value in updates.items():
+            if hasattr(entry, key):
+                setattr(entry, key, value)
+
+        await db.commit()
+        invalidate_dicom(entry.dicom_id, uuid)
+        return entry
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise DatabaseError("Fehler beim Aktualisieren eines DICOM-Eintrags.") from e
+
+
+# Löscht einen DICOM-Metadatensatz anhand der ID
+async def delete_dicom(db: AsyncSession, dicom_id: int) -> DICOMMetadata:
+    try:
+        entry = await _load_by_id(db, dicom_id)
+        await db.delete(entry)
+        await db.commit()
+        invalidate_dicom(dicom_id, entry.dicom_uuid)
+        return entry
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise DatabaseError("Fehler beim Löschen eines DICOM-Eintrags.") from e
+
+
+# Erstellt einen neuen DICOM-Metadatensatz oder ersetzt einen vorhandenen (ein UPSERT, ein Commit)
+async def create_or_replace_dicom_metadata(db: AsyncSession, metadata: dict) -> DICOMMetadata:
+    try:
+        stmt = dicom_upsert_statement(db.bind.dialect.name, [metadata])
+        if stmt is None:
+            entry = await _merge_by_uuid(db, metadata)
+        else:
+            result = await db.scalars(stmt.returning(DICOMMetadata), execution_options={"populate_existing": True})
+            entry = result.one()
+        await db.commit()
+        invalidate_dicom(entry.dicom_id, entry.dicom_uuid)
+        return entry
+
+    except Exception as e:
+        await db.rollback()
+        raise DatabaseError(f"[DB] Fehler beim Erstellen oder Ersetzen des DICOM-Eintrags: {str(e)}")
+
+
+# Schreibt viele DICOM-Metadatensätze in einer Transaktion (siehe crud_dicom.bulk_upsert_dicom_metadata)
+async def bulk_upsert_dicom_metadata(db: AsyncSession, items: List[dict]) -> int:
+    rows = list({item["dicom_uuid"]: item for item in items}.values())
+    if not rows:
+        return 0
+
+    try:
+        dialect = db.bind.dialect.name
+        if dicom_upsert_statement(dialect, rows[:1]) is None:
+            for row in rows:
+                await _merge_by_uuid(db, row)
+        else:
+            for batch in upsert_batches(rows):
+                await db.execute(dicom_upsert_statement(dialect, batch))
+        await db.commit()
+        invalidate_dicom_uuids(row["dicom_uuid"] for row in rows)
+        logging.info(f"[DB] {len(rows)} DICOM-Einträge in einer Transaktion geschrieben")
+        return len(rows)
+
+    except Exception as e:
+        await db.rollback()
+        raise DatabaseError(f"[DB] Fehler beim Speichern mehrerer DICOM-Einträge: {str(e)}")
+
+
+# Fallback für Datenbanken ohne ON CONFLICT: Aktualisieren oder Anlegen innerhalb der laufenden Transaktion
+async def _merge_by_uuid(db: AsyncSession, metadata: dict) -> DICOMMetadata:
+    entry = await db.scalar(select(DICOMMetadata).where(DICOMMetadata.dicom_uuid == metadata["dicom_uuid"]))
+    if entry is None:
+        entry = DICOMMetadata(**metadata)
+        db.add(entry)
+    else:
+        for key, value in metadata.items():
+            setattr(entry, key, value)
+    await db.flush()
+    return entry
+
+
+# Lesen ohne Cache – für schreibende Funktionen, die eine an die Session gebundene Instanz brauchen
+async def _load_by_id(db: AsyncSession, dicom_id: int) -> DICOMMetadata:
+    try:
+        entry = await db.get(DICOMMetadata, dicom_id)
+        if not entry:
+            raise DICOMNotFound(f"DICOM-Metadaten mit ID {dicom_id} nicht gefunden.")
+        return entry
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Abrufen eines DICOM-Metadatensatzes.") from e
+
+
+async def _load_by_uuid(db: AsyncSession, uuid: str) -> DICOMMetadata:
+    try:
+        entry = await db.scalar(select(DICOMMetadata).where(DICOMMetadata.dicom_uuid == uuid))
+        if not entry:
+            raise DICOMNotFound(f"DICOM-Metadaten mit UUID {uuid} nicht gefunden.")
+        return entry
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Abrufen eines DICOM-Metadatensatzes.") from e
@@ -5,10 +5,13 @@ Enthält CRUD-Operationen für die KI-Image-Metadaten.
 Pfad: backend/src/db/crud/crud_kiImage.py
 """
 
+from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from src.db.db_models.db_models import KIImage
 from src.db.core.exceptions import NoKIImagesInTheList, DatabaseError, KIImageNotFound
+from src.db.crud.pagination import DEFAULT_PAGE_SIZE, keyset_select, split_page
+from src.db.crud.cache import ki_image_cache, cached_instance, to_columns
 
 
 def create_ki_image(db: Session, image_data: dict):
@@ -25,32 +28,113 @@ def create_ki_image(db: Session, image_data: dict):
         raise DatabaseError("Fehler beim Erstellen eines KI-Images.") from e
 
 
+def create_or_get_ki_image(db: Session, image_data: dict):
+    """
+    Legt einen KIImage-Eintrag an oder gibt den vorhandenen mit gleichem image_digest, Namen und Tag zurück.
+    Dasselbe Image unter einem neuen Name:Tag erhält einen eigenen Eintrag (gleicher Digest).
+    Gleichzeitige Importe derselben Referenz scheitern am Unique-Index; dann wird der Gewinner zurückgegeben.
+    """
+    digest = image_data.get("image_digest")
+    key = (digest, image_data.get("image_name"), image_data.get("image_tag"))
+    existing = get_ki_image_by_digest(db, *key) if digest else None
+    if existing is not None:
+        return existing
+    try:
+        return create_ki_image(db, image_data)
+    except DatabaseError as e:
+        if not digest or not isinstance(e.__cause__, IntegrityError):
+            raise
+        db.rollback()
+        existing = get_ki_image_by_digest(db, *key)
+        if existing is None:
+            raise
+        return existing
+
+
+def get_ki_image_by_digest(db: Session, image_digest: str, image_name: Optional[str] = None,
+                           image_tag: Optional[str] = None) -> Optional[KIImage]:
+    """
+    Gibt das (älteste) KI-Image mit der Docker-Image-ID (image_digest) zurück, optional nur mit
+    diesem Namen/Tag, oder None (über ux_ki_image_digest_name_tag).
+    """
+    try:
+        filters = ki_image_digest_filters(image_digest, image_name, image_tag)
+        return db.query(KIImage).filter(*filters).order_by(KIImage.image_id).first()
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Abrufen eines KI-Images.") from e
+
+
+def ki_image_digest_filters(image_digest: str, image_name: Optional[str] = None,
+                            image_tag: Optional[str] = None) -> list:
+    filters = [KIImage.image_digest == image_digest]
+    if image_name is not None:
+        filters.append(KIImage.image_name == image_name)
+    if image_tag is not None:
+        filters.append(KIImage.image_tag == image_tag)
+    return filters
+
+
 def get_ki_image_by_id(db: Session, image_id: int):
     """
     Gibt ein KI-Image anhand seiner ID zurück.
+    - Treffer im Metadaten-Cache (siehe cache.py) werden ohne Datenbankzugriff beantwortet.
     - Wirft KIImageNotFound, wenn nicht gefunden.
     - Wirft DatabaseError bei SQLAlchemy-Problemen.
     """
+    cached = cached_instance(ki_image_cache, KIImage, image_id)
+    if cached is not None:
+        return cached
     try:
+        generation = ki_image_cache.generation
         image = db.query(KIImage).filter(KIImage.image_id == image_id).first()
         if not image:
             raise KIImageNotFound(f"KI-Image mit ID {image_id} nicht gefunden.")
+        ki_image_cache.set(image_id, to_columns(image), generation)
         return image
     except SQLAlchemyError as e:
         raise DatabaseError("Fehler beim Abrufen eines KI-Images.") from e
 
 
-def get_all_ki_images(db: Session, skip: int = 0, limit: int = 100):
+# Spalten der Listen-Projektion (entspricht KIImageMetadata); Zeilen werden als Tupel gelesen
+KI_IMAGE_LIST_COLUMNS = (
+    KIImage.image_id, KIImage.image_name, KIImage.image_tag, KIImage.image_description,
+    KIImage.image_reference, KIImage.image_provider_id, KIImage.image_created_at,
+    KIImage.image_digest, KIImage.image_size,
+)
+
+
+def ki_image_filters(image_name: Optional[str] = None, image_tag: Optional[str] = None,
+                     provider_id: Optional[int] = None) -> list:
+    """
+    Filterbedingungen für die KI-Image-Liste. Indizes: Name bzw. Name + Tag → ix_ki_image_name_tag_id,
+    nur Tag → ix_ki_image_tag_id, Provider → ix_ki_image_provider_id.
+    """
+    filters = []
+    if image_name:
+        filters.append(KIImage.image_name == image_name)
+    if image_tag:
+        filters.append(KIImage.image_tag == image_tag)
+    if provider_id is not None:
+        filters.append(KIImage.image_provider_id == provider_id)
+    return filters
+
+
+def get_all_ki_images(db: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                      image_name: Optional[str] = None, image_tag: Optional[str] = None,
+                      provider_id: Optional[int] = None):
     """
-    Gibt eine Liste aller KI-Bilder zurück.
-    - Wirft NoKIImagesInTheList, wenn keine Einträge existieren.
+    Gibt eine Seite KI-Bilder (Keyset auf image_id) und den Cursor der nächsten Seite zurück.
+    - Wirft NoKIImagesInTheList, wenn die erste Seite leer ist.
+    - Wirft InvalidCursor bei ungültigem Cursor.
     - Wirft DatabaseError bei unerwarteten DB-Problemen.
     """
     try:
-        images = db.query(KIImage).offset(skip).limit(limit).all()
-        if not images:
+        filters = ki_image_filters(image_name, image_tag, provider_id)
+        stmt = keyset_select(KIImage, KIImage.image_id, filters, cursor, limit)
+        images, next_cursor = split_page(db.scalars(stmt).all(), "image_id", limit)
+        if not images and not cursor:
             raise NoKIImagesInTheList("Es befinden sich keine KI-Bilder in der Datenbank.")
-        return images
+        return images, next_cursor
     except SQLAlchemyError as e:
         raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
 
@@ -69,6 +153,7 @@ def update_ki_image(db: Session, image_id: int, update_data: dict):
             setattr(image, key, value)
 
         db.commit()
+        ki_image_cache.invalidate([image_id])
         db.refresh(image)
         return image
     except SQLAlchemyError as e:
@@ -88,6 +173,7 @@ def delete_ki_image(db: Session, image_id: int):
 
         db.delete(image)
         db.commit()
+        ki_image_cache.invalidate([image_id])
         return image
     except SQLAlchemyError as e:
         raise DatabaseError("Fehler beim Löschen eines KI-Images.") from e
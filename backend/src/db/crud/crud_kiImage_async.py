@@ -0,0 +1,186 @@
+"""
+crud_kiImage_async.py
+-----------------
+Asynchrone CRUD-Operationen für die KI-Image-Metadaten (für die FastAPI-Routen).
+Gleiches Verhalten und gleiche Exceptions wie crud_kiImage.py.
+Pfad: backend/src/db/crud/crud_kiImage_async.py
+"""
+
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.db_models.db_models import KIImage
+from src.db.core.exceptions import NoKIImagesInTheList, DatabaseError, KIImageNotFound
+from src.db.crud.crud_kiImage import KI_IMAGE_LIST_COLUMNS, ki_image_digest_filters, ki_image_filters
+from src.db.crud.pagination import DEFAULT_PAGE_SIZE, STREAM_BATCH_SIZE, keyset_select, split_page
+from src.db.crud.cache import ki_image_cache, cached_instance, to_columns
+
+
+async def create_ki_image(db: AsyncSession, image_data: dict):
+    """
+    Erstellt einen neuen KIImage-Eintrag in der Datenbank.
+    """
+    try:
+        db_ki_image = KIImage(**image_data)
+        db.add(db_ki_image)
+        await db.commit()
+        await db.refresh(db_ki_image)
+        return db_ki_image
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise DatabaseError("Fehler beim Erstellen eines KI-Images.") from e
+
+
+async def create_or_get_ki_image(db: AsyncSession, image_data: dict):
+    """
+    Legt einen KIImage-Eintrag an oder gibt den vorhandenen mit gleichem image_digest, Namen und Tag zurück.
+    Dasselbe Image unter einem neuen Name:Tag erhält einen eigenen Eintrag (gleicher Digest).
+    Gleichzeitige Importe derselben Referenz scheitern am Unique-Index; dann wird der Gewinner zurückgegeben.
+    """
+    digest = image_data.get("image_digest")
+    key = (digest, image_data.get("image_name"), image_data.get("image_tag"))
+    existing = await get_ki_image_by_digest(db, *key) if digest else None
+    if existing is not None:
+        return existing
+    try:
+        return await create_ki_image(db, image_data)
+    except DatabaseError as e:
+        if not digest or not isinstance(e.__cause__, IntegrityError):
+            raise
+        existing = await get_ki_image_by_digest(db, *key)
+        if existing is None:
+            raise
+        return existing
+
+
+async def get_ki_image_by_digest(db: AsyncSession, image_digest: str, image_name: Optional[str] = None,
+                                 image_tag: Optional[str] = None) -> Optional[KIImage]:
+    """
+    Gibt das (älteste) KI-Image mit der Docker-Image-ID (image_digest) zurück, optional nur mit
+    diesem Namen/Tag, oder None (über ux_ki_image_digest_name_tag).
+    """
+    try:
+        filters = ki_image_digest_filters(image_digest, image_name, image_tag)
+        return await db.scalar(select(KIImage).where(*filters).order_by(KIImage.image_id).limit(1))
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Abrufen eines KI-Images.") from e
+
+
+async def get_ki_image_by_id(db: AsyncSession, image_id: int):
+    """
+    Gibt ein KI-Image anhand seiner ID zurück.
+    - Treffer im Metadaten-Cache (siehe cache.py) werden ohne Datenbankzugriff beantwortet.
+    - Wirft KIImageNotFound, wenn nicht gefunden.
+    - Wirft DatabaseError bei SQLAlchemy-Problemen.
+    """
+    cached = cached_instance(ki_image_cache, KIImage, image_id)
+    if cached is not None:
+        return cached
+    generation = ki_image_cache.generation
+    image = await _load_ki_image(db, image_id)
+    ki_image_cache.set(image_id, to_columns(image), generation)
+    return image
+
+
+async def get_all_ki_images(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                            image_name: Optional[str] = None, image_tag: Optional[str] = None,
+                            provider_id: Optional[int] = None):
+    """
+    Gibt eine Seite KI-Bilder (Keyset auf image_id) und den Cursor der nächsten Seite zurück.
+    - Wirft NoKIImagesInTheList, wenn die erste Seite leer ist.
+    - Wirft InvalidCursor bei ungültigem Cursor.
+    - Wirft DatabaseError bei unerwarteten DB-Problemen.
+    """
+    try:
+        filters = ki_image_filters(image_name, image_tag, provider_id)
+        stmt = keyset_select(KIImage, KIImage.image_id, filters, cursor, limit)
+        images, next_cursor = split_page((await db.scalars(stmt)).all(), "image_id", limit)
+        if not images and not cursor:
+            raise NoKIImagesInTheList("Es befinden sich keine KI-Bilder in der Datenbank.")
+        return images, next_cursor
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+async def get_ki_image_rows(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                            image_name: Optional[str] = None, image_tag: Optional[str] = None,
+                            provider_id: Optional[int] = None):
+    """
+    Wie get_all_ki_images, liest aber nur die Spalten aus KI_IMAGE_LIST_COLUMNS als Tupel
+    (keine ORM-Instanzen, keine Identity-Map). Rückgabe: (Zeilen, nächster Cursor).
+    """
+    try:
+        filters = ki_image_filters(image_name, image_tag, provider_id)
+        stmt = keyset_select(KI_IMAGE_LIST_COLUMNS, KIImage.image_id, filters, cursor, limit)
+        rows, next_cursor = split_page((await db.execute(stmt)).all(), "image_id", limit)
+        if not rows and not cursor:
+            raise NoKIImagesInTheList("Es befinden sich keine KI-Bilder in der Datenbank.")
+        return rows, next_cursor
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+async def stream_ki_image_rows(db: AsyncSession, cursor: Optional[str] = None,
+                               image_name: Optional[str] = None, image_tag: Optional[str] = None,
+                               provider_id: Optional[int] = None) -> AsyncIterator[List]:
+    """
+    Liefert alle passenden Zeilen ab dem Cursor in Paketen von STREAM_BATCH_SIZE (serverseitiger Cursor).
+    """
+    try:
+        filters = ki_image_filters(image_name, image_tag, provider_id)
+        stmt = keyset_select(KI_IMAGE_LIST_COLUMNS, KIImage.image_id, filters, cursor, limit=None)
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Lesen der Datenbank.") from e
+
+
+async def update_ki_image(db: AsyncSession, image_id: int, update_data: dict):
+    """
+    Aktualisiert ein KI-Bild anhand der ID.
+    - Wirft KIImageNotFound, wenn das Bild nicht existiert.
+    """
+    try:
+        image = await _load_ki_image(db, image_id)
+        for key, value in update_data.items():
+            setattr(image, key, value)
+
+        await db.commit()
+        ki_image_cache.invalidate([image_id])
+        await db.refresh(image)
+        return image
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise DatabaseError("Fehler beim Aktualisieren eines KI-Images.") from e
+
+
+async def delete_ki_image(db: AsyncSession, image_id: int):
+    """
+    Löscht ein KI-Image anhand seiner ID.
+    - Gibt das gelöschte Objekt zurück.
+    - Wirft KIImageNotFound, wenn nicht vorhanden.
+    """
+    try:
+        image = await _load_ki_image(db, image_id)
+        await db.delete(image)
+        await db.commit()
+        ki_image_cache.invalidate([image_id])
+        return image
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise DatabaseError("Fehler beim Löschen eines KI-Images.") from e
+
+
+async def _load_ki_image(db: AsyncSession, image_id: int):
+    """
+    Liest ein KI-Image ohne Cache – für schreibende Funktionen, die eine an die Session gebundene Instanz brauchen.
+    """
+    try:
+        image = await db.get(KIImage, image_id)
+        if not image:
+            raise KIImageNotFound(f"KI-Image mit ID {image_id} nicht gefunden.")
+        return image
+    except SQLAlchemyError as e:
+        raise DatabaseError("Fehler beim Abrufen eines KI-Images.") from e
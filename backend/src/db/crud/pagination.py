@@ -0,0 +1,69 @@
+"""
+pagination.py
+-----------------
+Keyset-Pagination (Cursor auf dem Primärschlüssel) für die Listen-Endpunkte.
+Die Statements werden hier gebaut und von den synchronen und asynchronen CRUD-Modulen
+gleichermaßen ausgeführt. Statt OFFSET wird mit "key > letzter Schlüssel" weitergeblättert,
+sodass jede Seite unabhängig von ihrer Position über den Index gelesen wird.
+Pfad: backend/src/db/crud/pagination.py
+"""
+import base64
+import binascii
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+from src.db.core.exceptions import InvalidCursor
+
+# Standard- und Maximalgröße einer Seite
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Zeilen pro Paket beim Streamen kompletter Ergebnismengen
+STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "1000"))
+
+_CURSOR_VERSION = 1
+
+
+# Kodiert den letzten Schlüssel einer Seite als undurchsichtigen Cursor
+def encode_cursor(last_key: int) -> str:
+    payload = json.dumps({"v": _CURSOR_VERSION, "k": last_key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+# Liest den Schlüssel aus einem Cursor; wirft InvalidCursor bei manipulierten oder fremden Werten
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = payload["k"]
+        if payload.get("v") != _CURSOR_VERSION or not isinstance(key, int) or isinstance(key, bool):
+            raise ValueError(payload)
+        return key
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Ungültiger Cursor: {cursor!r}") from e
+
+
+# Baut das SELECT für eine Seite: Filter, "key > Cursor", Sortierung nach Schlüssel, limit + 1 Zeilen
+# model ist ein ORM-Modell oder eine Liste von Spalten (Projektion, liefert Row-Tupel);
+# limit=None liest alle Zeilen ab dem Cursor (z. B. für Streaming)
+def keyset_select(model, key_column, filters: Sequence = (), cursor: Optional[str] = None,
+                  limit: Optional[int] = DEFAULT_PAGE_SIZE) -> Select:
+    stmt = select(*model) if isinstance(model, (list, tuple)) else select(model)
+    stmt = stmt.where(*filters)
+    if cursor:
+        stmt = stmt.where(key_column > decode_cursor(cursor))
+    stmt = stmt.order_by(key_column)
+    if limit is None:
+        return stmt
+    # Eine Zeile mehr lesen, um ohne COUNT zu erkennen, ob es eine weitere Seite gibt
+    return stmt.limit(min(limit, MAX_PAGE_SIZE) + 1)
+
+
+# Trennt die Zusatzzeile ab und liefert (Einträge, nächster Cursor oder None)
+def split_page(rows: Sequence, key_attr: str, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List, Optional[str]]:
+    limit = min(limit, MAX_PAGE_SIZE)
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    return items, encode_cursor(getattr(items[-1], key_attr))
@@ -5,9 +5,16 @@ Diese Datei stellt die Verbindung zur Datenbank her und definiert die SessionFac
 Pfad: backend/src/database/database.py
 """
 import os
+import threading
+from time import perf_counter
+from contextlib import contextmanager
+from typing import Iterator
 from dotenv import load_dotenv  # Lädt Umgebungsvariablen aus einer .env-Datei
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # Lade Umgebungsvariablen aus .env-Datei
 load_dotenv(dotenv_path="./backend/.env")
@@ -15,12 +22,127 @@ load_dotenv(dotenv_path="./backend/.env")
 # Hole die Datenbank-URL aus der Umgebungsvariable
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Einstellungen des Verbindungspools (Wartezeit und Recycle-Intervall in Sekunden)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+class PoolStats:
+    """Thread-sichere Zähler für Verbindungsausgaben und Wartezeiten des Pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_ms / attempts, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+# Misst die Wartezeit jeder Verbindungsausgabe; die Zähler stehen im Klassenattribut stats
+class PoolStatsMixin:
+    stats: PoolStats
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record((perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.stats.record((perf_counter() - start) * 1000)
+        return connection
+
+
+# QueuePool der synchronen Engine (Async-Variante siehe database_async.py)
+class InstrumentedQueuePool(PoolStatsMixin, QueuePool):
+    stats = pool_stats
+
+
+def _engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    # In-Memory-SQLite (z. B. Tests) verwendet einen eigenen Pool ohne Größenangaben
+    if url and make_url(url).get_backend_name() == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
 # Erstelle die SQLAlchemy Engine für die Verbindung zur Datenbank
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL))
 
 # Erstelle eine SessionFactory (SessionLocal), um Sessions mit der DB zu erzeugen
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# Liefert den aktuellen Zustand eines Pools und die gesammelten Wartezeiten
+def describe_pool(name: str, pool, stats: PoolStats) -> dict:
+    description = {"name": name, "pool_class": type(pool).__name__, "pre_ping": DB_POOL_PRE_PING}
+    if isinstance(pool, QueuePool):
+        description.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            max_overflow=DB_MAX_OVERFLOW,
+            timeout=DB_POOL_TIMEOUT,
+            recycle=DB_POOL_RECYCLE,
+        )
+    description.update(stats.snapshot())
+    return description
+
+
+def get_pool_stats() -> dict:
+    return describe_pool("sync", engine.pool, pool_stats)
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Session für Code außerhalb von Requests (Services, Hintergrund-Jobs, Worker-Prozesse).
+    Commit bei Erfolg, Rollback bei Fehlern – die Verbindung geht in jedem Fall an den Pool zurück.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 def get_db():
     """
     Dependency, die eine DB-Session bereitstellt und nach der Verwendung wieder schließt.
@@ -0,0 +1,84 @@
+"""
+database_async.py
+-------------
+Asynchrone Variante von database.py für die FastAPI-Routen (SQLAlchemy asyncio).
+Die URL wird aus DATABASE_URL abgeleitet (postgresql → asyncpg, sqlite → aiosqlite),
+kann aber über ASYNC_DATABASE_URL explizit gesetzt werden.
+Pfad: backend/src/db/database/database_async.py
+"""
+import os
+from typing import AsyncIterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.db.database.database import (
+    DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT,
+    PoolStats, PoolStatsMixin, describe_pool
+)
+
+# Lade Umgebungsvariablen aus .env-Datei
+load_dotenv(dotenv_path="./backend/.env")
+
+# Async-Treiber je Datenbank-Backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+# Übersetzt eine synchrone Datenbank-URL in die URL des passenden Async-Treibers
+def to_async_url(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return url
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(os.getenv("DATABASE_URL"))
+
+async_pool_stats = PoolStats()
+
+
+# Pool der asynchronen Engine mit denselben Wartezeit-Messungen wie InstrumentedQueuePool
+class InstrumentedAsyncQueuePool(PoolStatsMixin, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+def _engine_options(url: str) -> dict:
+    # Gleiche Pool-Einstellungen wie die synchrone Engine (siehe database.py)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+# Erstelle die asynchrone Engine und die zugehörige SessionFactory
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL))
+
+# expire_on_commit=False: zurückgegebene Objekte bleiben nach dem Commit ohne erneute Abfrage lesbar
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+def get_async_pool_stats() -> dict:
+    return describe_pool("async", async_engine.sync_engine.pool, async_pool_stats)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency, die eine asynchrone DB-Session bereitstellt und nach der Verwendung wieder schließt.
+    Verwendung in FastAPI mit: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,7 +1,7 @@
 # db_models.py
 # -------------------------
 import datetime
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, Date, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -14,6 +14,14 @@ class KIImage(Base):
     Tabelle 'ki_image_metadata' für die Speicherung von KI-Image-Metadaten.
     """
     __tablename__ = 'ki_image_metadata'
+    __table_args__ = (
+        # Filter + Keyset-Pagination: WHERE <Filter> AND image_id > :cursor ORDER BY image_id
+        Index("ix_ki_image_name_tag_id", "image_name", "image_tag", "image_id"),
+        Index("ix_ki_image_tag_id", "image_tag", "image_id"),   # Filter nur nach Tag
+        Index("ix_ki_image_provider_id", "image_provider_id", "image_id"),
+        # Ein Docker-Image (Image-ID) wird pro Name:Tag nur einmal gespeichert
+        Index("ux_ki_image_digest_name_tag", "image_digest", "image_name", "image_tag", unique=True),
+    )
 
     image_id = Column(Integer, primary_key=True, autoincrement=True)
     image_name = Column(String(255), nullable=False)
@@ -22,6 +30,9 @@ class KIImage(Base):
     image_reference = Column(String(255), nullable=True)
     image_provider_id = Column(Integer, nullable=False)
     image_created_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    # Image-ID im Docker-Daemon ("sha256:…", Digest der Config) und Größe in Bytes
+    image_digest = Column(String(80), nullable=True)
+    image_size = Column(BigInteger, nullable=True)
 
     def __repr__(self):
         return f"<KIImage(id={self.image_id}, name='{self.image_name}', tag='{self.image_tag}')>"
@@ -36,10 +47,29 @@ class DICOMMetadata(Base):
     Alle Spalten haben den Prefix 'dicom_'.
     """
     __tablename__ = "dicom_metadata"
+    __table_args__ = (
+        # Filter + Keyset-Pagination: WHERE dicom_modality = :m AND dicom_id > :cursor ORDER BY dicom_id
+        Index("ix_dicom_modality_id", "dicom_modality", "dicom_id"),
+        # Studie → Serie → Instanz (auch für Abfragen nur nach Studie bzw. Studie + Serie)
+        Index("ix_dicom_study_series_instance", "dicom_study_uid", "dicom_series_uid", "dicom_instance_number"),
+        Index("ix_dicom_series_instance", "dicom_series_uid", "dicom_instance_number"),
+        Index("ix_dicom_study_date_id", "dicom_study_date", "dicom_id"),
+        Index("ix_dicom_content_hash", "dicom_content_hash"),
+    )
 
     dicom_id = Column(Integer, primary_key=True, index=True)
     dicom_uuid = Column(String(128), unique=True, nullable=False)
     dicom_modality = Column(String(50), nullable=True)
+    dicom_pixel_array_file = Column(String(512), nullable=True)  # Pfad zur gespeicherten Pixel-Datei (.npy/.pxz)
+    dicom_anonymized_file = Column(String(512), nullable=True)   # Pfad zur anonymisierten DICOM-Datei
+    dicom_content_hash = Column(String(80), nullable=True)       # Inhalts-Hash (siehe hasher.py), Teil der Dateinamen
+    dicom_study_uid = Column(String(128), nullable=True)
+    dicom_series_uid = Column(String(128), nullable=True)
+    dicom_study_date = Column(Date, nullable=True)
+    dicom_instance_number = Column(Integer, nullable=True)
+    dicom_rows = Column(Integer, nullable=True)
+    dicom_columns = Column(Integer, nullable=True)
+    dicom_frames = Column(Integer, nullable=True)
 
     def __repr__(self):
         return f"<DICOMMetadata(id={self.dicom_id}, uuid='{self.dicom_uuid}', modality='{self.dicom_modality}')>"
@@ -5,7 +5,7 @@ import os
 
 # Lade Umgebungsvariablen aus der .env-Datei
 load_dotenv()
-from db.database.database import engine
+from src.db.database.database import engine
 # SQLAlchemy & Datenbank
 
 from fastapi import FastAPI, Depends, HTTPException 
@@ -22,13 +22,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import text
 from db.db_models import db_models
-from db.database import database
-from db.database.database import engine  # 
 
 # API-Routen importieren
 from api.routes import routes_kiImage
 from api.routes import routes_kiContainer
 from api.routes import routes_dicom
+from api.routes import routes_monitoring
+
+# Prozess-Pool und Protokoll-Queue für die DICOM-Verarbeitung
+from services.dicom import ingest_pool
+from services.dicom import ingest_logging
 
 # FastAPI-App instanzieren
 app = FastAPI(
@@ -50,6 +53,7 @@ app.include_router(routes_kiImage.router)
 app.include_router(routes_kiContainer.router)
 
 app.include_router(routes_dicom.router)
+app.include_router(routes_monitoring.router)
 
 # Erstelle bei Anwendungstart temporäre Upload-Verzeichnisse
 @app.on_event("startup")
@@ -59,6 +63,24 @@ def prepare_temp_dirs():
     os.makedirs(upload_dir, exist_ok=True)
     os.makedirs(processed_dir, exist_ok=True)
 
+# Starte den Container-Index (Docker-Events) und den Warm-Pool (vorgewärmte, pausierte Container pro KI-Image)
+@app.on_event("startup")
+def start_container_services():
+    routes_kiContainer.container_service.index.start()
+    routes_kiContainer.container_service.warm_pool.start()
+
+# Beende beim Herunterfahren den Prozess-Pool der DICOM-Verarbeitung und leere die Protokoll-Queue
+@app.on_event("shutdown")
+def shutdown_ingest_pool():
+    ingest_pool.shutdown_executor()
+    ingest_logging.stop_ingest_logging()
+
+# Beende Auffüll-Thread des Warm-Pools (pausierte Container bleiben erhalten) und Event-Stream des Container-Index
+@app.on_event("shutdown")
+def shutdown_container_services():
+    routes_kiContainer.container_service.warm_pool.shutdown()
+    routes_kiContainer.container_service.index.shutdown()
+
 
 
 app.add_middleware(
@@ -66,4 +88,5 @@ app.add_middleware(
     allow_origins=["*"],  # für lokale Entwicklung
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Cursor der nächsten Seite bei /dicoms und /ki-images
 )
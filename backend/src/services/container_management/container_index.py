@@ -0,0 +1,182 @@
+# Externe Libraries
+import os
+import re
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Set
+from docker.errors import DockerException
+
+from src.services.container_management.warm_pool import LABEL_IMAGE
+
+logger = logging.getLogger(__name__)
+
+# Wartezeit vor einem neuen Abgleich, wenn der Event-Stream des Daemons abbricht (Sekunden)
+CONTAINER_INDEX_RETRY_INTERVAL = float(os.getenv("CONTAINER_INDEX_RETRY_INTERVAL", "5"))
+
+# User-Container heißen user_{id}_{image}_{tag} (siehe ContainerService.start_user_container)
+_USER_NAME = re.compile(r"^user_(\d+)_")
+
+# Docker-Event → Container-Status (nicht aufgeführte Aktionen wie exec_* oder kill ändern den Status nicht)
+_EVENT_STATUS = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+}
+
+
+def user_id_from_name(name: str) -> Optional[int]:
+    match = _USER_NAME.match(name)
+    return int(match.group(1)) if match else None
+
+
+class ContainerIndex:
+    """
+    In-Memory-Abbild aller Container des Daemons (ID → Name, Status, Image, User), mit Nebenindizes
+    nach User und Image. Ein einmaliger Abgleich über die Listen-API füllt den Index, danach hält
+    ein Thread ihn über den Event-Stream (client.events) aktuell. Abfragen kommen ohne Daemon-Aufruf aus.
+    """
+
+    def __init__(self, client, retry_interval: float = CONTAINER_INDEX_RETRY_INTERVAL):
+        self.client = client
+        self.retry_interval = retry_interval
+        self._entries: Dict[str, dict] = {}           # container_id → Eintrag
+        self._by_name: Dict[str, str] = {}            # Name → container_id
+        self._by_user: Dict[int, Set[str]] = {}
+        self._by_image: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._events = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """True, solange der Index mit dem Event-Stream synchron ist."""
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="container-index", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._ready.clear()
+        events = self._events
+        if events is not None:
+            events.close()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def get(self, container_id_or_name: str) -> Optional[dict]:
+        """Sucht nach ID, Name oder eindeutigem ID-Präfix (wie die Docker-CLI)."""
+        with self._lock:
+            container_id = self._by_name.get(container_id_or_name, container_id_or_name)
+            entry = self._entries.get(container_id)
+            if entry is None and len(container_id_or_name) >= 12:
+                matches = [e for cid, e in self._entries.items() if cid.startswith(container_id_or_name)]
+                entry = matches[0] if len(matches) == 1 else None
+            return dict(entry) if entry else None
+
+    def list(self, user_id: Optional[int] = None, image_reference: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            if user_id is not None:
+                ids = self._by_user.get(user_id, set())
+                if image_reference is not None:
+                    ids = ids & self._by_image.get(image_reference, set())
+            elif image_reference is not None:
+                ids = self._by_image.get(image_reference, set())
+            else:
+                ids = self._entries.keys()
+            return [dict(self._entries[container_id]) for container_id in ids]
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                # Events ab dem Zeitpunkt vor dem Abgleich – was dazwischen passiert, wird nachgespielt
+                since = int(time.time())
+                self._events = self.client.events(since=since, filters={"type": "container"}, decode=True)
+                self._resync()
+                self._ready.set()
+                logger.info(f"[ContainerIndex] {len(self._entries)} Container indiziert, folge dem Event-Stream")
+                for event in self._events:
+                    self._apply_event(event)
+            except DockerException as e:
+                logger.error(f"[ContainerIndex] Event-Stream abgebrochen → {str(e)}")
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.exception(f"[ContainerIndex] Unerwarteter Fehler → {str(e)}")
+            finally:
+                self._ready.clear()
+            self._stopped.wait(self.retry_interval)
+
+    # Vollständiger Abgleich über die Listen-API (ohne Inspect pro Container)
+    def _resync(self) -> None:
+        containers = self.client.api.containers(all=True)
+        with self._lock:
+            self._entries.clear()
+            self._by_name.clear()
+            self._by_user.clear()
+            self._by_image.clear()
+            for c in containers:
+                name = (c.get("Names") or [""])[0].lstrip("/")
+                image = (c.get("Labels") or {}).get(LABEL_IMAGE) or c.get("Image")
+                self._put(c["Id"], name, c.get("State", ""), image)
+
+    def _apply_event(self, event: dict) -> None:
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID") or event.get("id")
+        action = (event.get("Action") or event.get("status") or "").split(":")[0]
+        if not container_id:
+            return
+        attributes = actor.get("Attributes") or {}
+
+        with self._lock:
+            entry = self._entries.get(container_id)
+            if action == "destroy":
+                if entry:
+                    self._drop(container_id)
+                return
+            if entry is None:
+                if action not in _EVENT_STATUS:
+                    return
+                image = attributes.get(LABEL_IMAGE) or attributes.get("image")
+                self._put(container_id, attributes.get("name", ""), _EVENT_STATUS[action], image)
+                return
+            if action == "rename":
+                # Umbenennung ändert ggf. den User (z. B. Übernahme aus dem Warm-Pool)
+                self._drop(container_id)
+                self._put(container_id, attributes.get("name", entry["name"]), entry["status"], entry["image_reference"])
+            elif action in _EVENT_STATUS:
+                entry["status"] = _EVENT_STATUS[action]
+
+    def _put(self, container_id: str, name: str, status: str, image_reference: Optional[str]) -> None:
+        user_id = user_id_from_name(name)
+        self._entries[container_id] = {
+            "container_id": container_id, "name": name, "status": status,
+            "image_reference": image_reference, "user_id": user_id,
+        }
+        self._by_name[name] = container_id
+        if user_id is not None:
+            self._by_user.setdefault(user_id, set()).add(container_id)
+        if image_reference:
+            self._by_image.setdefault(image_reference, set()).add(container_id)
+
+    def _drop(self, container_id: str) -> None:
+        entry = self._entries.pop(container_id)
+        if self._by_name.get(entry["name"]) == container_id:
+            del self._by_name[entry["name"]]
+        for index, key in ((self._by_user, entry["user_id"]), (self._by_image, entry["image_reference"])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(container_id)
+                if not ids:
+                    del index[key]
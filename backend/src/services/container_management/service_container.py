@@ -3,6 +3,11 @@ import logging
 import docker
 from docker.errors import DockerException, NotFound, ImageNotFound
 
+# Vorgewärmte Container (Warm-Pool)
+from src.services.container_management.warm_pool import WarmContainerPool, container_labels, LABEL_IMAGE
+# In-Memory-Index aller Container (per Docker-Events aktuell gehalten)
+from src.services.container_management.container_index import ContainerIndex
+
 # API Models (Pydantic)
 from src.api.py_models.py_models import ContainerResponse
 
@@ -15,9 +20,15 @@ logger = logging.getLogger(__name__)
 class ContainerService:
     def __init__(self):
         self.client = docker.from_env()
+        # Start/Stop des Auffüll-Threads über die Startup-/Shutdown-Events in main.py
+        self.warm_pool = WarmContainerPool(self.client)
+        self.index = ContainerIndex(self.client)
 
     def start_user_container(self, db: Session, user_id: int, image_id: int) -> ContainerResponse:
-        """Startet einen pro-User-Container; startet existierenden oder erstellt neuen."""
+        """
+        Startet einen pro-User-Container: setzt einen existierenden fort bzw. startet ihn,
+        übernimmt sonst einen vorgewärmten Container aus dem Warm-Pool oder erstellt einen neuen.
+        """
         try:
             # Hole Image aus DB
             ki_image = crud_kiImage.get_ki_image_by_id(db, image_id)
@@ -32,24 +43,32 @@ class ContainerService:
             try:
                 # Prüfen ob Container existiert
                 container = self.client.containers.get(container_name)
-                if container.status != "running":
+                if container.status == "paused":
+                    # Freigegebene Container sind nur pausiert (siehe release_container)
+                    container.unpause()
+                    container.reload()
+                    logger.info(f"Unpaused existing container {container_name}")
+                elif container.status != "running":
                     container.start()
                     container.reload()
                     logger.info(f"Started existing container {container_name}")
                 else:
                     logger.info(f"Container {container_name} already running")
             except NotFound:
-                # Neuer Container erstellen
-                logger.info(f"Creating new container {container_name}")
-                container = self.client.containers.run(
-                    image=image_reference,
-                    name=container_name,
-                    command="tail -f /dev/null", # eventuell nochmal relevant
-                    detach=True
-                )
-                #container.start()
-                container.reload()
-                logger.info(f"Started existing container {container_name}")
+                container = self.warm_pool.claim(image_reference, container_name)
+                if container is None:
+                    # Neuer Container erstellen
+                    logger.info(f"Creating new container {container_name}")
+                    container = self.client.containers.run(
+                        image=image_reference,
+                        name=container_name,
+                        command="tail -f /dev/null", # eventuell nochmal relevant
+                        detach=True,
+                        labels=container_labels(image_reference)
+                    )
+                    #container.start()
+                    container.reload()
+                    logger.info(f"Started new container {container_name}")
 
 
             return ContainerResponse(
@@ -73,6 +92,19 @@ class ContainerService:
         except DockerException as e:
             raise Exception(f"Failed to stop container: {str(e)}")
 
+    def release_container(self, container_id_or_name: str) -> dict:
+        """Gibt einen Container frei, indem er pausiert wird – der nächste Start setzt ihn ohne Neustart fort."""
+        try:
+            container = self.client.containers.get(container_id_or_name)
+            if container.status == "running":
+                container.pause()
+            container.reload()
+            return {"container_id": container.id, "name": container.name, "status": container.status}
+        except NotFound:
+            raise Exception(f"Container {container_id_or_name} not found")
+        except DockerException as e:
+            raise Exception(f"Failed to release container: {str(e)}")
+
     def remove_container(self, container_id_or_name: str) -> dict:
         """Löscht einen Container anhand ID oder Name."""
         try:
@@ -85,7 +117,14 @@ class ContainerService:
             raise Exception(f"Failed to remove container: {str(e)}")
 
     def get_container_status(self, container_id_or_name: str) -> dict:
-        """Gibt Status eines Containers (ID oder Name) zurück."""
+        """
+        Gibt Status eines Containers (ID oder Name) zurück.
+        Aus dem Container-Index, solange dieser synchron ist; sonst (oder bei unbekanntem Container) vom Daemon.
+        """
+        if self.index.ready:
+            entry = self.index.get(container_id_or_name)
+            if entry is not None:
+                return {"container_id": entry["container_id"], "name": entry["name"], "status": entry["status"]}
         try:
             container = self.client.containers.get(container_id_or_name)
             return {
@@ -98,8 +137,14 @@ class ContainerService:
         except DockerException as e:
             raise Exception(f"Failed to get container status: {str(e)}")
 
-    def list_containers(self, user_id: int = None) -> list:
-        """Listet alle Container, optional gefiltert nach user_id."""
+    def list_containers(self, user_id: int = None, image_reference: str = None) -> list:
+        """
+        Listet alle Container, optional gefiltert nach user_id und/oder Image.
+        Aus dem Container-Index (nur die passenden Einträge); ohne synchronen Index über den Daemon.
+        """
+        if self.index.ready:
+            entries = self.index.list(user_id=user_id or None, image_reference=image_reference)
+            return [{"container_id": e["container_id"], "name": e["name"], "status": e["status"]} for e in entries]
         try:
             containers = self.client.containers.list(all=True)
             result = []
@@ -107,6 +152,9 @@ class ContainerService:
                 if user_id:
                     if not c.name.startswith(f"user_{user_id}_"):
                         continue
+                if image_reference:
+                    if c.labels.get(LABEL_IMAGE) != image_reference:
+                        continue
                 result.append({
                     "container_id": c.id,
                     "name": c.name,
@@ -0,0 +1,201 @@
+# Externe Libraries
+import os
+import uuid
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from docker.errors import APIError, DockerException, NotFound
+
+logger = logging.getLogger(__name__)
+
+# Labels aller vom Backend angelegten Container (Labels sind nach dem Erstellen unveränderlich –
+# ob ein Container im Pool wartet oder einem User gehört, steht daher im Namen)
+LABEL_MANAGED = "mray.managed"
+LABEL_IMAGE = "mray.image"
+WARM_NAME_PREFIX = "warm_"
+
+# Vorgewärmte Container pro Image, sobald es einmal gestartet wurde (0 = Pool nur für KI_WARM_POOL_IMAGES)
+KI_WARM_POOL_SIZE = int(os.getenv("KI_WARM_POOL_SIZE", "1"))
+# Beim Start vorzuwärmende Images, z. B. "model:1.0=2,other:latest" (ohne "=N" gilt KI_WARM_POOL_SIZE)
+KI_WARM_POOL_IMAGES = os.getenv("KI_WARM_POOL_IMAGES", "")
+# Spätestens nach so vielen Sekunden prüft der Hintergrund-Thread die Füllstände erneut
+KI_WARM_POOL_REFILL_INTERVAL = float(os.getenv("KI_WARM_POOL_REFILL_INTERVAL", "30"))
+
+
+def container_labels(image_reference: str) -> dict:
+    return {LABEL_MANAGED: "true", LABEL_IMAGE: image_reference}
+
+
+def parse_pool_images(spec: str, default_size: int = KI_WARM_POOL_SIZE) -> Dict[str, int]:
+    """
+    "model:1.0=2,other:latest" → {"model:1.0": 2, "other:latest": default_size}
+    """
+    sizes = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        reference, _, size = item.partition("=")
+        sizes[reference.strip()] = int(size) if size.strip() else default_size
+    return sizes
+
+
+class WarmContainerPool:
+    """
+    Hält pro Image vorab erstellte, gestartete und pausierte Container bereit.
+    claim() benennt einen davon für den User um und setzt ihn fort (unpause) – statt Create + Start
+    über containers.run. Ein Hintergrund-Thread füllt den Pool danach wieder auf.
+    """
+
+    def __init__(self, client, default_size: int = KI_WARM_POOL_SIZE,
+                 images: Optional[Dict[str, int]] = None,
+                 refill_interval: float = KI_WARM_POOL_REFILL_INTERVAL):
+        self.client = client
+        self.default_size = default_size
+        self.refill_interval = refill_interval
+        self._targets: Dict[str, int] = dict(images if images is not None else parse_pool_images(KI_WARM_POOL_IMAGES))
+        self._idle: Dict[str, Deque[str]] = {}   # image_reference → IDs wartender Container
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Übernimmt wartende Container aus einem früheren Lauf und startet den Auffüll-Thread
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._adopt_existing()
+        self._thread = threading.Thread(target=self._refill_loop, name="warm-container-pool", daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+
+    def shutdown(self) -> None:
+        """Beendet den Auffüll-Thread; pausierte Container bleiben für den nächsten Start erhalten."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def claim(self, image_reference: str, container_name: str):
+        """
+        Gibt einen laufenden, auf container_name umbenannten Pool-Container zurück oder None,
+        wenn für das Image gerade keiner bereitsteht. Das Image wird dabei für das Auffüllen vorgemerkt.
+        """
+        with self._lock:
+            if self.default_size > 0:
+                self._targets.setdefault(image_reference, self.default_size)
+        self._wakeup.set()
+
+        while True:
+            with self._lock:
+                idle = self._idle.get(image_reference)
+                container_id = idle.popleft() if idle else None
+            if container_id is None:
+                return None
+            try:
+                container = self.client.containers.get(container_id)
+            except NotFound:
+                continue
+            except DockerException as e:
+                logger.warning(f"[WarmPool] Container {container_id[:12]} nicht lesbar → {str(e)}")
+                self._discard(container_id)
+                continue
+            try:
+                container.rename(container_name)
+            except APIError as e:
+                if e.status_code != 409:
+                    logger.warning(f"[WarmPool] Container {container_id[:12]} nicht umbenennbar → {str(e)}")
+                    self._discard(container_id)
+                    continue
+                # Namenskonflikt: ein paralleler Start hat den User-Container schon angelegt –
+                # Pool-Container zurücklegen und den vorhandenen Container verwenden
+                with self._lock:
+                    self._idle.setdefault(image_reference, deque()).appendleft(container_id)
+                logger.info(f"[WarmPool] {container_name} existiert bereits, Pool-Container {container_id[:12]} zurückgelegt")
+                return self._resume(self.client.containers.get(container_name))
+            try:
+                self._resume(container)
+                logger.info(f"[WarmPool] Container {container_id[:12]} für {container_name} übernommen")
+                return container
+            except NotFound:
+                continue
+            except DockerException as e:
+                logger.warning(f"[WarmPool] Container {container_id[:12]} nicht übernehmbar → {str(e)}")
+                self._discard(container_id)
+
+    @staticmethod
+    def _resume(container):
+        if container.status == "paused":
+            container.unpause()
+        elif container.status != "running":
+            container.start()
+        container.reload()
+        return container
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            images = set(self._targets) | set(self._idle)
+            return [
+                {"image_reference": image, "target": self._targets.get(image, 0), "idle": len(self._idle.get(image, ()))}
+                for image in sorted(images)
+            ]
+
+    def _refill_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
+            with self._lock:
+                targets = list(self._targets.items())
+            for image_reference, target in targets:
+                while not self._stopped.is_set() and self._idle_count(image_reference) < target:
+                    if not self._create_warm_container(image_reference):
+                        break
+
+    def _idle_count(self, image_reference: str) -> int:
+        with self._lock:
+            return len(self._idle.get(image_reference, ()))
+
+    def _create_warm_container(self, image_reference: str) -> bool:
+        base_name = image_reference.replace("/", "_").replace(":", "_")
+        name = f"{WARM_NAME_PREFIX}{base_name}_{uuid.uuid4().hex[:8]}"
+        try:
+            container = self.client.containers.run(
+                image=image_reference,
+                name=name,
+                command="tail -f /dev/null",
+                detach=True,
+                labels=container_labels(image_reference)
+            )
+            container.pause()
+        except DockerException as e:
+            logger.error(f"[WarmPool] Vorwärmen von {image_reference} fehlgeschlagen → {str(e)}")
+            return False
+        with self._lock:
+            self._idle.setdefault(image_reference, deque()).append(container.id)
+        logger.info(f"[WarmPool] Container {name} für {image_reference} bereitgestellt")
+        return True
+
+    def _adopt_existing(self) -> None:
+        try:
+            containers = self.client.containers.list(all=True, filters={"label": f"{LABEL_MANAGED}=true"})
+        except DockerException as e:
+            logger.error(f"[WarmPool] Vorhandene Pool-Container nicht lesbar → {str(e)}")
+            return
+        for container in containers:
+            image_reference = container.labels.get(LABEL_IMAGE)
+            if not container.name.startswith(WARM_NAME_PREFIX) or not image_reference:
+                continue
+            if container.status in ("paused", "running"):
+                with self._lock:
+                    self._idle.setdefault(image_reference, deque()).append(container.id)
+            else:
+                self._discard(container.id)
+
+    def _discard(self, container_id: str) -> None:
+        try:
+            self.client.containers.get(container_id).remove(force=True)
+        except DockerException:
+            pass
@@ -1,30 +1,210 @@
-import logging
+import os
+import hashlib
+from functools import lru_cache
+from typing import Dict, Optional
 import pydicom
+from pydicom.datadict import dictionary_VR, tag_for_keyword
+from pydicom.sequence import Sequence
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("anonymizer")
+
+# Anonymisierungsprofil:
+#   "legacy" = die bisherigen 11 Felder werden ersetzt (jetzt auch in verschachtelten Sequenzen)
+#   "basic"  = Auszug aus dem Basic Application Level Confidentiality Profile (DICOM PS3.15, Tabelle E.1-1)
+DICOM_ANON_PROFILE = os.getenv("DICOM_ANON_PROFILE", "legacy").lower()
+# Salt für die Pseudonymisierung von UIDs (gleiche UID + gleicher Salt → gleiche neue UID)
+DICOM_ANON_UID_SALT = os.getenv("DICOM_ANON_UID_SALT", "")
+
+ANONYMIZED_VALUE = "ANONYMIZED"
+
+# Aktionen:
+#   "X" = Element entfernen
+#   "Z" = leeren (Text-VRs erhalten den Platzhalter "ANONYMIZED")
+#   "D" = durch einen zum VR passenden Platzhalter ersetzen
+#   "U" = UID durch eine deterministisch gehashte UID (2.25.<zahl>) ersetzen
+PROFILES = {
+    "legacy": {
+        "actions": {
+            "PatientName": "D",             # Name des Patienten
+            "PatientID": "D",               # Interne ID
+            "PatientBirthDate": "D",        # Geburtsdatum
+            "InstitutionName": "D",         # Name der Klinik
+            "ReferringPhysicianName": "D",  # Überweisender Arzt
+            "OtherPatientIDs": "D",         # Weitere IDs
+            "AccessionNumber": "D",         # Zugriffsnummer
+            "OperatorsName": "D",           # Bedienername
+            "PatientAddress": "D",          # Adresse
+            "IssuerOfPatientID": "D",       # ID-Aussteller
+            "StudyID": "D",                 # Studiennummer
+        },
+        "remove_private": False,
+    },
+    "basic": {
+        "actions": {
+            # Patient
+            "PatientName": "Z",
+            "PatientID": "Z",
+            "PatientBirthDate": "Z",
+            "PatientBirthTime": "X",
+            "PatientSex": "Z",
+            "PatientAge": "X",
+            "PatientSize": "X",
+            "PatientWeight": "X",
+            "PatientAddress": "X",
+            "PatientTelephoneNumbers": "X",
+            "PatientBirthName": "X",
+            "PatientMotherBirthName": "X",
+            "OtherPatientIDs": "X",
+            "OtherPatientNames": "X",
+            "OtherPatientIDsSequence": "X",
+            "IssuerOfPatientID": "X",
+            "MedicalRecordLocator": "X",
+            "EthnicGroup": "X",
+            "Occupation": "X",
+            "MilitaryRank": "X",
+            "BranchOfService": "X",
+            "AdditionalPatientHistory": "X",
+            "PatientComments": "X",
+            "ReferencedPatientSequence": "X",
+            # Studie / Auftrag
+            "AccessionNumber": "Z",
+            "StudyID": "Z",
+            "StudyDate": "Z",
+            "StudyTime": "Z",
+            "StudyDescription": "X",
+            "RequestAttributesSequence": "X",
+            "ReferencedStudySequence": "X",
+            "PerformedProcedureStepDescription": "X",
+            # Personen und Einrichtung
+            "ReferringPhysicianName": "Z",
+            "PhysiciansOfRecord": "X",
+            "PerformingPhysicianName": "X",
+            "NameOfPhysiciansReadingStudy": "X",
+            "RequestingPhysician": "X",
+            "OperatorsName": "X",
+            "InstitutionName": "X",
+            "InstitutionAddress": "X",
+            "InstitutionalDepartmentName": "X",
+            "StationName": "X",
+            "DeviceSerialNumber": "X",
+            # Serie / Gerät
+            "SeriesDescription": "X",
+            "AcquisitionDateTime": "X",
+            "ContentDate": "D",
+            "ContentTime": "D",
+            # UIDs
+            "StudyInstanceUID": "U",
+            "SeriesInstanceUID": "U",
+            "SOPInstanceUID": "U",
+            "FrameOfReferenceUID": "U",
+            "ReferencedSOPInstanceUID": "U",
+            "ReferencedFrameOfReferenceUID": "U",
+        },
+        "remove_private": True,
+    },
+}
+
+# Platzhalter je VR für die Aktion "D" (Text-VRs → "ANONYMIZED")
+TEXT_VRS = frozenset({"PN", "LO", "SH", "LT", "ST", "UT", "UC", "AE"})
+DUMMY_VALUES = {"DA": "19000101", "TM": "000000", "DT": "19000101000000", "AS": "000Y", "IS": "0", "DS": "0"}
+
+MEDIA_STORAGE_SOP_INSTANCE_UID = 0x00020003
+SOP_INSTANCE_UID = 0x00080018
+
+
+# Übersetzt ein Profil einmalig in Integer-Tag-Nummern → Aktion
+@lru_cache(maxsize=None)
+def compile_profile(name: str) -> Dict[int, str]:
+    if name not in PROFILES:
+        raise ValueError(f"Unbekanntes Anonymisierungsprofil: {name}")
+    actions = {}
+    for keyword, action in PROFILES[name]["actions"].items():
+        tag = tag_for_keyword(keyword)
+        if tag is None:
+            raise ValueError(f"Unbekanntes DICOM-Keyword im Profil '{name}': {keyword}")
+        actions[tag] = action
+    return actions
+
 
 # Diese Funktion anonymisiert sensible DICOM-Felder gemäß DSGVO / HIPAA
-def anonymize_dicom_fields(ds: pydicom.Dataset) -> pydicom.Dataset:
+def anonymize_dicom_fields(ds: pydicom.Dataset, profile: Optional[str] = None) -> pydicom.Dataset:
     """
-    Entfernt oder ersetzt personenbezogene Informationen aus dem DICOM-Dataset.
-    Alle ersetzten Felder werden mit dem Wert "ANONYMIZED" befüllt und protokolliert.
+    Durchläuft den Datensatz genau einmal – einschließlich aller verschachtelten Sequenzen –
+    und wendet die Aktionen des Profils (entfernen/ersetzen/hashen) anhand der Tag-Nummern an.
+    Zurückgestellte Elemente (z. B. PixelData) werden dabei nicht geladen.
+    Protokolliert wird eine Zusammenfassung pro Datei, keine Originalwerte.
     """
-    tags_to_anonymize = [
-        "PatientName",              # Name des Patienten
-        "PatientID",                # Interne ID
-        "PatientBirthDate",         # Geburtsdatum
-        "InstitutionName",          # Name der Klinik
-        "ReferringPhysicianName",   # Überweisender Arzt
-        "OtherPatientIDs",          # Weitere IDs
-        "AccessionNumber",          # Zugriffsnummer
-        "OperatorsName",            # Bedienername
-        "PatientAddress",           # Adresse
-        "IssuerOfPatientID",        # ID-Aussteller
-        "StudyID"                   # Studiennummer
-    ]
-
-    for tag in tags_to_anonymize:
-        if tag in ds:
-            original_value = str(ds.get(tag, ""))
-            ds.data_element(tag).value = "ANONYMIZED"
-            logging.info(f"[Anonymizer] Feld '{tag}' anonymisiert (alt: {original_value})")
+    profile = (profile or DICOM_ANON_PROFILE).lower()
+    actions = compile_profile(profile)
+    remove_private = PROFILES[profile]["remove_private"]
+
+    counts = {"X": 0, "Z": 0, "D": 0, "U": 0, "P": 0}
+    _walk(ds, actions, remove_private, counts)
+
+    # Die Meta-Information muss auf die (ggf. gehashte) SOPInstanceUID verweisen
+    file_meta = getattr(ds, "file_meta", None)
+    if counts["U"] and file_meta is not None and MEDIA_STORAGE_SOP_INSTANCE_UID in file_meta and SOP_INSTANCE_UID in ds:
+        file_meta[MEDIA_STORAGE_SOP_INSTANCE_UID].value = ds[SOP_INSTANCE_UID].value
 
+    logger.info(
+        "[Anonymizer] Profil '%s': %s entfernt, %s ersetzt, %s UIDs gehasht, %s private Elemente entfernt",
+        profile, counts["X"], counts["Z"] + counts["D"], counts["U"], counts["P"]
+    )
     return ds
+
+
+def _walk(ds: pydicom.Dataset, actions: Dict[int, str], remove_private: bool, counts: Dict[str, int]) -> None:
+    for tag in list(ds.keys()):
+        if remove_private and tag & 0x10000:
+            del ds[tag]
+            counts["P"] += 1
+            continue
+
+        action = actions.get(tag)
+        if action == "X":
+            del ds[tag]
+            counts["X"] += 1
+            continue
+
+        # get_item liefert Roh-Elemente ohne Konvertierung und ohne zurückgestellte Werte zu laden
+        element = ds.get_item(tag, keep_deferred=True)
+        vr = element.VR or _dictionary_vr(tag)
+
+        if action is not None:
+            _apply(ds, tag, vr, action)
+            counts[action] += 1
+        elif vr == "SQ":
+            for item in ds[tag].value:
+                _walk(item, actions, remove_private, counts)
+
+
+def _apply(ds: pydicom.Dataset, tag: int, vr: Optional[str], action: str) -> None:
+    element = ds[tag]
+    if vr == "SQ":
+        element.value = Sequence()
+    elif action == "U":
+        element.value = _hash_uid(element.value)
+    elif vr in TEXT_VRS:
+        element.value = ANONYMIZED_VALUE
+    elif action == "D" and vr in DUMMY_VALUES:
+        element.value = DUMMY_VALUES[vr]
+    else:
+        element.value = None
+
+
+# Pseudonymisiert eine UID (bei mehrwertigen Elementen jede einzeln) als 2.25.<128-Bit-Zahl>
+def _hash_uid(value):
+    if isinstance(value, (list, pydicom.multival.MultiValue)):
+        return [_hash_uid(v) for v in value]
+    if not value:
+        return value
+    digest = hashlib.sha256(f"{DICOM_ANON_UID_SALT}{value}".encode()).digest()
+    return f"2.25.{int.from_bytes(digest[:16], 'big')}"
+
+
+def _dictionary_vr(tag: int) -> Optional[str]:
+    try:
+        return dictionary_VR(tag)
+    except KeyError:
+        return None
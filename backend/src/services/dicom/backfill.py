@@ -0,0 +1,143 @@
+# backfill.py
+# ----------------------------------------------
+# Trägt die erweiterten DICOM-Metadaten (Studie/Serie/Instanz, Geometrie, Hash, Dateipfade)
+# für bereits gespeicherte '*_anon.dcm'-Dateien nach.
+#
+# Aufruf (im Backend-Container, PYTHONPATH wie für die API):
+#   python -m services.dicom.backfill [--upload-dir DIR] [--processed-dir DIR] [--workers N] [--batch-size N] [--dry-run]
+import os
+import sys
+import argparse
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+import pydicom
+
+from services.dicom.metadata import extract_metadata
+from services.dicom.ingest_logging import get_stage_logger, stop_ingest_logging
+from db.crud import crud_dicom
+from src.db.database.database import session_scope
+
+logger = get_stage_logger("backfill")
+summary_logger = get_stage_logger("summary")
+
+ANON_SUFFIX = "_anon.dcm"
+# Mögliche Pixel-Dateien je Inhalts-Hash (siehe extractor.py / pixel_store.py)
+PIXEL_FILE_SUFFIXES = ("_anon.npy", "_anon.pxz")
+
+# Anzahl Worker-Prozesse zum Lesen der Header (1 = sequentiell)
+DICOM_BACKFILL_WORKERS = int(os.getenv("DICOM_BACKFILL_WORKERS", str(os.cpu_count() or 1)))
+# Dateien pro Aufgabe an einen Worker
+DICOM_BACKFILL_CHUNK_SIZE = int(os.getenv("DICOM_BACKFILL_CHUNK_SIZE", "200"))
+
+
+# Listet alle anonymisierten DICOM-Dateien im Upload-Verzeichnis
+def find_anonymized_files(upload_dir: str) -> List[str]:
+    if not os.path.isdir(upload_dir):
+        return []
+    with os.scandir(upload_dir) as entries:
+        return sorted(entry.path for entry in entries if entry.is_file() and entry.name.endswith(ANON_SUFFIX))
+
+
+# Liest nur den Header einer anonymisierten Datei und baut den Metadatensatz dafür
+def read_file_metadata(path: str, processed_dir: str) -> dict:
+    ds = pydicom.dcmread(path, stop_before_pixels=True)
+    metadata = extract_metadata(ds)
+    if not metadata["dicom_uuid"]:
+        raise ValueError("SOPInstanceUID fehlt")
+
+    # Der Dateiname ist '{Inhalts-Hash}_anon.dcm'
+    content_hash = os.path.basename(path)[:-len(ANON_SUFFIX)]
+    metadata.update(dicom_anonymized_file=path, dicom_content_hash=content_hash)
+
+    # Ein vorhandener Pfad in der Datenbank wird nur überschrieben, wenn die Pixel-Datei gefunden wird
+    for suffix in PIXEL_FILE_SUFFIXES:
+        pixel_file = os.path.join(processed_dir, f"{content_hash}{suffix}")
+        if os.path.exists(pixel_file):
+            metadata["dicom_pixel_array_file"] = pixel_file
+            break
+    return metadata
+
+
+# Worker-Funktion: liest ein Paket von Dateien; Fehler werden pro Datei gesammelt
+def _read_chunk(paths: List[str], processed_dir: str) -> Tuple[List[dict], List[Tuple[str, str]]]:
+    rows, errors = [], []
+    for path in paths:
+        try:
+            rows.append(read_file_metadata(path, processed_dir))
+        except Exception as e:
+            errors.append((path, str(e)))
+    return rows, errors
+
+
+def _iter_chunks(files: List[str], processed_dir: str, workers: int, chunk_size: int) -> Iterable[tuple]:
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    if workers <= 1 or len(chunks) < 2:
+        for chunk in chunks:
+            yield _read_chunk(chunk, processed_dir)
+        return
+
+    # 'spawn' wie beim Ingest-Pool: keine DB-Verbindungen des Elternprozesses in den Workern
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        yield from executor.map(_read_chunk, chunks, [processed_dir] * len(chunks))
+
+
+# Liest alle Header parallel und schreibt die Metadaten paketweise per UPSERT
+def backfill(upload_dir: Optional[str] = None, processed_dir: Optional[str] = None,
+             workers: int = DICOM_BACKFILL_WORKERS, batch_size: int = crud_dicom.DICOM_UPSERT_BATCH_SIZE,
+             chunk_size: int = DICOM_BACKFILL_CHUNK_SIZE, dry_run: bool = False) -> dict:
+    """
+    Rückgabe: {"files": ..., "written": ..., "failed": ...}.
+    Die Pixel-Daten werden nicht gelesen (stop_before_pixels); geschrieben wird über
+    crud_dicom.bulk_upsert_dicom_metadata, d. h. vorhandene Zeilen werden anhand der UID aktualisiert.
+    """
+    upload_dir = upload_dir or os.getenv("UPLOAD_DIR", "/tmp/uploads")
+    processed_dir = processed_dir or os.getenv("PROCESSED_DIR", "/tmp/processed")
+    files = find_anonymized_files(upload_dir)
+    summary_logger.info("[Backfill] %s Dateien in %s gefunden (%s Worker)", len(files), upload_dir, workers)
+
+    stats = {"files": len(files), "written": 0, "failed": 0}
+    pending: List[dict] = []
+
+    def flush() -> None:
+        if pending and not dry_run:
+            with session_scope() as db:
+                crud_dicom.bulk_upsert_dicom_metadata(db, pending)
+        stats["written"] += len(pending)
+        pending.clear()
+
+    for rows, errors in _iter_chunks(files, processed_dir, workers, max(1, chunk_size)):
+        for path, error in errors:
+            logger.error("[Backfill] Header von %s nicht lesbar → %s", path, error)
+        stats["failed"] += len(errors)
+        pending.extend(rows)
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    summary_logger.info("[Backfill] Abgeschlossen: %s", stats)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Erweiterte DICOM-Metadaten aus '*_anon.dcm'-Dateien nachtragen.")
+    parser.add_argument("--upload-dir", help="Verzeichnis der anonymisierten Dateien (Standard: UPLOAD_DIR)")
+    parser.add_argument("--processed-dir", help="Verzeichnis der Pixel-Dateien (Standard: PROCESSED_DIR)")
+    parser.add_argument("--workers", type=int, default=DICOM_BACKFILL_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=crud_dicom.DICOM_UPSERT_BATCH_SIZE,
+                        help="Datensätze pro Transaktion")
+    parser.add_argument("--dry-run", action="store_true", help="Nur lesen, nichts in die Datenbank schreiben")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        stats = backfill(args.upload_dir, args.processed_dir, workers=args.workers,
+                         batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        stop_ingest_logging()
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
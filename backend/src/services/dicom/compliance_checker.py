@@ -1,7 +1,10 @@
-import logging
 from datetime import datetime
 from fastapi import HTTPException
 from pydicom.dataset import Dataset
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("compliance")
+audit_logger = get_stage_logger("audit")
 
 # DSGVO-relevante Felder in DICOM-Dateien
 DSGVO_FIELDS = [
@@ -13,7 +16,7 @@ DSGVO_FIELDS = [
 ANONYMIZED_VALUES = {"ANONYMIZED", "ANONYMOUS", "XXXX", "****", "REMOVED", "N/A", "DEIDENTIFIED"}
 
 def check_compliance(ds: Dataset, filename: str) -> None:
-    logging.info(f"[Compliance] Starte DSGVO/HIPAA-Prüfung für Datei: {filename}")
+    logger.info("[Compliance] Starte DSGVO/HIPAA-Prüfung für Datei: %s", filename)
 
     anonymization_log = []
     for field in DSGVO_FIELDS:
@@ -27,9 +30,9 @@ def check_compliance(ds: Dataset, filename: str) -> None:
             })
 
     if anonymization_log:
-        logging.info(f"[Audit] Anonymisierungsprotokoll für Datei {filename}: {anonymization_log}")
+        audit_logger.info("[Audit] Anonymisierungsprotokoll für Datei %s: %s", filename, anonymization_log)
     else:
-        logging.warning(f"[Compliance] Keine Anonymisierung nachweisbar in Datei {filename}.")
+        logger.warning("[Compliance] Keine Anonymisierung nachweisbar in Datei %s.", filename)
 
     compliance_issues = []
 
@@ -48,11 +51,11 @@ def check_compliance(ds: Dataset, filename: str) -> None:
         compliance_issues.append("Einwilligung zur Datenverarbeitung fehlt.")
 
     if compliance_issues:
-        logging.error(f"[Compliance] Konformitätsprobleme in Datei {filename}: {compliance_issues}")
+        logger.error("[Compliance] Konformitätsprobleme in Datei %s: %s", filename, compliance_issues)
         raise HTTPException(
             status_code=422,
             detail=f"DSGVO/HIPAA compliance issues: {compliance_issues}"
         )
     else:
-        logging.info(f"[Compliance] DSGVO/HIPAA-Grundanforderungen erfüllt für Datei: {filename}")
+        logger.info("[Compliance] DSGVO/HIPAA-Grundanforderungen erfüllt für Datei: %s", filename)
 
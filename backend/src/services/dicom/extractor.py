@@ -1,31 +1,50 @@
 # extractor.py
 import os
-import logging
+from typing import Optional
 import numpy as np
 import pydicom
+from services.dicom.pixel_store import PIXEL_STORE_FORMAT, save_native_pixels, get_rescale, get_number_of_frames
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("extractor")
 
 # Diese Funktion extrahiert das Pixel-Array und speichert es als .npy-Datei im angegebenen oder konfigurierten Verzeichnis
-def extract_pixel_array(ds: pydicom.Dataset, hash_name: str, output_dir: str = None) -> str:
+def extract_pixel_array(ds: pydicom.Dataset, hash_name: str, output_dir: str = None,
+                        pixel_array: Optional[np.ndarray] = None) -> str:
     """
     Wandelt das DICOM-Bild in ein NumPy-Array um und speichert es im .npy-Format.
     Der Speicherort wird über Umgebungsvariable 'PROCESSED_DIR' oder optionalen Parameter gesteuert.
+    Mit PIXEL_STORE_FORMAT=native bleibt der native Datentyp erhalten (siehe pixel_store.py).
+    Ein bereits dekodiertes pixel_array wird direkt verwendet.
     """
     if output_dir is None:
         output_dir = os.getenv("PROCESSED_DIR", "/tmp/processed")
-        logging.info(f"[Extractor] Verwende Standardverzeichnis: {output_dir}")
+        logger.info("[Extractor] Verwende Standardverzeichnis: %s", output_dir)
 
     os.makedirs(output_dir, exist_ok=True)
 
     try:
-        array = ds.pixel_array.astype(np.float32)
-        logging.info(f"[Extractor] Pixel-Array erfolgreich extrahiert")
+        if pixel_array is None:
+            pixel_array = ds.pixel_array
+        if PIXEL_STORE_FORMAT == "native":
+            array = pixel_array
+        else:
+            array = pixel_array.astype(np.float32)
+        logger.info("[Extractor] Pixel-Array erfolgreich extrahiert")
     except Exception as e:
-        logging.error(f"[Extractor] Fehler beim Extrahieren des Pixel-Arrays: {str(e)}")
+        logger.error("[Extractor] Fehler beim Extrahieren des Pixel-Arrays: %s", e)
         raise ValueError("Pixel array extraction failed") from e
 
+    if PIXEL_STORE_FORMAT == "native":
+        slope, intercept = get_rescale(ds)
+        out_path = save_native_pixels(array, os.path.join(output_dir, f"{hash_name}_anon"), slope, intercept,
+                                      number_of_frames=get_number_of_frames(ds))
+        logger.info("[Extractor] Pixel-Array (%s) gespeichert unter: %s", array.dtype, out_path)
+        return out_path
+
     out_path = os.path.join(output_dir, f"{hash_name}_anon.npy")
     np.save(out_path, array)
-    logging.info(f"[Extractor] Pixel-Array gespeichert unter: {out_path}")
+    logger.info("[Extractor] Pixel-Array gespeichert unter: %s", out_path)
     return out_path
 
 
@@ -1,29 +1,82 @@
 # hasher.py
+import os
 import hashlib
-import logging
+from typing import Optional
+import numpy as np
 import pydicom
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("hasher")
+
+# Hash-Versionen:
+#   "1" = Legacy: SHA-256 über UIDs + Hex-Text des dekodierten Pixel-Arrays (64 Hex-Zeichen ohne Präfix)
+#   "2" = Streaming: SHA-256 inkrementell über UIDs + rohe PixelData-Bytes, Ergebnis mit Präfix "v2-"
+DICOM_HASH_VERSION = os.getenv("DICOM_HASH_VERSION", "2")
+HASH_V2_PREFIX = "v2-"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+UID_KEYWORDS = ("StudyInstanceUID", "SeriesInstanceUID", "SOPInstanceUID")
+
 
 # Erstellt einen SHA-256-Hash basierend auf UIDs und (optional) Pixel-Daten
-def generate_dicom_hash(ds: pydicom.Dataset) -> str:
+def generate_dicom_hash(ds: pydicom.Dataset, pixel_array: Optional[np.ndarray] = None,
+                        version: Optional[str] = None) -> str:
     """
     Erzeugt einen eindeutigen SHA-256-Hash für ein DICOM-Objekt.
-    Die Hash-Eingabe besteht aus den UIDs und optional den Bilddaten (PixelArray).
+    Die Hash-Eingabe besteht aus den UIDs und optional den Bilddaten.
+    Die Version wird über 'DICOM_HASH_VERSION' oder den Parameter version gewählt.
     """
-    uid_part = (
-        str(ds.get("StudyInstanceUID", "")) +
-        str(ds.get("SeriesInstanceUID", "")) +
-        str(ds.get("SOPInstanceUID", ""))
-    )
+    version = version or DICOM_HASH_VERSION
+    if version == "1":
+        return _generate_hash_v1(ds, pixel_array)
+    return _generate_hash_v2(ds, pixel_array)
+
+
+# Ermittelt die Version eines gespeicherten Hashes anhand des Präfixes
+def get_hash_version(dicom_hash: str) -> str:
+    return "2" if dicom_hash.startswith(HASH_V2_PREFIX) else "1"
+
+
+def _generate_hash_v1(ds: pydicom.Dataset, pixel_array: Optional[np.ndarray] = None) -> str:
+    uid_part = "".join(str(ds.get(keyword, "")) for keyword in UID_KEYWORDS)
 
     try:
-        pixel_data = ds.pixel_array.tobytes().hex()
-        logging.info("[Hasher] Pixel-Daten erfolgreich in Hash integriert.")
+        if pixel_array is None:
+            pixel_array = ds.pixel_array
+        pixel_data = pixel_array.tobytes().hex()
+        logger.info("[Hasher] Pixel-Daten erfolgreich in Hash integriert.")
     except Exception as e:
-        logging.warning(f"[Hasher] Pixel-Daten konnten nicht gelesen werden: {str(e)}")
+        logger.warning("[Hasher] Pixel-Daten konnten nicht gelesen werden: %s", e)
         pixel_data = ""
 
     hash_input = uid_part + pixel_data
     result = hashlib.sha256(hash_input.encode()).hexdigest()
-    logging.info(f"[Hasher] SHA-256-Hash erzeugt: {result}")
+    logger.info("[Hasher] SHA-256-Hash erzeugt: %s", result)
     return result
 
+
+def _generate_hash_v2(ds: pydicom.Dataset, pixel_array: Optional[np.ndarray] = None) -> str:
+    """
+    Füttert hashlib direkt mit Bytes – ohne Hex-Umwandlung und ohne Kopie der Pixel-Daten.
+    Bevorzugt werden die rohen PixelData-Bytes (keine Dekodierung nötig);
+    nur ohne PixelData-Element wird ein übergebenes, dekodiertes Array verwendet.
+    """
+    sha = hashlib.sha256()
+    for keyword in UID_KEYWORDS:
+        sha.update(str(ds.get(keyword, "")).encode("ascii", errors="replace"))
+        sha.update(b"\0")  # Trennzeichen, damit verschobene UID-Grenzen andere Hashes ergeben
+
+    if "PixelData" in ds:
+        buffer = memoryview(ds.PixelData)
+    elif pixel_array is not None:
+        buffer = memoryview(np.ascontiguousarray(pixel_array)).cast("B")
+    else:
+        logger.warning("[Hasher] Keine Pixel-Daten vorhanden, Hash nur über UIDs.")
+        buffer = memoryview(b"")
+
+    for offset in range(0, len(buffer), HASH_CHUNK_SIZE):
+        sha.update(buffer[offset:offset + HASH_CHUNK_SIZE])
+
+    result = HASH_V2_PREFIX + sha.hexdigest()
+    logger.info("[Hasher] SHA-256-Hash (v2) erzeugt: %s", result)
+    return result
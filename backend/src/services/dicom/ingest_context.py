@@ -0,0 +1,49 @@
+from typing import Optional
+import numpy as np
+import pydicom
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("context")
+
+
+# Verarbeitungskontext einer einzelnen DICOM-Datei im Ingest-Pipeline
+class DicomIngestContext:
+    """
+    Hält den Datensatz einer Datei und dekodiert die Pixel-Daten höchstens einmal.
+    Hasher, Extractor und weitere Stufen erhalten dasselbe Array;
+    release_pixels() gibt den Puffer frei, sobald die letzte Stufe fertig ist.
+    """
+
+    def __init__(self, ds: pydicom.Dataset, filename: str):
+        self.ds = ds
+        self.filename = filename
+        self._pixel_array: Optional[np.ndarray] = None
+        self._decode_error: Optional[Exception] = None
+
+    @property
+    def pixel_array(self) -> np.ndarray:
+        """Dekodiert die Pixel-Daten beim ersten Zugriff; auch ein Fehler wird nur einmal ermittelt."""
+        if self._decode_error is not None:
+            raise self._decode_error
+        if self._pixel_array is None:
+            try:
+                self._pixel_array = self.ds.pixel_array
+                logger.info("[Context] Pixel-Daten einmalig dekodiert: %s", self.filename)
+            except Exception as e:
+                self._decode_error = e
+                raise
+            finally:
+                _drop_dataset_pixel_cache(self.ds)
+        return self._pixel_array
+
+    def release_pixels(self) -> None:
+        self._pixel_array = None
+        _drop_dataset_pixel_cache(self.ds)
+
+
+# pydicom speichert das dekodierte Array zusätzlich im Datensatz zwischen – diese Referenz wird entfernt,
+# damit der Kontext der einzige Besitzer des Puffers ist
+def _drop_dataset_pixel_cache(ds: pydicom.Dataset) -> None:
+    if getattr(ds, "_pixel_array", None) is not None:
+        ds._pixel_array = None
+        ds._pixel_id = {}
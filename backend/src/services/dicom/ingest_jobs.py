@@ -0,0 +1,129 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional
+
+from services.jobs.job_registry import Job, JobRegistry
+from services.dicom.service_dicom import handle_dicom_upload
+from services.dicom.zip_ingest import process_zip
+from services.dicom.volume import assemble_series_volumes, DICOM_ASSEMBLE_VOLUMES
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("jobs")
+
+# Anzahl parallel laufender Ingest-Jobs und Aufbewahrungsdauer abgeschlossener Jobs (Sekunden)
+DICOM_JOB_WORKERS = int(os.getenv("DICOM_JOB_WORKERS", "2"))
+DICOM_JOB_TTL = int(os.getenv("DICOM_JOB_TTL", "3600"))
+
+job_registry = JobRegistry(ttl_seconds=DICOM_JOB_TTL)
+
+# Die Jobs laufen in eigenen Threads, damit der Event-Loop von FastAPI nicht blockiert wird
+_job_runner = ThreadPoolExecutor(max_workers=DICOM_JOB_WORKERS, thread_name_prefix="dicom-ingest")
+
+
+# Legt einen Ingest-Job an und startet die Verarbeitung im Hintergrund
+def submit_ingest_job(upload: BinaryIO, filename: str) -> Job:
+    """
+    Der Upload wird vorher unter UPLOAD_DIR abgelegt, da der Request-Stream
+    nach der Antwort geschlossen wird. Die Datei wird nach dem Job gelöscht.
+    """
+    kind = "zip" if filename.lower().endswith(".zip") else "dcm"
+    job = job_registry.create(
+        "dicom_ingest",
+        filename=filename,
+        total=1 if kind == "dcm" else 0,
+        processed=0,
+        done=0,
+        failed=0,
+        results=[],
+        volumes=None,
+        volume_error=None
+    )
+
+    upload_dir = os.getenv("UPLOAD_DIR", "/tmp/uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    file_path = os.path.join(upload_dir, f"{job.job_id}.{kind}")
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(upload, buffer)
+
+    _job_runner.submit(_run_ingest_job, job, file_path, kind)
+    logger.info("[Jobs] Ingest-Job %s für %s eingereiht", job.job_id, filename)
+    return job
+
+
+def get_ingest_job(job_id: str) -> Optional[Job]:
+    return job_registry.get(job_id)
+
+
+def list_ingest_jobs() -> List[Job]:
+    return job_registry.list()
+
+
+# Fortschritt: verarbeitete Dateien zählen sofort, "done" erst, wenn ihre Metadaten gespeichert sind
+def _record_results(job: Job, total: int, new_results: List[dict]) -> None:
+    failed = sum(1 for result in new_results if result.get("error"))
+    job_registry.extend(
+        job, "results", new_results,
+        total=total,
+        processed=job.processed + len(new_results),
+        failed=job.failed + failed
+    )
+
+
+def _record_persisted(job: Job, results: List[dict]) -> None:
+    job_registry.update(job, done=sum(1 for result in results if not result.get("error")))
+
+
+# Volumen sind ein Zusatz: ein Fehler hier lässt die bereits gespeicherten Dateien unberührt
+def _record_volumes(job: Job, results: List[dict]) -> None:
+    try:
+        job_registry.update(job, volumes=assemble_series_volumes(results))
+    except Exception as e:
+        logger.error("[Jobs] Volumen für Ingest-Job %s fehlgeschlagen → %s", job.job_id, e)
+        job_registry.update(job, volume_error=str(e))
+
+
+def _run_ingest_job(job: Job, file_path: str, kind: str) -> None:
+    job_registry.update(job, status="running")
+    persisted = False
+    try:
+        if kind == "zip":
+            # process_zip speichert alle Metadaten am Ende in einer Transaktion
+            results = process_zip(file_path, on_progress=lambda total, new: _record_results(job, total, new))
+        else:
+            try:
+                results = [handle_dicom_upload(file_path, filename=job.filename)]
+            except Exception as e:
+                results = [{"file": job.filename, "error": str(e)}]
+            _record_results(job, 1, results)
+        _record_persisted(job, results)
+        persisted = True
+
+        if kind == "zip" and DICOM_ASSEMBLE_VOLUMES:
+            _record_volumes(job, results)
+
+        job_registry.update(job, status="completed")
+        logger.info("[Jobs] Ingest-Job %s abgeschlossen: %s ok, %s fehlerhaft", job.job_id, job.done, job.failed)
+    except Exception as e:
+        # Fehler, die den ganzen Job betreffen (z. B. ungültiges ZIP oder Limit überschritten)
+        detail = getattr(e, "detail", None) or str(e)
+        logger.error("[Jobs] Ingest-Job %s fehlgeschlagen → %s", job.job_id, detail)
+        if persisted:
+            # Metadaten sind bereits gespeichert – Einzelergebnisse und "done" bleiben gültig
+            job_registry.update(job, status="failed", error=detail)
+            return
+        # Ohne gespeicherte Metadaten gilt keine Datei als erledigt; Einzelergebnisse erhalten den Fehler
+        # (die Pfade bleiben erhalten, damit die bereits geschriebenen Dateien auffindbar sind)
+        results = [
+            result if result.get("error") else {
+                "anonymized_file": result.get("anonymized_file"),
+                "pixel_array_file": result.get("pixel_array_file"),
+                "error": detail,
+            }
+            for result in job.results
+        ]
+        job_registry.update(job, status="failed", error=detail, done=0,
+                            failed=len(results), results=results)
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
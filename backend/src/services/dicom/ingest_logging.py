@@ -0,0 +1,132 @@
+import os
+import queue
+import atexit
+import logging
+import threading
+import itertools
+from time import perf_counter
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Protokollierung der DICOM-Pipeline:
+#   Die Stufen schreiben über Logger "dicom.<stufe>" in eine Queue; ein Listener-Thread gibt die
+#   Einträge an die Handler des Root-Loggers weiter, sodass der Request-Pfad nie auf Schreibzugriffe wartet.
+DICOM_LOG_QUEUE = os.getenv("DICOM_LOG_QUEUE", "true").lower() in ("1", "true", "yes")
+DICOM_LOG_LEVEL = os.getenv("DICOM_LOG_LEVEL", "INFO").upper()
+# Anteil der protokollierten INFO/DEBUG-Einträge je Stufe (WARNING und höher werden nie verworfen)
+DICOM_LOG_SAMPLE_RATE = float(os.getenv("DICOM_LOG_SAMPLE_RATE", "0.01"))
+# Abweichende Raten pro Stufe, z. B. "hasher=0,validation=0.1"
+DICOM_LOG_SAMPLING = os.getenv("DICOM_LOG_SAMPLING", "")
+
+# Zusammenfassungen, Audit-Einträge und Meldungen pro Job/Serie/Pool werden standardmäßig nicht reduziert
+_DEFAULT_STAGE_RATES = {"summary": 1.0, "audit": 1.0, "jobs": 1.0, "volume": 1.0, "pool": 1.0}
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+# Lässt von INFO/DEBUG-Einträgen nur jeden n-ten durch (deterministisch, ohne Zufallszahlen)
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.every = round(1 / rate) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if self.every == 0:
+            return False
+        return next(self._counter) % self.every == 0
+
+
+# Gibt Einträge aus der Queue an die aktuell konfigurierten Handler des Root-Loggers weiter
+class _RootForwarder(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger().handle(record)
+
+
+def setup_ingest_logging() -> None:
+    """Richtet Queue und Listener einmal pro Prozess ein (auch in den Workern des Prozess-Pools)."""
+    global _listener
+    with _setup_lock:
+        parent = logging.getLogger("dicom")
+        if parent.handlers:
+            return
+        parent.setLevel(DICOM_LOG_LEVEL)
+        if not DICOM_LOG_QUEUE:
+            return
+
+        log_queue = queue.SimpleQueue()
+        parent.addHandler(QueueHandler(log_queue))
+        parent.propagate = False
+        _listener = QueueListener(log_queue, _RootForwarder())
+        _listener.start()
+        atexit.register(stop_ingest_logging)
+
+
+# Leert die Queue und beendet den Listener-Thread (z. B. beim Herunterfahren)
+def stop_ingest_logging() -> None:
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+# Liefert den Logger einer Pipeline-Stufe inklusive Sampling-Filter
+def get_stage_logger(stage: str) -> logging.Logger:
+    setup_ingest_logging()
+    logger = logging.getLogger(f"dicom.{stage}")
+    if not logger.filters:
+        logger.addFilter(SamplingFilter(_stage_rates().get(stage, DICOM_LOG_SAMPLE_RATE)))
+    return logger
+
+
+def _stage_rates() -> Dict[str, float]:
+    rates = dict(_DEFAULT_STAGE_RATES)
+    for entry in DICOM_LOG_SAMPLING.split(","):
+        if "=" in entry:
+            stage, rate = entry.split("=", 1)
+            rates[stage.strip()] = float(rate)
+    return rates
+
+
+_summary_logger = get_stage_logger("summary")
+
+
+# Sammelt Dauer und Kennzahlen einer Datei und schreibt sie als einen strukturierten Eintrag
+class IngestSummary:
+    """
+    Der Eintrag enthält die Felder zusätzlich als Attribut 'dicom_summary' am LogRecord,
+    damit Handler/Formatter sie strukturiert (z. B. als JSON) ausgeben können.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.fields: Dict[str, object] = {}
+        self.timings_ms: Dict[str, float] = {}
+        self._start = perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms[name] = round((perf_counter() - start) * 1000, 2)
+
+    def emit(self, status: str, **fields) -> None:
+        self.fields.update(fields)
+        summary = {
+            "file": self.filename,
+            "status": status,
+            **self.fields,
+            "timings_ms": self.timings_ms,
+            "total_ms": round((perf_counter() - self._start) * 1000, 2),
+        }
+        level = logging.INFO if status == "ok" else logging.WARNING
+        text = " ".join(f"{key}={value}" for key, value in summary.items() if key != "file")
+        _summary_logger.log(level, f"[Ingest] {self.filename}: {text}", extra={"dicom_summary": summary})
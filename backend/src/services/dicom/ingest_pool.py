@@ -0,0 +1,48 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("pool")
+
+# Anzahl der Worker-Prozesse für die DICOM-Verarbeitung (0 oder 1 = sequentiell im Request-Prozess)
+DICOM_WORKERS = int(os.getenv("DICOM_WORKERS", "0"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return DICOM_WORKERS > 1
+
+
+# Liefert den gemeinsamen Prozess-Pool (wird beim ersten Aufruf erzeugt)
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Die Worker werden per 'spawn' gestartet, damit keine DB-Verbindungen,
+    Locks oder Threads des Webserver-Prozesses in die Kindprozesse kopiert werden.
+    """
+    global _executor
+    if not is_enabled():
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=DICOM_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info("[Pool] Prozess-Pool mit %s Workern gestartet", DICOM_WORKERS)
+        return _executor
+
+
+# Beendet den Prozess-Pool (z. B. beim Herunterfahren der Anwendung)
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+            logger.info("[Pool] Prozess-Pool beendet")
@@ -1,18 +1,49 @@
-import logging
+import datetime
+from typing import Optional
 import pydicom
+from services.dicom.ingest_logging import get_stage_logger
 
-# Extrahiert minimale Metadaten aus einem DICOM-Datensatz für die Speicherung
+logger = get_stage_logger("metadata")
+
+# Extrahiert die indizierten Metadaten aus einem DICOM-Datensatz für die Speicherung
 def extract_metadata(ds: pydicom.Dataset) -> dict:
     """
-    Gibt ein Dictionary mit den minimal erforderlichen DICOM-Metadaten zurück.
-    Nur Felder, die in der Datenbank persistiert werden, sind enthalten.
+    Gibt ein Dictionary mit den DICOM-Metadaten zurück, die in der Datenbank persistiert werden.
+    Es werden nur Header-Felder gelesen – der Datensatz darf ohne Pixel-Daten geladen sein
+    (z. B. stop_before_pixels=True beim Backfill).
+    Dateipfade und Inhalts-Hash ergänzt der Aufrufer.
     """
 
     metadata = {
         "dicom_uuid": str(ds.get("SOPInstanceUID", "")),
-        "dicom_modality": ds.get("Modality", "")
+        "dicom_modality": ds.get("Modality", ""),
+        "dicom_study_uid": _to_str(ds.get("StudyInstanceUID")),
+        "dicom_series_uid": _to_str(ds.get("SeriesInstanceUID")),
+        "dicom_study_date": _to_date(ds.get("StudyDate")),
+        "dicom_instance_number": _to_int(ds.get("InstanceNumber")),
+        "dicom_rows": _to_int(ds.get("Rows")),
+        "dicom_columns": _to_int(ds.get("Columns")),
+        "dicom_frames": _to_int(ds.get("NumberOfFrames")) or 1,
     }
 
-    logging.info(f"[Metadata] Extrahierte reduzierte Metadaten: {metadata}")
+    logger.info("[Metadata] Extrahierte Metadaten: %s", metadata)
     return metadata
 
+
+def _to_str(value) -> Optional[str]:
+    return str(value) if value not in (None, "") else None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# DA-Werte haben das Format YYYYMMDD; ungültige oder anonymisierte Daten werden zu None
+def _to_date(value) -> Optional[datetime.date]:
+    try:
+        return datetime.datetime.strptime(str(value).strip(), "%Y%m%d").date() if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,237 @@
+# pixel_store.py
+import os
+import json
+import lzma
+import zlib
+import struct
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+import pydicom
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("pixel_store")
+
+# Speicherformat der extrahierten Pixel-Daten:
+#   "float32" = Legacy: '{hash}_anon.npy' als float32
+#   "native"  = nativer Ganzzahl-Datentyp + Rescale-Metadaten ('{hash}_anon.npy' + '{hash}_anon.json'),
+#               bei aktivierter Kompression eine einzelne Datei '{hash}_anon.pxz'
+PIXEL_STORE_FORMAT = os.getenv("PIXEL_STORE_FORMAT", "float32").lower()
+PIXEL_STORE_COMPRESSION = os.getenv("PIXEL_STORE_COMPRESSION", "none").lower()   # none | zlib | lzma
+PIXEL_STORE_CHUNK_BYTES = int(os.getenv("PIXEL_STORE_CHUNK_BYTES", str(1024 * 1024)))
+
+PXZ_MAGIC = b"PXZ1"
+COMPRESSORS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+
+# Liest Rescale-Parameter (Modality LUT) aus dem Datensatz
+def get_rescale(ds: pydicom.Dataset) -> Tuple[float, float]:
+    slope = ds.get("RescaleSlope", 1)
+    intercept = ds.get("RescaleIntercept", 0)
+    return float(slope if slope not in (None, "") else 1), float(intercept if intercept not in (None, "") else 0)
+
+
+# Anzahl der Frames laut Header (NumberOfFrames fehlt bei Einzelbildern)
+def get_number_of_frames(ds: pydicom.Dataset) -> int:
+    try:
+        return int(ds.get("NumberOfFrames") or 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+# Speichert ein Pixel-Array verlustfrei im nativen Datentyp
+def save_native_pixels(array: np.ndarray, base_path: str, rescale_slope: float = 1.0,
+                       rescale_intercept: float = 0.0, compression: Optional[str] = None,
+                       number_of_frames: int = 1) -> str:
+    """
+    base_path ist der Pfad ohne Dateiendung. Rückgabe: Pfad der Datendatei (.npy oder .pxz).
+    number_of_frames (NumberOfFrames) steht im Header, damit Leser Multi-Frame-Objekte nicht an der Form erraten müssen.
+    Kompression erfolgt blockweise entlang der ersten Achse, damit einzelne Zeilen/Frames
+    ohne Entpacken der ganzen Datei gelesen werden können.
+    """
+    compression = (compression or PIXEL_STORE_COMPRESSION).lower()
+    array = np.ascontiguousarray(array)
+    header = {
+        "format": "native",
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+        "rescale_slope": rescale_slope,
+        "rescale_intercept": rescale_intercept,
+        "number_of_frames": number_of_frames,
+        "compression": compression,
+    }
+
+    if compression in ("", "none"):
+        out_path = f"{base_path}.npy"
+        np.save(out_path, array)
+        header["compression"] = "none"
+        with open(f"{base_path}.json", "w") as f:
+            json.dump(header, f)
+        return out_path
+
+    if compression not in COMPRESSORS:
+        raise ValueError(f"Unbekannte Kompression für Pixel-Speicher: {compression}")
+    compress, _ = COMPRESSORS[compression]
+
+    rows_per_chunk = _rows_per_chunk(array)
+    chunks, payloads, offset = [], [], 0
+    for start in range(0, array.shape[0], rows_per_chunk):
+        stop = min(start + rows_per_chunk, array.shape[0])
+        payload = compress(memoryview(array[start:stop]).cast("B"))
+        chunks.append([start, stop, offset, len(payload)])
+        payloads.append(payload)
+        offset += len(payload)
+    header["chunks"] = chunks
+
+    out_path = f"{base_path}.pxz"
+    header_bytes = json.dumps(header).encode()
+    with open(out_path, "wb") as f:
+        f.write(PXZ_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for payload in payloads:
+            f.write(payload)
+    return out_path
+
+
+# Lesezugriff auf gespeicherte Pixel-Daten (Legacy-float32, native .npy oder komprimierte .pxz)
+class StoredPixels:
+    """
+    Die Rohdaten werden erst bei Zugriff gelesen: .npy-Dateien per memory-map,
+    .pxz-Dateien blockweise nur für die angefragten Zeilen/Frames.
+    float32() erzeugt die Fließkommadarstellung erst auf Anfrage.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._header = _read_header(path)
+        self.shape = tuple(self._header["shape"])
+        self.dtype = np.dtype(self._header["dtype"])
+        self.rescale_slope = float(self._header.get("rescale_slope", 1.0))
+        self.rescale_intercept = float(self._header.get("rescale_intercept", 0.0))
+        self.compression = self._header.get("compression", "none")
+        # Fehlt bei Legacy-Dateien ohne Sidecar und bei vor der Einführung geschriebenen Dateien
+        self.number_of_frames: Optional[int] = self._header.get("number_of_frames")
+
+    @property
+    def is_memory_mappable(self) -> bool:
+        return self.compression == "none"
+
+    def raw(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Gespeicherte Werte im nativen Datentyp, optional nur die Zeilen/Frames [start, stop) der ersten Achse."""
+        if self.is_memory_mappable:
+            return np.load(self.path, mmap_mode="r")[start:stop]
+        return self._read_chunks(start, self.shape[0] if stop is None else min(stop, self.shape[0]))
+
+    def float32(self, rescale: bool = False, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        float32-Darstellung; ohne rescale entspricht sie dem bisherigen Legacy-Format,
+        mit rescale werden RescaleSlope/RescaleIntercept angewendet.
+        """
+        array = self.raw(start, stop).astype(np.float32)
+        if rescale and (self.rescale_slope != 1.0 or self.rescale_intercept != 0.0):
+            array *= np.float32(self.rescale_slope)
+            array += np.float32(self.rescale_intercept)
+        return array
+
+    def _read_chunks(self, start: int, stop: int) -> np.ndarray:
+        _, decompress = COMPRESSORS[self.compression]
+        data_start = self._header["_data_start"]
+        row_shape = self.shape[1:]
+        parts: List[np.ndarray] = []
+        with open(self.path, "rb") as f:
+            for chunk_start, chunk_stop, offset, length in self._header["chunks"]:
+                if chunk_stop <= start or chunk_start >= stop:
+                    continue
+                f.seek(data_start + offset)
+                block = np.frombuffer(decompress(f.read(length)), dtype=self.dtype)
+                block = block.reshape((chunk_stop - chunk_start,) + row_shape)
+                parts.append(block[max(start - chunk_start, 0):stop - chunk_start])
+        if not parts:
+            return np.empty((0,) + row_shape, dtype=self.dtype)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def open_pixel_store(path: str) -> StoredPixels:
+    return StoredPixels(path)
+
+
+# Wählt Frame, Bildausschnitt und Schrittweite aus, ohne das ganze Array zu laden
+def read_region(path: str, frame: Optional[int] = None, rows: slice = slice(None),
+                cols: slice = slice(None), step: int = 1, number_of_frames: Optional[int] = None) -> np.ndarray:
+    """
+    Unterstützte Formen: (Zeilen, Spalten), (Zeilen, Spalten, Kanäle) bei RGB,
+    (Frames, Zeilen, Spalten[, Kanäle]) bei Multi-Frame-Objekten.
+    Ob ein Multi-Frame-Objekt vorliegt, entscheidet die Frame-Anzahl aus dem Store-Header, sonst
+    number_of_frames (z. B. dicom_frames aus der Datenbank); nur wenn beides fehlt, wird sie aus der Form geschätzt.
+    Bei .npy-Dateien ist das Ergebnis eine View auf die memory-map – es werden nur die
+    später tatsächlich gelesenen Seiten geladen; bei .pxz nur die betroffenen Blöcke.
+    """
+    store = open_pixel_store(path)
+    number_of_frames = store.number_of_frames or number_of_frames
+    if number_of_frames is not None:
+        multi_frame = number_of_frames > 1
+    else:
+        multi_frame = len(store.shape) == 4 or (len(store.shape) == 3 and store.shape[-1] not in (3, 4))
+    rows = slice(rows.start, rows.stop, step)
+    cols = slice(cols.start, cols.stop, step)
+
+    if multi_frame:
+        if frame is None:
+            frames = slice(None)
+        elif not 0 <= frame < store.shape[0]:
+            raise IndexError(f"Frame {frame} außerhalb des Bereichs (0–{store.shape[0] - 1})")
+        else:
+            frames = slice(frame, frame + 1)
+        if store.is_memory_mappable:
+            return store.raw()[frames, rows, cols]
+        start, stop, _ = frames.indices(store.shape[0])
+        return store.raw(start, stop)[:, rows, cols]
+
+    if frame not in (None, 0):
+        raise IndexError("Einzelbild enthält nur Frame 0")
+    if store.is_memory_mappable:
+        return store.raw()[rows, cols]
+    start, stop, _ = slice(rows.start, rows.stop).indices(store.shape[0])
+    return store.raw(start, stop)[::step, cols]
+
+
+# Liefert ein (evtl. memory-gemapptes) Array blockweise als Bytes, damit es nie komplett kopiert wird
+def iter_array_bytes(array: np.ndarray, chunk_bytes: int = PIXEL_STORE_CHUNK_BYTES) -> Iterator[bytes]:
+    if array.ndim == 0 or array.size == 0:
+        yield np.ascontiguousarray(array).tobytes()
+        return
+    row_bytes = max(array.nbytes // array.shape[0], 1)
+    rows_per_block = max(1, chunk_bytes // row_bytes)
+    for start in range(0, array.shape[0], rows_per_block):
+        yield np.ascontiguousarray(array[start:start + rows_per_block]).tobytes()
+
+
+def _rows_per_chunk(array: np.ndarray) -> int:
+    if array.shape[0] == 0:
+        return 1
+    row_bytes = max(array.nbytes // array.shape[0], 1)
+    return max(1, PIXEL_STORE_CHUNK_BYTES // row_bytes)
+
+
+def _read_header(path: str) -> dict:
+    if path.endswith(".pxz"):
+        with open(path, "rb") as f:
+            if f.read(4) != PXZ_MAGIC:
+                raise ValueError(f"Keine gültige Pixel-Speicherdatei: {path}")
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+        header["_data_start"] = 8 + length
+        return header
+
+    sidecar = f"{os.path.splitext(path)[0]}.json"
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            return json.load(f)
+
+    # Legacy-float32-Datei ohne Sidecar: Metadaten aus dem .npy-Header lesen
+    array = np.load(path, mmap_mode="r")
+    logger.debug("[PixelStore] Legacy-Datei ohne Metadaten: %s", path)
+    return {"format": "float32", "dtype": array.dtype.str, "shape": list(array.shape), "compression": "none"}
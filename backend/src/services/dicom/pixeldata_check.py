@@ -0,0 +1,162 @@
+import math
+import struct
+from typing import List, Optional
+from pydicom.dataset import Dataset
+from pydicom.dataelem import RawDataElement
+from pydicom.uid import UID
+
+PIXEL_DATA_TAG = 0x7FE00010
+EXTENDED_OFFSET_TABLE_TAG = 0x7FE00001
+EXTENDED_OFFSET_TABLE_LENGTHS_TAG = 0x7FE00002
+UNDEFINED_LENGTH = 0xFFFFFFFF
+
+ITEM_TAG = (0xFFFE, 0xE000)
+SEQUENCE_DELIMITER_TAG = (0xFFFE, 0xE0DD)
+_ITEM_HEADER = struct.Struct("<HHI")
+
+
+# Prüft Länge bzw. Fragment-Struktur der PixelData, ohne Pixel-Daten zu dekodieren
+def check_pixel_data_structure(ds: Dataset) -> List[str]:
+    """
+    Rückgabe: Liste aller gefundenen Probleme (leer = konsistent).
+    Native Daten: Länge = Frames × Framegröße (inkl. 1-Bit-Daten und Padding auf gerade Länge);
+    die Länge wird dem Roh-Element entnommen, zurückgestellte Daten werden dafür nicht geladen.
+    Gekapselte Daten (JPEG, JPEG 2000, RLE, …): Items, Basic/Extended Offset Table und
+    Anzahl der Fragmente im Verhältnis zur Anzahl der Frames.
+    """
+    if PIXEL_DATA_TAG not in ds:
+        return ["Fehlender 'Pixel Data' (7FE0,0010) Tag."]
+
+    try:
+        rows = int(ds.get("Rows", 0))
+        cols = int(ds.get("Columns", 0))
+        frames = int(ds.get("NumberOfFrames", 1) or 1)
+    except (TypeError, ValueError) as e:
+        return [f"Ungültige Bildgeometrie im Header: {str(e)}"]
+    if rows <= 0 or cols <= 0 or frames <= 0:
+        return [f"Ungültige Bildgeometrie: Rows={rows}, Columns={cols}, NumberOfFrames={frames}."]
+
+    element = ds.get_item(PIXEL_DATA_TAG, keep_deferred=True)
+    if _is_encapsulated(ds, element):
+        return _check_encapsulated(ds, frames)
+    return _check_native(ds, element, rows, cols, frames)
+
+
+def expected_native_length(ds: Dataset, rows: int, cols: int, frames: int) -> int:
+    samples = int(ds.get("SamplesPerPixel", 1) or 1)
+    bits = int(ds.get("BitsAllocated", 16) or 16)
+    if ds.get("PhotometricInterpretation") == "YBR_FULL_422":
+        # Chroma-Unterabtastung: zwei Pixel teilen sich Cb und Cr
+        return rows * cols * 2 * frames * (bits // 8)
+    return math.ceil(rows * cols * samples * frames * bits / 8)
+
+
+def _is_encapsulated(ds: Dataset, element) -> bool:
+    transfer_syntax = getattr(getattr(ds, "file_meta", None), "TransferSyntaxUID", None)
+    if transfer_syntax:
+        try:
+            return UID(transfer_syntax).is_encapsulated
+        except ValueError:
+            # Private bzw. unbekannte Transfer Syntax: Kapselung an der undefinierten Länge erkennen
+            pass
+    if isinstance(element, RawDataElement):
+        return element.length == UNDEFINED_LENGTH
+    return bool(getattr(element, "is_undefined_length", False))
+
+
+def _check_native(ds: Dataset, element, rows: int, cols: int, frames: int) -> List[str]:
+    if isinstance(element, RawDataElement) and element.value is None:
+        actual = element.length
+    else:
+        actual = len(element.value or b"")
+
+    expected = expected_native_length(ds, rows, cols, frames)
+    # Werte ungerader Länge werden um ein Byte auf gerade Länge aufgefüllt
+    if actual in (expected, expected + expected % 2):
+        return []
+    return [
+        f"PixelData-Länge inkonsistent: erwartet {expected} Byte "
+        f"({frames} Frame(s) × {expected // frames if frames else 0} Byte), gefunden {actual} Byte."
+    ]
+
+
+def _check_encapsulated(ds: Dataset, frames: int) -> List[str]:
+    buffer = memoryview(ds.PixelData)
+    issues: List[str] = []
+
+    items = []    # (Position des Item-Headers im Puffer, Länge des Items)
+    position = 0
+    while position < len(buffer):
+        if position + _ITEM_HEADER.size > len(buffer):
+            issues.append(f"Abgeschnittener Item-Header bei Byte {position}.")
+            break
+        group, elem, length = _ITEM_HEADER.unpack_from(buffer, position)
+        if (group, elem) == SEQUENCE_DELIMITER_TAG:
+            break
+        if (group, elem) != ITEM_TAG:
+            issues.append(f"Unerwartetes Tag ({group:04X},{elem:04X}) bei Byte {position} statt Item-Tag.")
+            break
+        if position + _ITEM_HEADER.size + length > len(buffer):
+            issues.append(f"Item bei Byte {position} ist länger ({length} Byte) als die verbleibenden Daten.")
+            break
+        items.append((position, length))
+        position += _ITEM_HEADER.size + length
+
+    if not items:
+        return issues or ["Gekapselte PixelData enthält keine Basic Offset Table."]
+
+    bot_position, bot_length = items[0]
+    fragments = items[1:]
+    if bot_length % 4:
+        issues.append(f"Länge der Basic Offset Table ({bot_length}) ist kein Vielfaches von 4.")
+    if len(fragments) < frames:
+        issues.append(f"Zu wenige Fragmente: {len(fragments)} für {frames} Frame(s).")
+
+    first_fragment = _ITEM_HEADER.size + bot_length
+    fragment_starts = {offset - first_fragment for offset, _ in fragments}
+    fragments_size = position - first_fragment
+
+    if bot_length and not bot_length % 4:
+        offsets = struct.unpack_from(f"<{bot_length // 4}I", buffer, bot_position + _ITEM_HEADER.size)
+        issues.extend(_check_offsets("Basic Offset Table", offsets, None, frames, fragment_starts, fragments_size))
+
+    extended = _read_extended_offsets(ds)
+    if extended is not None:
+        offsets, lengths = extended
+        if bot_length:
+            issues.append("Basic Offset Table muss leer sein, wenn eine Extended Offset Table vorhanden ist.")
+        issues.extend(_check_offsets("Extended Offset Table", offsets, lengths, frames, fragment_starts, fragments_size))
+
+    return issues
+
+
+def _check_offsets(name: str, offsets, lengths: Optional[tuple], frames: int,
+                   fragment_starts: set, fragments_size: int) -> List[str]:
+    issues = []
+    if len(offsets) != frames:
+        issues.append(f"{name} hat {len(offsets)} Einträge, erwartet {frames}.")
+    if offsets and offsets[0] != 0:
+        issues.append(f"{name}: erster Offset ist {offsets[0]}, erwartet 0.")
+    if any(b <= a for a, b in zip(offsets, offsets[1:])):
+        issues.append(f"{name}: Offsets sind nicht streng aufsteigend.")
+    if any(offset not in fragment_starts for offset in offsets):
+        issues.append(f"{name}: Offsets zeigen nicht auf den Beginn eines Fragments.")
+    if lengths is not None:
+        if len(lengths) != len(offsets):
+            issues.append(f"{name}: {len(lengths)} Längen für {len(offsets)} Offsets.")
+        elif any(offset + length > fragments_size for offset, length in zip(offsets, lengths)):
+            issues.append(f"{name}: Frame-Längen reichen über das Ende der Fragmente hinaus.")
+    return issues
+
+
+def _read_extended_offsets(ds: Dataset) -> Optional[tuple]:
+    if EXTENDED_OFFSET_TABLE_TAG not in ds:
+        return None
+    lengths = ds[EXTENDED_OFFSET_TABLE_LENGTHS_TAG].value if EXTENDED_OFFSET_TABLE_LENGTHS_TAG in ds else None
+    return _unpack_uint64(ds[EXTENDED_OFFSET_TABLE_TAG].value), _unpack_uint64(lengths)
+
+
+def _unpack_uint64(value: Optional[bytes]) -> tuple:
+    value = value or b""
+    count = len(value) // 8
+    return struct.unpack(f"<{count}Q", value[:count * 8])
@@ -6,6 +6,8 @@ import pydicom
 from pydicom.errors import InvalidDicomError
 from sqlalchemy.orm import Session
 import logging
+from contextlib import nullcontext
+from typing import BinaryIO, Optional, Union
 from fastapi import HTTPException
 
 # Logging-Konfiguration
@@ -16,34 +18,114 @@ from services.dicom.anonymizer import anonymize_dicom_fields
 from services.dicom.hasher import generate_dicom_hash
 from services.dicom.extractor import extract_pixel_array
 from services.dicom.metadata import extract_metadata
-from services.dicom.validation import run_full_validation
+from services.dicom.validation import run_header_validation, run_pixel_validation
+from services.dicom.ingest_context import DicomIngestContext
+from services.dicom.volume import extract_slice_info
 
 # Datenbank-Zugriff
 from db.crud import crud_dicom
-from db.database.database import get_db
+from src.db.database.database import session_scope
+from services.dicom.ingest_logging import IngestSummary, get_stage_logger
+
+logger = get_stage_logger("upload")
+
+# Elemente ab dieser Größe (v. a. PixelData) werden beim ersten Lesen übersprungen und erst bei Zugriff geladen
+DICOM_DEFER_SIZE = os.getenv("DICOM_DEFER_SIZE", "16 KB")
 
 # Verarbeitet eine einzelne DICOM-Datei: Validierung → Anonymisierung → Speicherung
-def handle_dicom_upload(file_path: str) -> dict:
-    db: Session = get_db().__next__()
+# file_path darf auch ein dateiähnliches Objekt sein (z. B. ein Eintrag direkt aus einem ZIP-Archiv)
+# persist=False überspringt das Speichern der Metadaten (z. B. für das gesammelte Schreiben eines ZIP-Uploads)
+def handle_dicom_upload(file_path: Union[str, BinaryIO], filename: Optional[str] = None, persist: bool = True) -> dict:
+    file_path_name = filename or str(file_path)
+    # Ein strukturierter Eintrag pro Datei (Status, Dauer je Stufe) statt mehrerer INFO-Zeilen je Stufe
+    summary = IngestSummary(file_path_name)
+
+    try:
+        # Die Session wird nur bei Bedarf geöffnet und danach immer an den Pool zurückgegeben
+        with session_scope() if persist else nullcontext() as db:
+            result = _ingest_dicom(db, file_path, file_path_name, summary)
+    except Exception as e:
+        summary.emit("failed", error=getattr(e, "detail", None) or str(e))
+        raise
+    summary.emit("ok", dicom_hash=result.pop("dicom_hash"))
+    return result
 
+
+def _ingest_dicom(db: Optional[Session], file_path: Union[str, BinaryIO], file_path_name: str, summary: IngestSummary) -> dict:
     try:
-        ds = pydicom.dcmread(file_path)
-        logging.info(f"[Upload] DICOM-Datei erfolgreich gelesen: {file_path}")
+        # Phase 1: nur Header lesen – PixelData bleibt zurückgestellt, bis die Header-Prüfung bestanden ist
+        with summary.stage("read"):
+            ds = pydicom.dcmread(file_path, defer_size=DICOM_DEFER_SIZE)
+        logger.info("[Upload] DICOM-Datei erfolgreich gelesen: %s", file_path_name)
     except InvalidDicomError:
-        logging.error(f"[Upload] Ungültige DICOM-Datei: {file_path}")
-        raise ValueError(f"Datei ist kein gültiges DICOM-Format: {file_path}")
+        logger.error("[Upload] Ungültige DICOM-Datei: %s", file_path_name)
+        raise ValueError(f"Datei ist kein gültiges DICOM-Format: {file_path_name}")
     except Exception as e:
-        logging.error(f"[Upload] Allgemeiner Fehler beim Lesen der Datei: {file_path} → {str(e)}")
+        logger.error("[Upload] Allgemeiner Fehler beim Lesen der Datei: %s → %s", file_path_name, e)
         raise
 
-    ds = anonymize_dicom_fields(ds)
-    logging.info("[Anonymisierung] Anonymisierung abgeschlossen.")
+    # Abgelehnte Dateien (z. B. falsche Modalität, fehlende Pflichtfelder) kosten so kein Laden der Pixel-Daten
+    with summary.stage("header_validation"):
+        run_header_validation(ds, file_path_name)
+
+    with summary.stage("anonymize"):
+        ds = anonymize_dicom_fields(ds)
+    logger.info("[Anonymisierung] Anonymisierung abgeschlossen.")
+
+    # Phase 2: ab hier werden die zurückgestellten Pixel-Daten geladen
+    with summary.stage("pixel_validation"):
+        run_pixel_validation(ds, file_path_name)
+    logger.info("[Validation] Validierung abgeschlossen.")
+
+    # Pixel-Daten werden pro Datei nur einmal dekodiert und nach der letzten Stufe freigegeben
+    context = DicomIngestContext(ds, file_path_name)
+    try:
+        with summary.stage("store"):
+            dicom_hash, anon_path, npy_path = _store_dicom(context)
+    finally:
+        context.release_pixels()
+
+    metadata = extract_metadata(ds)
+    metadata.update(
+        dicom_pixel_array_file=npy_path,
+        dicom_anonymized_file=anon_path,
+        dicom_content_hash=dicom_hash,
+    )
+
+    if db is not None:
+        try:
+            with summary.stage("db"):
+                crud_dicom.create_or_replace_dicom_metadata(db, metadata)
+            logger.info("[DB] Metadaten erfolgreich in die Datenbank gespeichert.")
+        except Exception as e:
+            logger.error("[Upload] Fehler bei DB-Speicherung: %s", e)
+            raise HTTPException(
+                status_code=500,
+                detail="Fehler beim Erstellen eines DICOM-Metadatensatzes."
+            )
+
+    return {
+        "anonymized_file": anon_path,
+        "pixel_array_file": npy_path,
+        "metadata": metadata,
+        "slice_info": extract_slice_info(ds),
+        "dicom_hash": dicom_hash
+    }
+
 
-    run_full_validation(ds, file_path)
-    logging.info("[Validation] Validierung abgeschlossen.")
+# Hash → anonymisierte Datei → Pixel-Array; alle Stufen teilen sich das einmal dekodierte Array
+def _store_dicom(context: DicomIngestContext) -> tuple:
+    ds = context.ds
 
-    dicom_hash = generate_dicom_hash(ds)
-    logging.info(f"[Hash] Hash generiert: {dicom_hash}")
+    try:
+        pixel_array = context.pixel_array
+    except Exception as e:
+        # Ohne dekodierbare Pixel-Daten kann kein Pixel-Array gespeichert werden – Abbruch vor dem Schreiben
+        logger.error("[PixelData] Pixel-Daten konnten nicht dekodiert werden: %s", e)
+        raise RuntimeError("Fehler beim Speichern des Pixel-Arrays: Pixel array extraction failed") from e
+
+    dicom_hash = generate_dicom_hash(ds, pixel_array=pixel_array)
+    logger.info("[Hash] Hash generiert: %s", dicom_hash)
 
     upload_dir = os.getenv("UPLOAD_DIR", "/tmp/uploads")
     os.makedirs(upload_dir, exist_ok=True)
@@ -51,32 +133,16 @@ def handle_dicom_upload(file_path: str) -> dict:
 
     try:
         ds.save_as(anon_path)
-        logging.info(f"[Datei] Anonymisierte Datei gespeichert: {anon_path}")
+        logger.info("[Datei] Anonymisierte Datei gespeichert: %s", anon_path)
     except Exception as e:
-        logging.error(f"[Datei] Fehler beim Speichern der anonymisierten Datei: {anon_path} → {str(e)}")
+        logger.error("[Datei] Fehler beim Speichern der anonymisierten Datei: %s → %s", anon_path, e)
         raise RuntimeError(f"Fehler beim Speichern der anonymisierten Datei: {str(e)}")
 
     try:
-        npy_path = extract_pixel_array(ds, dicom_hash)
-        logging.info(f"[PixelData] Pixel-Array gespeichert unter: {npy_path}")
+        npy_path = extract_pixel_array(ds, dicom_hash, pixel_array=pixel_array)
+        logger.info("[PixelData] Pixel-Array gespeichert unter: %s", npy_path)
     except Exception as e:
-        logging.error(f"[PixelData] Fehler beim Speichern des Pixel-Arrays: {str(e)}")
+        logger.error("[PixelData] Fehler beim Speichern des Pixel-Arrays: %s", e)
         raise RuntimeError(f"Fehler beim Speichern des Pixel-Arrays: {str(e)}")
 
-    metadata = extract_metadata(ds)
-
-    try:
-        crud_dicom.create_or_replace_dicom_metadata(db, metadata)
-        logging.info("[DB] Metadaten erfolgreich in die Datenbank gespeichert.")
-    except Exception as e:
-        logging.error(f"[Upload] Fehler bei DB-Speicherung: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail="Fehler beim Erstellen eines DICOM-Metadatensatzes."
-        )
-
-    return {
-        "anonymized_file": anon_path,
-        "pixel_array_file": npy_path,
-        "metadata": metadata
-    }
+    return dicom_hash, anon_path, npy_path
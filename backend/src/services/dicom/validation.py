@@ -1,9 +1,18 @@
+import os
 import re
 import logging
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
 from fastapi import HTTPException
+from pydicom.datadict import DicomDictionary, dictionary_VR, tag_for_keyword
 from pydicom.dataset import Dataset
+from pydicom.tag import Tag
 from services.dicom.compliance_checker import check_compliance
+from services.dicom.pixeldata_check import check_pixel_data_structure
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("validation")
 
 # Logging-Konfiguration
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +20,9 @@ logging.basicConfig(level=logging.INFO)
 # Gültige Modalitäten gemäß DICOM-Standard
 VALID_MODALITIES = {"CT", "MR", "XR", "US", "NM", "PT", "DX", "MG", "CR"}
 
+# Höchstzahl der pro Datei namentlich protokollierten privaten Tags
+DICOM_LOG_PRIVATE_TAGS_MAX = int(os.getenv("DICOM_LOG_PRIVATE_TAGS_MAX", "10"))
+
 # Bekannte TransferSyntaxUIDs
 TRANSFER_SYNTAX_UIDS = {
     "1.2.840.10008.1.2": "Implicit VR Little Endian",
@@ -24,140 +36,278 @@ TRANSFER_SYNTAX_UIDS = {
 }
 
 
-def run_full_validation(ds: Dataset, filename: str) -> None:
-    logging.info(f"[Validation] Starte Validierung der DICOM-Metadaten für Datei: {filename}")
-    check_compliance(ds, filename)
-
-    # Dynamische Pflichtfelder basierend auf Modalität
-    required_tags = {
-        "PatientID": 2,
-        "PatientName": 2,
-        "StudyInstanceUID": 2,
-        "SeriesInstanceUID": 2,
-        "SOPInstanceUID": 1,
-        "SOPClassUID": 1,
-        "Modality": 1,
-        "InstanceNumber": 2,
-        "StudyDate": 2,
-        "FrameOfReferenceUID": 2,
-        "SamplesPerPixel": 2,
-        "PhotometricInterpretation": 2,
-    }
-
-    if ds.Modality in {"CT", "MR", "PT"}:
-        required_tags["ImagePositionPatient"] = 2
-        required_tags["ImageOrientationPatient"] = 2
-        required_tags["PixelSpacing"] = 2
-
-    check_required_tags(ds, required_tags)
-    check_date_fields(ds)
-    check_uid_formats(ds)
-    check_modality(ds)
-    check_pixeldata_presence(ds, filename)
-    check_transfer_syntax(ds)
-    log_private_tags(ds, filename)
-    logging.info(f"[Validation] DICOM-Metadaten erfolgreich validiert für Datei: {filename}")
-
-
-def check_required_tags(ds: Dataset, required_tags: dict) -> None:
-    fehlende_typ1 = []
-
-    for tag, tag_typ in required_tags.items():
-        if not hasattr(ds, tag):
-            if tag_typ == 1:
-                fehlende_typ1.append(tag)
-            elif tag_typ == 2:
-                logging.warning(f"[Validation] Optionaler Pflichtwert (Type 2) fehlt: {tag}")
-            continue
-
-        value = getattr(ds, tag)
-        if tag_typ == 1 and (value is None or str(value).strip() == ""):
-            fehlende_typ1.append(tag)
-        elif tag_typ == 2 and (value is None or str(value).strip() == ""):
-            logging.warning(f"[Validation] {tag} ist leer – erlaubt, aber protokolliert.")
-
-    if fehlende_typ1:
-        logging.error(f"[Validation] Fehlende Pflichtfelder (Type 1): {fehlende_typ1}")
-        raise ValueError(f"Fehlende Pflichtfelder: {', '.join(fehlende_typ1)}")
-
-
-def check_date_fields(ds: Dataset) -> None:
-    for field in ["PatientBirthDate", "StudyDate"]:
-        value = getattr(ds, field, "")
-        if value and not re.fullmatch(r"\d{8}", value):
-            logging.error(f"[Validation] Ungültiges Datumsformat in {field}: {value}")
-            raise HTTPException(status_code=422, detail=f"Ungültiges Datumsformat in {field}. Erwartet: YYYYMMDD.")
-        if field == "PatientBirthDate" and value:
-            try:
-                if datetime.strptime(value, "%Y%m%d") > datetime.now():
-                    logging.error("[Validation] Geburtsdatum liegt in der Zukunft.")
-                    raise HTTPException(status_code=422, detail="Geburtsdatum liegt in der Zukunft.")
-            except Exception as e:
-                logging.error(f"[Validation] Fehler beim Parsen des Geburtsdatums: {str(e)}")
-                raise HTTPException(status_code=422, detail="Ungültiges Geburtsdatum.")
-
-    if hasattr(ds, "StudyTime"):
-        value = str(ds.StudyTime)
-        if value and not re.fullmatch(r"\d{6}(\.\d+)?", value):
-            logging.error(f"[Validation] Ungültiges Zeitformat in StudyTime: {value}")
-            raise HTTPException(status_code=422, detail="Ungültiges Zeitformat in StudyTime. Erwartet: HHMMSS.")
-
-
-def check_uid_formats(ds: Dataset) -> None:
-    for field in ["StudyInstanceUID", "SeriesInstanceUID", "SOPInstanceUID", "SOPClassUID"]:
-        uid = getattr(ds, field, "")
-        if uid and not re.fullmatch(r"^\d+(\.\d+)+$", uid):
-            logging.error(f"[Validation] Ungültige UID in {field}: {uid}")
-            raise HTTPException(status_code=422, detail=f"Ungültiges UID-Format in {field}.")
-
-
-def check_modality(ds: Dataset) -> None:
-    modality = getattr(ds, "Modality", "").upper()
-    if modality and modality not in VALID_MODALITIES:
-        logging.error(f"[Validation] Unbekannte oder ungültige Modalität: {modality}")
-        raise HTTPException(status_code=422, detail=f"Unbekannte oder ungültige Modalität: {modality}.")
-
-
-def check_pixeldata_presence(ds: Dataset, filename: str) -> None:
-    if not hasattr(ds, "PixelData"):
-        logging.error(f"[Validation] Fehlender 'PixelData' in Datei: {filename}")
-        raise HTTPException(status_code=422, detail="Fehlender 'Pixel Data' (7FE0,0010) Tag.")
-    verify_pixeldata_consistency(ds, filename)
-
-
-def verify_pixeldata_consistency(ds: Dataset, filename: str) -> None:
-    try:
-        actual_length = len(ds.PixelData)
-        rows = int(ds.get("Rows", 0))
-        cols = int(ds.get("Columns", 0))
-        samples = int(ds.get("SamplesPerPixel", 1))
-        bits = int(ds.get("BitsAllocated", 16))
-        expected_length = rows * cols * samples * (bits // 8)
-        if actual_length != expected_length:
-            logging.error(f"[Validation] PixelData-Länge inkonsistent: erwartet {expected_length}, gefunden {actual_length}")
-            raise HTTPException(
-                status_code=422,
-                detail=f"PixelData-Länge inkonsistent: erwartet {expected_length} Byte, gefunden {actual_length} Byte."
-            )
-    except Exception as e:
-        logging.error(f"[Validation] Fehler bei der Konsistenzprüfung der PixelData: {str(e)}")
-        raise HTTPException(
+# Einzelner Regelverstoß; severity "error" führt zur Ablehnung, "warning" wird nur protokolliert
+@dataclass(frozen=True)
+class Violation:
+    rule: str
+    keyword: str
+    tag: str
+    severity: str
+    message: str
+
+
+# Ergebnis einer Validierung mit allen gefundenen Verstößen (nicht nur dem ersten)
+@dataclass
+class ValidationReport:
+    filename: str
+    violations: List[Violation] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[Violation]:
+        return [v for v in self.violations if v.severity == "error"]
+
+    @property
+    def warnings(self) -> List[Violation]:
+        return [v for v in self.violations if v.severity == "warning"]
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> dict:
+        return {"file": self.filename, "valid": self.is_valid, "violations": [asdict(v) for v in self.violations]}
+
+    def raise_for_errors(self) -> None:
+        if self.errors:
+            raise DICOMValidationError(self)
+
+
+# HTTP 422 mit allen Fehlern einer Datei in einer Antwort
+class DICOMValidationError(HTTPException):
+    def __init__(self, report: ValidationReport):
+        self.report = report
+        super().__init__(
             status_code=422,
-            detail=f"Fehler bei der Konsistenzprüfung der PixelData: {str(e)}"
+            detail={
+                "message": f"DICOM-Validierung fehlgeschlagen ({len(report.errors)} Fehler)",
+                "file": report.filename,
+                "violations": [asdict(v) for v in report.errors],
+            }
         )
 
 
-def check_transfer_syntax(ds: Dataset) -> None:
+# Regel für ein einzelnes Element; check(value, today) liefert eine Fehlermeldung oder None
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    severity: str
+    check: Optional[Callable[[str, str], Optional[str]]] = None
+    required: bool = False                          # Fehlen/leerer Wert ist selbst ein Verstoß
+    modalities: Optional[FrozenSet[str]] = None     # Regel gilt nur für diese Modalitäten
+
+
+_DATE_RE = re.compile(r"\d{8}")
+_TIME_RE = re.compile(r"\d{6}(\.\d+)?")
+_UID_RE = re.compile(r"\d+(\.\d+)+")
+
+
+def _check_date(value: str, today: str) -> Optional[str]:
+    if not _DATE_RE.fullmatch(value):
+        return f"Ungültiges Datumsformat: {value}. Erwartet: YYYYMMDD."
+    return None
+
+
+def _check_birth_date(value: str, today: str) -> Optional[str]:
+    message = _check_date(value, today)
+    if message:
+        return message
+    try:
+        datetime.strptime(value, "%Y%m%d")
+    except ValueError:
+        return "Ungültiges Geburtsdatum."
+    if value > today:
+        return "Geburtsdatum liegt in der Zukunft."
+    return None
+
+
+def _check_time(value: str, today: str) -> Optional[str]:
+    if not _TIME_RE.fullmatch(value):
+        return f"Ungültiges Zeitformat: {value}. Erwartet: HHMMSS."
+    return None
+
+
+def _check_uid(value: str, today: str) -> Optional[str]:
+    if not _UID_RE.fullmatch(value):
+        return "Ungültiges UID-Format."
+    return None
+
+
+def _check_modality(value: str, today: str) -> Optional[str]:
+    if value.upper() not in VALID_MODALITIES:
+        return f"Unbekannte oder ungültige Modalität: {value.upper()}."
+    return None
+
+
+_TYPE1 = Rule("required_type1", "error", required=True)
+_TYPE2 = Rule("required_type2", "warning", required=True)
+_GEOMETRY = Rule("required_geometry", "warning", required=True, modalities=frozenset({"CT", "MR", "PT"}))
+_UID = Rule("uid_format", "error", _check_uid)
+
+# Header-Regeln je Keyword (Type 1 = Pflicht mit Wert, Type 2 = Pflicht, darf leer sein)
+HEADER_RULES = {
+    "PatientID": [_TYPE2],
+    "PatientName": [_TYPE2],
+    "PatientBirthDate": [Rule("birth_date", "error", _check_birth_date)],
+    "StudyInstanceUID": [_TYPE2, _UID],
+    "SeriesInstanceUID": [_TYPE2, _UID],
+    "SOPInstanceUID": [_TYPE1, _UID],
+    "SOPClassUID": [_TYPE1, _UID],
+    "Modality": [_TYPE1, Rule("modality", "error", _check_modality)],
+    "InstanceNumber": [_TYPE2],
+    "StudyDate": [_TYPE2, Rule("date_format", "error", _check_date)],
+    "StudyTime": [Rule("time_format", "error", _check_time)],
+    "FrameOfReferenceUID": [_TYPE2],
+    "SamplesPerPixel": [_TYPE2],
+    "PhotometricInterpretation": [_TYPE2],
+    "ImagePositionPatient": [_GEOMETRY],
+    "ImageOrientationPatient": [_GEOMETRY],
+    "PixelSpacing": [_GEOMETRY],
+}
+
+
+# Übersetzt die Regeln einmalig in eine Tabelle (Tag-Nummer, Keyword, Tag-Text, Regeln)
+def compile_rules(rules: Dict[str, List[Rule]]) -> List[Tuple[int, str, str, Tuple[Rule, ...]]]:
+    table = []
+    for keyword, keyword_rules in rules.items():
+        tag = tag_for_keyword(keyword)
+        if tag is None:
+            raise ValueError(f"Unbekanntes DICOM-Keyword in den Validierungsregeln: {keyword}")
+        table.append((tag, keyword, str(Tag(tag)), tuple(keyword_rules)))
+    return table
+
+
+_HEADER_TABLE = compile_rules(HEADER_RULES)
+_MODALITY_TAG = tag_for_keyword("Modality")
+
+
+def run_full_validation(ds: Dataset, filename: str) -> ValidationReport:
+    report = validate_header(ds, filename)
+    report.violations.extend(validate_pixels(ds, filename).violations)
+    _log_report(report, "vollständig")
+    report.raise_for_errors()
+    return report
+
+
+# Phase 1: Prüfungen, die nur Header-Elemente benötigen (Pixel-Daten dürfen noch nicht geladen sein)
+def run_header_validation(ds: Dataset, filename: str) -> ValidationReport:
+    report = validate_header(ds, filename)
+    _log_report(report, "Header")
+    report.raise_for_errors()
+    return report
+
+
+# Phase 2: Prüfungen nach der Anonymisierung, die Pixel-Daten bzw. den vollständigen Datensatz benötigen
+def run_pixel_validation(ds: Dataset, filename: str) -> ValidationReport:
+    report = validate_pixels(ds, filename)
+    log_private_tags(ds, filename)
+    _log_report(report, "Pixel")
+    report.raise_for_errors()
+    return report
+
+
+# Prüft die Header-Regeln in einem Durchlauf über die Regeltabelle und sammelt alle Verstöße
+def validate_header(ds: Dataset, filename: str, today: Optional[str] = None) -> ValidationReport:
+    today = today or datetime.now().strftime("%Y%m%d")
+    report = ValidationReport(filename)
+    modality_element = ds.get(_MODALITY_TAG)
+    modality = str(modality_element.value or "").upper() if modality_element is not None else ""
+
+    for tag, keyword, tag_text, rules in _HEADER_TABLE:
+        element = ds.get(tag)
+        value = "" if element is None or element.value is None else str(element.value).strip()
+        for rule in rules:
+            if rule.modalities is not None and modality not in rule.modalities:
+                continue
+            if not value:
+                if rule.required:
+                    state = "fehlt" if element is None else "ist leer"
+                    report.violations.append(Violation(rule.name, keyword, tag_text, rule.severity, f"{keyword} {state}."))
+                continue
+            message = rule.check(value, today) if rule.check else None
+            if message:
+                report.violations.append(Violation(rule.name, keyword, tag_text, rule.severity, message))
+
     try:
         ts = str(ds.file_meta.TransferSyntaxUID)
         if ts not in TRANSFER_SYNTAX_UIDS:
-            logging.warning(f"[TransferSyntax] Unbekannte Transfer Syntax UID: {ts}")
+            report.violations.append(Violation(
+                "transfer_syntax", "TransferSyntaxUID", "(0002,0010)", "warning", f"Unbekannte Transfer Syntax UID: {ts}"
+            ))
     except Exception as e:
-        logging.warning(f"[TransferSyntax] Fehler bei TransferSyntax-Prüfung: {e}")
+        logger.warning("[TransferSyntax] Fehler bei TransferSyntax-Prüfung: %s", e)
+    return report
+
+
+# Prüft Anonymisierung und Pixel-Daten; Verstöße werden gesammelt statt beim ersten abzubrechen
+def validate_pixels(ds: Dataset, filename: str) -> ValidationReport:
+    report = ValidationReport(filename)
+    try:
+        check_compliance(ds, filename)
+    except HTTPException as e:
+        report.violations.append(Violation("compliance", "PatientName", "(0010,0010)", "error", str(e.detail)))
+
+    # Struktur- und Längenprüfung ohne Dekodierung – auch für gekapselte (komprimierte) Daten
+    for issue in check_pixel_data_structure(ds):
+        report.violations.append(Violation("pixel_data", "PixelData", "(7FE0,0010)", "error", issue))
+    return report
 
 
+# Batch-API: validiert viele Datensätze mit derselben vorkompilierten Regeltabelle
+def validate_datasets(datasets: Iterable[Tuple[Dataset, str]], phase: str = "header") -> List[ValidationReport]:
+    """
+    phase: "header", "pixel" oder "full". Es wird nichts ausgelöst –
+    jeder Bericht enthält alle Verstöße seiner Datei.
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    reports = []
+    for ds, filename in datasets:
+        if phase == "pixel":
+            report = validate_pixels(ds, filename)
+        else:
+            report = validate_header(ds, filename, today)
+            if phase == "full":
+                report.violations.extend(validate_pixels(ds, filename).violations)
+        reports.append(report)
+
+    invalid = sum(1 for report in reports if not report.is_valid)
+    logger.info("[Validation] Batch-Validierung (%s): %s Datensätze, %s ungültig", phase, len(reports), invalid)
+    return reports
+
+
+def _log_report(report: ValidationReport, phase: str) -> None:
+    for violation in report.warnings:
+        logger.warning("[Validation] %s: %s – %s", report.filename, violation.keyword, violation.message)
+    if report.errors:
+        messages = "; ".join(f"{v.keyword}: {v.message}" for v in report.errors)
+        logger.error("[Validation] %s-Validierung fehlgeschlagen für %s: %s", phase, report.filename, messages)
+    else:
+        logger.info("[Validation] %s-Validierung erfolgreich für Datei: %s", phase, report.filename)
+
+
+# Fasst private Elemente pro Datei in einem Eintrag zusammen (ohne Werte, höchstens DICOM_LOG_PRIVATE_TAGS_MAX Tags)
 def log_private_tags(ds: Dataset, filename: str) -> None:
-    for elem in ds.iterall():
-        if elem.tag.is_private:
-            logging.warning(f"[PrivateTag] {filename}: {elem.tag} = {elem.value}")
+    """
+    Es werden nur Tag und VR protokolliert – keine Werte, da private Elemente oft Binärdaten
+    oder personenbezogene Angaben enthalten. Zurückgestellte Elemente werden nicht geladen.
+    """
+    count = 0
+    listed = []
+    stack = [ds]
+    while stack:
+        dataset = stack.pop()
+        for tag in dataset.keys():
+            element = dataset.get_item(tag, keep_deferred=True)
+            if tag.is_private:
+                count += 1
+                if len(listed) < DICOM_LOG_PRIVATE_TAGS_MAX:
+                    listed.append(f"{tag}:{element.VR or '??'}")
+            elif (element.VR or _dictionary_vr(tag)) == "SQ":
+                stack.extend(dataset[tag].value)
+
+    if count:
+        more = f" (+{count - len(listed)} weitere)" if count > len(listed) else ""
+        logger.warning("[PrivateTag] %s: %s private Elemente: %s%s", filename, count, ', '.join(listed), more)
+
 
+def _dictionary_vr(tag: int) -> Optional[str]:
+    return dictionary_VR(tag) if tag in DicomDictionary else None
@@ -1,24 +1,40 @@
-import logging
+from typing import Optional
 import pydicom
 from pydicom.errors import InvalidDicomError
+from services.dicom.ingest_context import DicomIngestContext
+from services.dicom.pixeldata_check import check_pixel_data_structure
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("validator")
 
 # Diese Funktion prüft, ob die angegebene Datei ein valides DICOM mit Bildinhalt ist
-def validate_dicom(file_path: str) -> bool:
+# Mit einem Ingest-Kontext wird weder neu gelesen noch erneut dekodiert
+# Mit decode=False wird nur die Struktur der PixelData geprüft (auch bei komprimierten Daten ohne Dekodierung)
+def validate_dicom(file_path: str, context: Optional[DicomIngestContext] = None, decode: bool = True) -> bool:
     try:
-        ds = pydicom.dcmread(file_path)
-        _ = ds.pixel_array  # Versuche, Pixel-Daten zu extrahieren
-        logging.info(f"[Validator] Gültige DICOM-Datei mit Bilddaten: {file_path}")
+        if not decode:
+            ds = context.ds if context is not None else pydicom.dcmread(file_path, defer_size="16 KB")
+            issues = check_pixel_data_structure(ds)
+            if issues:
+                logger.warning("[Validator] PixelData inkonsistent in Datei %s: %s", file_path, issues)
+                return False
+        elif context is not None:
+            _ = context.pixel_array
+        else:
+            ds = pydicom.dcmread(file_path)
+            _ = ds.pixel_array  # Versuche, Pixel-Daten zu extrahieren
+        logger.info("[Validator] Gültige DICOM-Datei mit Bilddaten: %s", file_path)
         return True
     except InvalidDicomError:
-        logging.warning(f"[Validator] Ungültige DICOM-Datei: {file_path}")
+        logger.warning("[Validator] Ungültige DICOM-Datei: %s", file_path)
         return False
     except AttributeError:
-        logging.warning(f"[Validator] Keine Pixel-Daten gefunden in Datei: {file_path}")
+        logger.warning("[Validator] Keine Pixel-Daten gefunden in Datei: %s", file_path)
         return False
     except FileNotFoundError:
-        logging.error(f"[Validator] Datei nicht gefunden: {file_path}")
+        logger.error("[Validator] Datei nicht gefunden: %s", file_path)
         return False
     except Exception as e:
-        logging.error(f"[Validator] Fehler beim Validieren der Datei {file_path}: {str(e)}")
+        logger.error("[Validator] Fehler beim Validieren der Datei %s: %s", file_path, e)
         return False
 
@@ -0,0 +1,200 @@
+# volume.py
+import os
+import json
+import hashlib
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+import pydicom
+from services.dicom.pixel_store import open_pixel_store
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("volume")
+
+# Optionale Ingest-Stufe: fügt die Schichten einer Serie zu einem zusammenhängenden 3D-Volumen zusammen.
+# Standardmäßig aus, da das Volumen eine zweite Kopie der Serie ist (siehe assemble_series_volumes)
+DICOM_ASSEMBLE_VOLUMES = os.getenv("DICOM_ASSEMBLE_VOLUMES", "false").lower() in ("1", "true", "yes")
+
+
+# Liest die für die Sortierung und Geometrie benötigten Header-Werte einer Schicht
+def extract_slice_info(ds: pydicom.Dataset) -> dict:
+    return {
+        "series_instance_uid": str(ds.get("SeriesInstanceUID", "")),
+        "sop_instance_uid": str(ds.get("SOPInstanceUID", "")),
+        "instance_number": _to_int(ds.get("InstanceNumber")),
+        "image_position_patient": _to_floats(ds.get("ImagePositionPatient")),
+        "image_orientation_patient": _to_floats(ds.get("ImageOrientationPatient")),
+        "pixel_spacing": _to_floats(ds.get("PixelSpacing")),
+        "slice_thickness": _to_float(ds.get("SliceThickness")),
+        "number_of_frames": _to_int(ds.get("NumberOfFrames")) or 1,
+    }
+
+
+# Gruppiert die Ergebnisse eines Uploads nach Serie und schreibt pro Serie ein Volumen + Index
+def assemble_series_volumes(results: List[dict], output_dir: str = None) -> List[dict]:
+    """
+    Erwartet die Ergebnis-Dictionaries von handle_dicom_upload (mit 'slice_info' und 'pixel_array_file').
+    Pro Serie entstehen '{volumen_hash}_volume.npy' (memory-mappable, Form: Schichten × Zeilen × Spalten [× Kanäle])
+    und '{volumen_hash}_volume.json' mit Byte-Offsets, Positionen, Abständen und Rescale-Werten der Schichten.
+    Der Hash umfasst Series- und alle SOPInstanceUIDs: gleicher Inhalt → gleiche Datei, Teilmengen → eigene Dateien.
+    Die Einzelschichten ('{hash}_anon.npy'/'.pxz') bleiben erhalten – auf sie verweisen die Datenbank-Einträge
+    und /dicoms/{id}/pixels. Das Volumen ist eine zusätzliche Kopie (doppelter Platzbedarf pro Serie)
+    und wird deshalb nur mit DICOM_ASSEMBLE_VOLUMES=true erzeugt.
+    Das Volumen übernimmt den Datentyp der gespeicherten Schichten (float32 oder nativ).
+    Serien mit Multi-Frame-Objekten oder uneinheitlicher Bildgröße werden übersprungen.
+    """
+    if output_dir is None:
+        output_dir = os.getenv("PROCESSED_DIR", "/tmp/processed")
+    os.makedirs(output_dir, exist_ok=True)
+
+    series = OrderedDict()
+    for result in results:
+        info = result.get("slice_info")
+        if not info or not result.get("pixel_array_file") or not info["series_instance_uid"]:
+            continue
+        # Doppelt hochgeladene Instanzen nur einmal ins Volumen übernehmen
+        series.setdefault(info["series_instance_uid"], OrderedDict())[info["sop_instance_uid"]] = result
+
+    volumes = []
+    for series_uid, instances in series.items():
+        try:
+            volume = _write_series_volume(series_uid, list(instances.values()), output_dir)
+        except Exception as e:
+            logger.error("[Volume] Fehler beim Erstellen des Volumens für Serie %s: %s", series_uid, e)
+            continue
+        if volume:
+            volumes.append(volume)
+    return volumes
+
+
+def _write_series_volume(series_uid: str, instances: List[dict], output_dir: str) -> Optional[dict]:
+    if any(item["slice_info"]["number_of_frames"] > 1 for item in instances):
+        logger.warning("[Volume] Serie %s enthält Multi-Frame-Objekte – übersprungen.", series_uid)
+        return None
+
+    instances = _sort_slices(instances)
+    # Nur die Header öffnen: Form und Datentyp stehen im Store-Header, Pixel werden erst beim Kopieren gelesen
+    stores = [open_pixel_store(item["pixel_array_file"]) for item in instances]
+
+    slice_shape = stores[0].shape
+    if any(store.shape != slice_shape for store in stores):
+        logger.warning("[Volume] Serie %s hat uneinheitliche Bildgrößen – übersprungen.", series_uid)
+        return None
+    dtype = np.result_type(*[store.dtype for store in stores])
+
+    volume_key = _volume_key(series_uid, instances)
+    volume_path = os.path.join(output_dir, f"{volume_key}_volume.npy")
+    index_path = os.path.join(output_dir, f"{volume_key}_volume.json")
+    # Geschrieben wird in eigene temporäre Dateien, die erst am Ende atomar umbenannt werden –
+    # parallele Jobs für dieselbe Serie schreiben so nie in dieselbe Datei
+    temp_suffix = f".{uuid.uuid4().hex}.tmp"
+
+    # Schicht für Schicht in die memory-gemappte Zieldatei kopieren – auch komprimierte (.pxz) Schichten
+    # werden einzeln entpackt, das Volumen liegt also nie komplett im Speicher
+    volume = np.lib.format.open_memmap(volume_path + temp_suffix, mode="w+", dtype=dtype,
+                                       shape=(len(stores),) + slice_shape)
+    try:
+        for index, store in enumerate(stores):
+            volume[index] = store.raw()
+        volume.flush()
+        data_offset = volume.offset
+    except BaseException:
+        del volume
+        os.remove(volume_path + temp_suffix)
+        raise
+    del volume
+
+    slice_bytes = int(np.prod(slice_shape)) * dtype.itemsize
+    positions = [item["slice_info"]["image_position_patient"] for item in instances]
+    first = instances[0]["slice_info"]
+    index = {
+        "series_instance_uid": series_uid,
+        "volume_file": volume_path,
+        "shape": [len(stores), *slice_shape],
+        "dtype": dtype.str,
+        "data_offset": data_offset,
+        "slice_bytes": slice_bytes,
+        "pixel_spacing": first["pixel_spacing"],
+        "slice_thickness": first["slice_thickness"],
+        "slice_spacing": _slice_spacing(positions, first["image_orientation_patient"]),
+        "image_orientation_patient": first["image_orientation_patient"],
+        "slices": [
+            {
+                "index": i,
+                "byte_offset": data_offset + i * slice_bytes,
+                "sop_instance_uid": item["slice_info"]["sop_instance_uid"],
+                "instance_number": item["slice_info"]["instance_number"],
+                "image_position_patient": item["slice_info"]["image_position_patient"],
+                "rescale_slope": store.rescale_slope,
+                "rescale_intercept": store.rescale_intercept,
+                "source_file": item["pixel_array_file"],
+            }
+            for i, (item, store) in enumerate(zip(instances, stores))
+        ],
+    }
+    with open(index_path + temp_suffix, "w") as f:
+        json.dump(index, f)
+    os.replace(volume_path + temp_suffix, volume_path)
+    os.replace(index_path + temp_suffix, index_path)
+
+    logger.info("[Volume] Serie %s: %s Schichten → %s", series_uid, len(stores), volume_path)
+    return {
+        "series_instance_uid": series_uid,
+        "volume_file": volume_path,
+        "index_file": index_path,
+        "slices": len(stores),
+    }
+
+
+# Dateiname eines Volumens: Serie + enthaltene Instanzen – ein Upload mit nur einem Teil der Serie
+# erzeugt ein eigenes Volumen, statt das vollständige zu überschreiben
+def _volume_key(series_uid: str, instances: List[dict]) -> str:
+    sop_uids = sorted(item["slice_info"]["sop_instance_uid"] for item in instances)
+    return hashlib.sha256("\n".join([series_uid, *sop_uids]).encode()).hexdigest()
+
+
+# Sortiert entlang der Schichtnormalen (aus ImageOrientationPatient), sonst nach InstanceNumber
+def _sort_slices(instances: List[dict]) -> List[dict]:
+    infos = [item["slice_info"] for item in instances]
+    normal = _slice_normal(infos[0]["image_orientation_patient"])
+    if normal is not None and all(info["image_position_patient"] for info in infos):
+        return sorted(instances, key=lambda item: float(np.dot(normal, item["slice_info"]["image_position_patient"])))
+    if all(info["instance_number"] is not None for info in infos):
+        return sorted(instances, key=lambda item: item["slice_info"]["instance_number"])
+    return instances
+
+
+def _slice_normal(orientation: Optional[List[float]]) -> Optional[np.ndarray]:
+    if not orientation or len(orientation) != 6:
+        return None
+    return np.cross(orientation[:3], orientation[3:])
+
+
+def _slice_spacing(positions: List[Optional[List[float]]], orientation: Optional[List[float]]) -> Optional[float]:
+    normal = _slice_normal(orientation)
+    if normal is None or len(positions) < 2 or not all(positions):
+        return None
+    distances = np.diff([float(np.dot(normal, position)) for position in positions])
+    return float(np.median(np.abs(distances)))
+
+
+def _to_floats(value) -> Optional[List[float]]:
+    try:
+        return [float(v) for v in value] if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
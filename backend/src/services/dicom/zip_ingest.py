@@ -0,0 +1,164 @@
+import os
+import math
+import uuid
+import shutil
+import zipfile
+from typing import IO, Callable, Iterator, List, Optional, Tuple, Union, BinaryIO
+from fastapi import HTTPException
+
+from services.dicom import ingest_pool
+from services.dicom.service_dicom import handle_dicom_upload
+from db.crud import crud_dicom
+from src.db.database.database import session_scope
+from services.dicom.ingest_logging import get_stage_logger
+
+logger = get_stage_logger("zip")
+
+# Obergrenzen für ZIP-Uploads (Anzahl DICOM-Einträge und entpackte Gesamtgröße in Byte)
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "5000"))
+ZIP_MAX_UNCOMPRESSED_BYTES = int(os.getenv("ZIP_MAX_UNCOMPRESSED_BYTES", str(8 * 1024 ** 3)))
+
+
+# Ermittelt alle DICOM-Einträge eines ZIP-Archivs und prüft die konfigurierten Obergrenzen
+def list_dicom_members(zip_ref: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """
+    Liest nur das zentrale Verzeichnis des Archivs – es wird nichts entpackt.
+    Überschreitet das Archiv die Obergrenzen, wird ein HTTP 413 ausgelöst.
+    """
+    members = [
+        info for info in zip_ref.infolist()
+        if not info.is_dir() and info.filename.endswith(".dcm")
+    ]
+
+    if len(members) > ZIP_MAX_MEMBERS:
+        logger.error("[ZIP] Zu viele DICOM-Einträge: %s (max. %s)", len(members), ZIP_MAX_MEMBERS)
+        raise HTTPException(
+            status_code=413,
+            detail=f"ZIP enthält zu viele DICOM-Dateien ({len(members)}, erlaubt: {ZIP_MAX_MEMBERS})."
+        )
+
+    total_size = sum(info.file_size for info in members)
+    if total_size > ZIP_MAX_UNCOMPRESSED_BYTES:
+        logger.error("[ZIP] Entpackte Größe zu groß: %s Byte (max. %s)", total_size, ZIP_MAX_UNCOMPRESSED_BYTES)
+        raise HTTPException(
+            status_code=413,
+            detail=f"Entpackte ZIP-Größe überschreitet das Limit von {ZIP_MAX_UNCOMPRESSED_BYTES} Byte."
+        )
+
+    logger.info("[ZIP] %s DICOM-Einträge gefunden (%s Byte entpackt)", len(members), total_size)
+    return members
+
+
+# Liefert die DICOM-Einträge nacheinander als dateiähnliche Objekte direkt aus dem Archiv
+def iter_dicom_members(zip_ref: zipfile.ZipFile, members: List[zipfile.ZipInfo]) -> Iterator[Tuple[str, IO[bytes]]]:
+    """
+    Jeder Eintrag wird erst beim Lesen dekomprimiert; es entsteht keine entpackte Kopie auf der Platte.
+    zipfile liest pro Eintrag höchstens die im Verzeichnis angegebene Größe.
+    """
+    for info in members:
+        with zip_ref.open(info) as member:
+            yield os.path.basename(info.filename), member
+
+
+# Verarbeitet einen einzelnen ZIP-Eintrag; Fehler werden als Ergebnis-Eintrag zurückgegeben
+# Die Metadaten werden erst von process_zip für alle Einträge gemeinsam gespeichert
+def process_member(entry: str, member: IO[bytes]) -> dict:
+    try:
+        result = handle_dicom_upload(member, filename=entry, persist=False)
+        logger.info("[ZIP] DICOM aus ZIP verarbeitet: %s", entry)
+        return result
+    except Exception as e:
+        logger.error("[ZIP] Fehler bei Verarbeitung von %s → %s", entry, e)
+        return {"file": entry, "error": str(e)}
+
+
+# Worker-Funktion für den Prozess-Pool: öffnet das Archiv einmal pro Paket von Einträgen
+def _process_member_batch(zip_path: str, member_names: List[str]) -> List[dict]:
+    results = []
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for name in member_names:
+            with zip_ref.open(name) as member:
+                results.append(process_member(os.path.basename(name), member))
+    return results
+
+
+# Fortschritts-Callback: (Anzahl DICOM-Einträge gesamt, neu abgeschlossene Ergebnisse)
+ProgressCallback = Callable[[int, List[dict]], None]
+
+
+# Verarbeitet alle DICOM-Einträge eines ZIP-Archivs – sequentiell oder im Prozess-Pool
+def process_zip(source: Union[str, BinaryIO], on_progress: Optional[ProgressCallback] = None) -> List[dict]:
+    """
+    source ist ein Pfad oder ein seekbares Dateiobjekt (z. B. der Upload-Stream).
+    Die Ergebnisse werden in der Reihenfolge der Archiveinträge zurückgegeben,
+    fehlgeschlagene Dateien als {"file": ..., "error": ...}.
+    Die Metadaten aller erfolgreichen Einträge werden anschließend in einer Transaktion gespeichert.
+    """
+    with zipfile.ZipFile(source, "r") as zip_ref:
+        members = list_dicom_members(zip_ref)
+        if on_progress:
+            on_progress(len(members), [])
+
+        executor = ingest_pool.get_executor()
+        if executor is None or len(members) < 2:
+            results = []
+            for entry, member in iter_dicom_members(zip_ref, members):
+                result = process_member(entry, member)
+                results.append(result)
+                if on_progress:
+                    on_progress(len(members), [result])
+            persist_results(results)
+            return results
+
+    results = _process_zip_parallel(source, [info.filename for info in members], executor, on_progress)
+    persist_results(results)
+    return results
+
+
+# Speichert die Metadaten aller erfolgreich verarbeiteten Einträge mit einem einzigen Commit
+def persist_results(results: List[dict]) -> None:
+    metadata = [result["metadata"] for result in results if not result.get("error") and result.get("metadata")]
+    if not metadata:
+        return
+
+    try:
+        with session_scope() as db:
+            crud_dicom.bulk_upsert_dicom_metadata(db, metadata)
+    except Exception as e:
+        logger.error("[ZIP] Fehler bei DB-Speicherung von %s Einträgen → %s", len(metadata), e)
+        raise HTTPException(status_code=500, detail="Fehler beim Speichern der DICOM-Metadatensätze.")
+
+
+def _process_zip_parallel(source: Union[str, BinaryIO], member_names: List[str], executor,
+                          on_progress: Optional[ProgressCallback] = None) -> List[dict]:
+    # Die Worker brauchen einen Pfad; ein Upload-Stream wird dafür einmalig (ohne Entpacken) abgelegt
+    zip_path = source if isinstance(source, str) else None
+    if zip_path is None:
+        upload_dir = os.getenv("UPLOAD_DIR", "/tmp/uploads")
+        os.makedirs(upload_dir, exist_ok=True)
+        zip_path = os.path.join(upload_dir, f"{uuid.uuid4()}.zip")
+        source.seek(0)
+        with open(zip_path, "wb") as buffer:
+            shutil.copyfileobj(source, buffer)
+
+    try:
+        batch_size = max(1, math.ceil(len(member_names) / (ingest_pool.DICOM_WORKERS * 4)))
+        batches = [member_names[i:i + batch_size] for i in range(0, len(member_names), batch_size)]
+        logger.info("[ZIP] %s Einträge in %s Paketen an den Prozess-Pool übergeben", len(member_names), len(batches))
+
+        futures = [executor.submit(_process_member_batch, zip_path, batch) for batch in batches]
+        results = []
+        for batch, future in zip(batches, futures):
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                # z. B. abgestürzter Worker – betrifft alle Einträge dieses Pakets
+                logger.error("[ZIP] Worker-Fehler für %s Einträge → %s", len(batch), e)
+                batch_results = [{"file": os.path.basename(name), "error": str(e)} for name in batch]
+            results.extend(batch_results)
+            if on_progress:
+                on_progress(len(member_names), batch_results)
+        return results
+    finally:
+        if zip_path is not source and os.path.exists(zip_path):
+            os.remove(zip_path)
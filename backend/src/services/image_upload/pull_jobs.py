@@ -0,0 +1,115 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from src.services.jobs.job_registry import Job, JobRegistry
+from src.services.image_upload import service_KIImage
+from src.db.crud import crud_kiImage
+from src.db.database.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+# Anzahl gleichzeitiger Pulls und Aufbewahrungsdauer abgeschlossener Pull-Jobs (Sekunden)
+KI_PULL_WORKERS = int(os.getenv("KI_PULL_WORKERS", "2"))
+KI_PULL_JOB_TTL = int(os.getenv("KI_PULL_JOB_TTL", "3600"))
+
+job_registry = JobRegistry(ttl_seconds=KI_PULL_JOB_TTL)
+
+# Pulls laufen in eigenen Threads, damit der Event-Loop von FastAPI nicht blockiert wird
+_pull_runner = ThreadPoolExecutor(max_workers=KI_PULL_WORKERS, thread_name_prefix="ki-image-pull")
+
+
+# Legt einen Pull-Job an und startet den Pull im Hintergrund
+def submit_pull_job(image_reference: str) -> Job:
+    """
+    Der Datenbank-Eintrag wird erst nach erfolgreichem Pull angelegt (image_id im Job).
+    Fortschritt pro Layer steht in job.layers; job.version wird bei jeder Änderung erhöht.
+    """
+    if not image_reference or not image_reference.strip():
+        raise ValueError("image_reference required for Hub Repository import")
+
+    image_reference = image_reference.strip()
+    job = job_registry.create(
+        "ki_image_pull",
+        image_reference=image_reference,
+        image_name=service_KIImage.hub_image_data(image_reference)["image_name"],
+        layers={},
+        version=0,
+        image_id=None
+    )
+    _pull_runner.submit(_run_pull_job, job)
+    logger.info(f"[Pull] Pull-Job {job.job_id} für {image_reference} eingereiht")
+    return job
+
+
+def get_pull_job(job_id: str) -> Optional[Job]:
+    return job_registry.get(job_id)
+
+
+def list_pull_jobs() -> List[Job]:
+    return job_registry.list()
+
+
+# Fortschritt eines Jobs für die API (Layer als Liste, Summen über alle bekannten Layer)
+def pull_progress(job: Job) -> dict:
+    snapshot = job_registry.snapshot(job)
+    layers = list(snapshot.pop("layers").values())
+    snapshot.update(
+        layers=layers,
+        downloaded_bytes=sum(layer["download_current"] for layer in layers),
+        total_bytes=sum(layer["download_total"] for layer in layers),
+    )
+    return snapshot
+
+
+def _run_pull_job(job: Job) -> None:
+    job_registry.update(job, status="running", version=job.version + 1)
+    try:
+        # Low-Level-Stream des Daemons: ein dekodiertes Ereignis pro Statuszeile bzw. Fortschrittsschritt
+        for event in service_KIImage.docker_client.api.pull(job.image_reference, stream=True, decode=True):
+            if "error" in event:
+                raise RuntimeError(event.get("errorDetail", {}).get("message") or event["error"])
+            _apply_event(job, event)
+
+        with session_scope() as db:
+            pulled = service_KIImage.docker_client.images.get(job.image_reference)
+            image_data = {**service_KIImage.hub_image_data(job.image_reference), **service_KIImage.image_identity(pulled)}
+            image = crud_kiImage.create_or_get_ki_image(db, image_data)
+            image_id = image.image_id
+
+        job_registry.update(job, status="completed", image_id=image_id, version=job.version + 1)
+        logger.info(f"[Pull] Pull-Job {job.job_id} abgeschlossen: {job.image_reference} → KI-Image {image_id}")
+    except Exception as e:
+        logger.error(f"[Pull] Pull-Job {job.job_id} fehlgeschlagen → {str(e)}")
+        job_registry.update(job, status="failed", error=str(e), version=job.version + 1)
+
+
+# Übernimmt ein Ereignis aus dem Pull-Stream in den Layer-Fortschritt des Jobs
+def _apply_event(job: Job, event: dict) -> None:
+    layer_id = event.get("id")
+    status = event.get("status", "")
+    # Ereignisse ohne Layer ("Digest: …", "Status: …") und die Kopfzeile "Pulling from …" (id = Tag)
+    if not layer_id or status.startswith("Pulling from"):
+        return
+
+    layer = dict(job.layers.get(layer_id) or {
+        "id": layer_id, "status": status,
+        "download_current": 0, "download_total": 0,
+        "extract_current": 0, "extract_total": 0,
+    })
+    layer["status"] = status
+    detail = event.get("progressDetail") or {}
+    if status == "Downloading":
+        layer["download_current"] = detail.get("current", layer["download_current"])
+        layer["download_total"] = detail.get("total", layer["download_total"])
+    elif status == "Extracting":
+        layer["extract_current"] = detail.get("current", layer["extract_current"])
+        layer["extract_total"] = detail.get("total", layer["extract_total"])
+    elif status in ("Download complete", "Pull complete"):
+        layer["download_current"] = layer["download_total"]
+        if status == "Pull complete":
+            layer["extract_current"] = layer["extract_total"]
+
+    # Neues Dictionary statt Änderung am alten: Snapshots anderer Threads bleiben konsistent
+    job_registry.update(job, layers={**job.layers, layer_id: layer}, version=job.version + 1)
@@ -1,7 +1,12 @@
 from src.api.py_models.py_models import KIImageMetadata
 import docker
-import tempfile, os
+from docker.utils import parse_repository_tag
+import os
+import json
+import hashlib
+import tarfile
 import logging
+from typing import BinaryIO, List, Optional, Tuple
 
 # ------------------------------------------------------------
 # Abschnitt: Funktionen
@@ -9,20 +14,37 @@ import logging
 logger = logging.getLogger(__name__)
 docker_client = docker.from_env()
 
-def import_local_image(file_bytes: bytes) -> dict:
-    if not file_bytes:
+def import_local_image(tar_file: BinaryIO) -> dict:
+    """
+    tar_file ist ein dateiähnliches Objekt, z. B. UploadFile.file – Starlette hat den Upload bereits
+    blockweise in eine temporäre Datei gespoolt. Das Archiv wird direkt als Dateiobjekt an den
+    Docker-Daemon gestreamt und liegt dabei nie vollständig im Speicher.
+    Vorher wird die Image-ID (Digest der Config) aus manifest.json gelesen; kennt der Daemon
+    das Image bereits, entfällt das Laden (ggf. fehlende Tags werden nur nachgetragen).
+    Blockierend (Docker-API) – aus async-Routen über run_in_threadpool aufrufen.
+    """
+    tar_file.seek(0, os.SEEK_END)
+    size = tar_file.tell()
+    tar_file.seek(0)
+    if not size:
         raise ValueError("File is required for local import")
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".tar") as temp_file:
-        temp_file.write(file_bytes)
-        temp_file_path = temp_file.name
-        logger.info(f"Temp file saved at {temp_file_path}")
-    
-    with open(temp_file_path, "rb") as f:
-        images = docker_client.images.load(f.read())
+
+    image_digest, repo_tags = read_image_manifest(tar_file)
+    imported_image = _get_existing_image(image_digest) if image_digest else None
+    if imported_image is not None:
+        logger.info(f"Image {image_digest} already present in Docker, skipping load")
+        for repo_tag in repo_tags:
+            if repo_tag not in imported_image.tags:
+                repository, tag = parse_repository_tag(repo_tag)
+                imported_image.tag(repository, tag or "latest")
+    else:
+        logger.info(f"Loading image archive ({size} bytes) into Docker")
+        images = docker_client.images.load(tar_file)
+        if not images:
+            raise ValueError("Docker did not report a loaded image for the tar file")
         imported_image = images[0]
+        repo_tags = repo_tags or imported_image.attrs.get("RepoTags", [])
 
-    repo_tags = imported_image.attrs.get("RepoTags", [])
     if repo_tags:
         full_name = repo_tags[0]
         parts = full_name.split(":")
@@ -30,32 +52,72 @@ def import_local_image(file_bytes: bytes) -> dict:
         image_tag = parts[1] if len(parts) > 1 else "latest"
     else:
         raise ValueError("Could not determine image name and tag from tar file")
-    
-    os.unlink(temp_file_path)
-    
+
     image_data = {
         "image_name": image_name,
         "image_tag": image_tag,
         "image_description": None,
         "image_reference": f"{image_name}:{image_tag}",
-        "image_provider_id": 1  # TODO: dynamisch, falls User
+        "image_provider_id": 1,  # TODO: dynamisch, falls User
+        **image_identity(imported_image)
     }
     return image_data
 
+
+def read_image_manifest(tar_file: BinaryIO) -> Tuple[Optional[str], List[str]]:
+    """
+    Liest manifest.json und die Image-Config aus einem 'docker save'-Archiv (Legacy- und OCI-Layout).
+    Rückgabe: (Image-ID "sha256:…", RepoTags). Die Layer werden dabei nur per seek übersprungen,
+    nicht gelesen. Danach steht das Dateiobjekt wieder am Anfang.
+    Ist das Archiv nicht lesbar, wird (None, []) zurückgegeben und normal geladen.
+    """
+    try:
+        with tarfile.open(fileobj=tar_file, mode="r:") as tar:
+            manifest_file = tar.extractfile("manifest.json")
+            entry = json.load(manifest_file)[0]
+            # Die Image-ID ist der SHA-256 der Config-Datei (klein, wenige KB)
+            config = tar.extractfile(entry["Config"]).read()
+        return f"sha256:{hashlib.sha256(config).hexdigest()}", entry.get("RepoTags") or []
+    except (tarfile.TarError, KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+        logger.warning(f"Could not read manifest.json from image archive, loading without digest check → {e}")
+        return None, []
+    finally:
+        tar_file.seek(0)
+
+
+def _get_existing_image(image_digest: str):
+    try:
+        return docker_client.images.get(image_digest)
+    except docker.errors.ImageNotFound:
+        return None
+
+
+# Digest (Image-ID) und Größe eines Images für die Datenbank
+def image_identity(image) -> dict:
+    return {"image_digest": image.id, "image_size": image.attrs.get("Size")}
+
+
 def import_hub_repositorie_image(image_reference: str) -> dict:
     if not image_reference:
         raise ValueError("image_reference required for Hub Repository import")
     
     #docker_client.images.pull(f"{image_name}:{image_tag}")
-    docker_client.images.pull(f"{image_reference}")
+    image = docker_client.images.pull(f"{image_reference}")
+
+    return {**hub_image_data(image_reference), **image_identity(image)}
+
+
+def hub_image_data(image_reference: str) -> dict:
+    """
+    Baut die Datenbank-Felder für ein Image aus Docker Hub bzw. einer Registry.
+    Name und Tag werden getrennt gespeichert; ohne Tag gilt wie bei Docker "latest"
+    (Registry-Ports wie "host:5000/repo" werden dabei nicht als Tag gewertet).
+    """
+    image_name, image_tag = parse_repository_tag(image_reference)
 
-    #Wurde hinzugefügt, da Datenbank noch separat nach Image_Name und Image_Tag frägt
-    if ":" in image_reference:
-        image_name, image_tag = image_reference.rsplit(":", 1)
-    
     image_data = {
         "image_name": image_name,
-        "image_tag": image_tag,
+        "image_tag": image_tag or "latest",
         "image_description": None, 
         "image_reference": f"{image_reference}",
         "image_provider_id": 1
@@ -0,0 +1,89 @@
+import uuid
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# Einzelner Hintergrund-Job; alle Felder außer job_id werden nur über die Registry verändert
+class Job:
+    def __init__(self, job_type: str, **fields):
+        self.job_id = str(uuid.uuid4())
+        self.job_type = job_type
+        self.status = "queued"          # queued → running → completed | failed
+        self.created_at = _utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.__dict__.update(fields)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+
+class JobRegistry:
+    """
+    Thread-sichere In-Memory-Verwaltung von Hintergrund-Jobs.
+    Abgeschlossene Jobs werden nach ttl_seconds automatisch entfernt.
+    Hinweis: Der Zustand gilt pro Prozess – bei mehreren Uvicorn-Workern
+    muss die Status-Abfrage denselben Worker erreichen.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_type: str, **fields) -> Job:
+        job = Job(job_type, **fields)
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            self._purge_expired()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def update(self, job: Job, **changes) -> None:
+        with self._lock:
+            if changes.get("status") == "running" and job.started_at is None:
+                job.started_at = _utcnow()
+            if changes.get("status") in ("completed", "failed"):
+                job.finished_at = _utcnow()
+            job.__dict__.update(changes)
+
+    def extend(self, job: Job, field: str, items: List, **changes) -> None:
+        """Hängt items in-place an die Liste job.<field> an (ohne die bisherigen Einträge zu kopieren)."""
+        with self._lock:
+            getattr(job, field).extend(items)
+            job.__dict__.update(changes)
+
+    def snapshot(self, job: Job) -> dict:
+        """Konsistente Kopie des Job-Zustands für die API-Ausgabe."""
+        with self._lock:
+            data = dict(job.__dict__)
+        for key, value in data.items():
+            if isinstance(value, list):
+                data[key] = list(value)
+            elif isinstance(value, dict):
+                data[key] = dict(value)
+        return data
+
+    def _purge_expired(self) -> None:
+        now = _utcnow()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and (now - job.finished_at).total_seconds() > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
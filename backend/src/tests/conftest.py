@@ -0,0 +1,11 @@
+# conftest.py
+# ----------------------------------------------
+# Importpfade wie im Backend-Container (PYTHONPATH=/app/src): Module werden sowohl über
+# "src." als auch direkt ("services.", "db.", "api.") importiert.
+import os
+import sys
+
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+for path in (os.path.join(_BACKEND_DIR, "src"), _BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
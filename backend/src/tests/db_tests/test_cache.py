@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import inspect
+
+from src.db.crud import cache
+from src.db.crud.cache import RecordCache, cached_instance, to_columns
+from src.db.db_models.db_models import KIImage
+
+# ------------------------------------------------------------
+# Abschnitt: Hilfsfunktionen
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Steuerbare Uhr für time.monotonic im Cache-Modul."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+def sample_values(image_id: int = 1) -> dict:
+    return to_columns(KIImage(
+        image_id=image_id, image_name="model", image_tag="1.0", image_description=None,
+        image_reference="model:1.0", image_provider_id=1, image_created_at=None,
+    ))
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für Treffer, Ablauf und Verdrängung
+
+def test_get_returns_stored_values_and_counts_hits_and_misses(clock):
+    records = RecordCache("test", maxsize=10, ttl=30)
+    assert records.get(1) is None
+    records.set(1, {"image_id": 1})
+    assert records.get(1) == {"image_id": 1}
+    stats = records.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+def test_entry_expires_after_ttl(clock):
+    records = RecordCache("test", maxsize=10, ttl=30)
+    records.set(1, {"image_id": 1})
+    clock.value += 29.9
+    assert records.get(1) is not None
+    clock.value += 0.2
+    assert records.get(1) is None
+    assert records.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted(clock):
+    records = RecordCache("test", maxsize=2, ttl=30)
+    records.set(1, {"image_id": 1})
+    records.set(2, {"image_id": 2})
+    records.get(1)                      # 1 ist jetzt zuletzt benutzt
+    records.set(3, {"image_id": 3})
+    assert records.get(2) is None
+    assert records.get(1) is not None and records.get(3) is not None
+    assert records.stats()["evictions"] == 1
+
+def test_disabled_cache_stores_nothing(clock):
+    records = RecordCache("test", maxsize=10, ttl=0)
+    records.set(1, {"image_id": 1})
+    assert not records.enabled
+    assert records.get(1) is None
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für Invalidierung und Generationszähler
+
+def test_invalidate_removes_entry_and_counts_it(clock):
+    records = RecordCache("test", maxsize=10, ttl=30)
+    records.set(1, {"image_id": 1})
+    records.invalidate([1, 2])
+    assert records.get(1) is None
+    assert records.stats()["invalidations"] == 1
+
+def test_stale_reader_cannot_repopulate_after_write(clock):
+    records = RecordCache("test", maxsize=10, ttl=30)
+    generation = records.generation     # Leser beginnt vor dem Schreibvorgang
+    records.invalidate([1])             # Schreiber ändert den Datensatz
+    records.set(1, {"image_name": "alt"}, generation)
+    assert records.get(1) is None
+    records.set(1, {"image_name": "neu"}, records.generation)
+    assert records.get(1) == {"image_name": "neu"}
+
+def test_invalidate_where_removes_matching_entries(clock):
+    records = RecordCache("test", maxsize=10, ttl=30)
+    records.set(("uuid", "a"), {"dicom_uuid": "a"})
+    records.set(("uuid", "b"), {"dicom_uuid": "b"})
+    records.invalidate_where(lambda values: values["dicom_uuid"] == "a")
+    assert records.get(("uuid", "a")) is None
+    assert records.get(("uuid", "b")) is not None
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für gelöste (detached) Kopien
+
+def test_cached_instance_returns_independent_detached_copies(clock):
+    records = RecordCache("test", maxsize=10, ttl=30)
+    records.set(1, sample_values(1))
+
+    first = cached_instance(records, KIImage, 1)
+    first.image_name = "geändert"
+    second = cached_instance(records, KIImage, 1)
+
+    assert first is not second
+    assert second.image_name == "model"
+    assert inspect(second).detached
+    assert records.get(1)["image_name"] == "model"
+
+def test_cached_instance_returns_none_on_miss(clock):
+    assert cached_instance(RecordCache("test", maxsize=10, ttl=30), KIImage, 1) is None
@@ -0,0 +1,89 @@
+import base64
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.db.core.exceptions import InvalidCursor
+from src.db.crud.crud_kiImage import KI_IMAGE_LIST_COLUMNS, ki_image_filters
+from src.db.crud.pagination import (
+    MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_select, split_page
+)
+from src.db.db_models.db_models import Base, KIImage
+
+# ------------------------------------------------------------
+# Abschnitt: Hilfsfunktionen
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        for i in range(1, 8):
+            session.add(KIImage(
+                image_id=i, image_name="model" if i % 2 else "other", image_tag=f"{i % 3}.0",
+                image_reference=f"model:{i}", image_provider_id=1,
+            ))
+        session.commit()
+        yield session
+    engine.dispose()
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def read_all_pages(db, limit: int, filters=()) -> list:
+    pages, cursor = [], None
+    while True:
+        stmt = keyset_select(KIImage, KIImage.image_id, filters, cursor, limit)
+        items, cursor = split_page(db.scalars(stmt).all(), "image_id", limit)
+        pages.append([item.image_id for item in items])
+        if cursor is None:
+            return pages
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für encode_cursor / decode_cursor
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == 42
+
+@pytest.mark.parametrize("cursor", [
+    "kein-base64!",
+    raw_cursor({"v": 2, "k": 1}),          # fremde Version
+    raw_cursor({"v": 1, "k": "1"}),        # Schlüssel kein int
+    raw_cursor({"v": 1, "k": True}),       # bool ist kein gültiger Schlüssel
+    raw_cursor({"v": 1}),                  # Schlüssel fehlt
+    raw_cursor([1, 2]),
+])
+def test_invalid_cursor_raises_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für keyset_select / split_page
+
+def test_pages_cover_all_rows_in_key_order(db):
+    assert read_all_pages(db, limit=3) == [[1, 2, 3], [4, 5, 6], [7]]
+
+def test_exact_multiple_of_limit_has_no_empty_last_page(db):
+    assert read_all_pages(db, limit=7) == [[1, 2, 3, 4, 5, 6, 7]]
+
+def test_filters_are_applied_on_every_page(db):
+    filters = ki_image_filters(image_name="model")
+    assert read_all_pages(db, limit=2, filters=filters) == [[1, 3], [5, 7]]
+
+def test_projection_returns_row_tuples(db):
+    stmt = keyset_select(KI_IMAGE_LIST_COLUMNS, KIImage.image_id, ki_image_filters(image_tag="1.0"), None, 10)
+    rows, cursor = split_page(db.execute(stmt).all(), "image_id", 10)
+    assert cursor is None
+    assert [(row.image_id, row.image_tag) for row in rows] == [(1, "1.0"), (4, "1.0"), (7, "1.0")]
+
+def test_limit_is_capped_at_max_page_size():
+    stmt = keyset_select(KIImage, KIImage.image_id, limit=MAX_PAGE_SIZE * 10)
+    assert stmt._limit == MAX_PAGE_SIZE + 1
+
+def test_without_limit_all_rows_after_cursor_are_selected(db):
+    stmt = keyset_select(KIImage, KIImage.image_id, cursor=encode_cursor(5), limit=None)
+    assert [image.image_id for image in db.scalars(stmt)] == [6, 7]
@@ -0,0 +1,104 @@
+import pydicom
+import pytest
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.sequence import Sequence
+
+from services.dicom.anonymizer import ANONYMIZED_VALUE, anonymize_dicom_fields, compile_profile
+
+STUDY_UID = "1.2.826.0.1.3680043.8.498.1"
+SOP_UID = "1.2.826.0.1.3680043.8.498.2"
+REFERENCED_UID = "1.2.826.0.1.3680043.8.498.3"
+
+# ------------------------------------------------------------
+# Abschnitt: Hilfsfunktionen
+
+def private_block(ds: Dataset, value: str) -> None:
+    block = ds.private_block(0x0009, "MRAY TEST", create=True)
+    block.add_new(0x01, "LO", value)
+
+def make_dataset() -> Dataset:
+    """Datensatz mit PHI auf oberster Ebene, in einer verschachtelten Sequenz und in privaten Blöcken."""
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.MediaStorageSOPInstanceUID = SOP_UID
+    ds.PatientName = "Mustermann^Max"
+    ds.PatientID = "12345"
+    ds.PatientBirthDate = "19800101"
+    ds.PatientAge = "044Y"
+    ds.InstitutionName = "Klinikum"
+    ds.Modality = "CT"
+    ds.StudyInstanceUID = STUDY_UID
+    ds.SOPInstanceUID = SOP_UID
+    private_block(ds, "Geheim")
+
+    nested = Dataset()
+    nested.ReferencedSOPInstanceUID = REFERENCED_UID
+    nested.PatientName = "Mustermann^Max"
+    nested.InstitutionName = "Klinikum"
+    private_block(nested, "Geheim")
+    ds.ReferencedImageSequence = Sequence([nested])
+
+    other_ids = Dataset()
+    other_ids.PatientID = "67890"
+    ds.OtherPatientIDsSequence = Sequence([other_ids])
+    return ds
+
+def has_private(ds: Dataset) -> bool:
+    return any(element.tag.is_private for element in ds.iterall())
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für das Profil "legacy"
+
+def test_legacy_replaces_fields_on_all_levels():
+    ds = anonymize_dicom_fields(make_dataset(), profile="legacy")
+    nested = ds.ReferencedImageSequence[0]
+    assert ds.PatientName == ANONYMIZED_VALUE and nested.PatientName == ANONYMIZED_VALUE
+    assert ds.InstitutionName == ANONYMIZED_VALUE and nested.InstitutionName == ANONYMIZED_VALUE
+    assert ds.PatientID == ANONYMIZED_VALUE
+    assert ds.PatientBirthDate == "19000101"
+
+def test_legacy_keeps_uids_and_private_tags():
+    ds = anonymize_dicom_fields(make_dataset(), profile="legacy")
+    assert ds.SOPInstanceUID == SOP_UID and ds.file_meta.MediaStorageSOPInstanceUID == SOP_UID
+    assert ds.ReferencedImageSequence[0].ReferencedSOPInstanceUID == REFERENCED_UID
+    assert ds.PatientAge == "044Y" and ds.Modality == "CT"
+    assert has_private(ds)
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für das Profil "basic"
+
+def test_basic_removes_and_empties_elements():
+    ds = anonymize_dicom_fields(make_dataset(), profile="basic")
+    nested = ds.ReferencedImageSequence[0]
+    for keyword in ("PatientAge", "InstitutionName", "OtherPatientIDsSequence"):
+        assert keyword not in ds
+    assert "InstitutionName" not in nested
+    assert ds.PatientName == ANONYMIZED_VALUE and nested.PatientName == ANONYMIZED_VALUE
+    assert ds.PatientBirthDate in ("", None)
+    assert ds.Modality == "CT"
+
+def test_basic_drops_private_tags_on_all_levels():
+    assert not has_private(anonymize_dicom_fields(make_dataset(), profile="basic"))
+
+def test_basic_remaps_uids_consistently():
+    first = anonymize_dicom_fields(make_dataset(), profile="basic")
+    second = anonymize_dicom_fields(make_dataset(), profile="basic")
+
+    assert first.SOPInstanceUID != SOP_UID and first.SOPInstanceUID.startswith("2.25.")
+    assert first.StudyInstanceUID != first.SOPInstanceUID
+    assert first.file_meta.MediaStorageSOPInstanceUID == first.SOPInstanceUID
+    assert first.SOPInstanceUID == second.SOPInstanceUID
+    assert first.ReferencedImageSequence[0].ReferencedSOPInstanceUID == second.ReferencedImageSequence[0].ReferencedSOPInstanceUID
+    # Verweise auf dieselbe Instanz bleiben nach dem Hashen gleich
+    ds = make_dataset()
+    ds.ReferencedImageSequence[0].ReferencedSOPInstanceUID = SOP_UID
+    ds = anonymize_dicom_fields(ds, profile="basic")
+    assert ds.ReferencedImageSequence[0].ReferencedSOPInstanceUID == ds.SOPInstanceUID
+    assert pydicom.uid.UID(ds.SOPInstanceUID).is_valid
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für die Profilauswahl
+
+def test_unknown_profile_raises_value_error():
+    with pytest.raises(ValueError):
+        compile_profile("unbekannt")
@@ -0,0 +1,57 @@
+import hashlib
+
+import pydicom
+from pydicom.data import get_testdata_file
+
+from services.dicom.hasher import HASH_V2_PREFIX, generate_dicom_hash, get_hash_version
+
+# ------------------------------------------------------------
+# Abschnitt: Hilfsfunktionen
+
+def read_testdata(name: str = "CT_small.dcm"):
+    return pydicom.dcmread(get_testdata_file(name))
+
+def legacy_hash(ds) -> str:
+    uid_part = "".join(str(ds.get(k, "")) for k in ("StudyInstanceUID", "SeriesInstanceUID", "SOPInstanceUID"))
+    return hashlib.sha256((uid_part + ds.pixel_array.tobytes().hex()).encode()).hexdigest()
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für Version 2 (Streaming)
+
+def test_v2_hash_has_prefix_and_version():
+    dicom_hash = generate_dicom_hash(read_testdata(), version="2")
+    assert dicom_hash.startswith(HASH_V2_PREFIX)
+    assert len(dicom_hash) == len(HASH_V2_PREFIX) + 64
+    assert get_hash_version(dicom_hash) == "2"
+
+def test_v2_hash_is_stable_across_calls_and_reads():
+    assert generate_dicom_hash(read_testdata(), version="2") == generate_dicom_hash(read_testdata(), version="2")
+
+def test_v2_hash_ignores_passed_pixel_array_when_pixel_data_present():
+    ds = read_testdata()
+    assert generate_dicom_hash(ds, ds.pixel_array, version="2") == generate_dicom_hash(ds, version="2")
+
+def test_v2_hash_from_pixel_array_matches_raw_pixel_data():
+    ds = read_testdata()
+    expected = generate_dicom_hash(ds, version="2")
+    pixel_array = ds.pixel_array
+    del ds.PixelData
+    assert generate_dicom_hash(ds, pixel_array, version="2") == expected
+
+def test_v2_hash_changes_with_pixel_data_and_uids():
+    ds = read_testdata()
+    original = generate_dicom_hash(ds, version="2")
+    ds.SOPInstanceUID = ds.SOPInstanceUID + ".1"
+    assert generate_dicom_hash(ds, version="2") != original
+    ds = read_testdata()
+    ds.PixelData = bytes(len(ds.PixelData))
+    assert generate_dicom_hash(ds, version="2") != original
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für Version 1 (Legacy)
+
+def test_v1_hash_produces_legacy_value():
+    ds = read_testdata()
+    dicom_hash = generate_dicom_hash(ds, version="1")
+    assert dicom_hash == legacy_hash(ds)
+    assert get_hash_version(dicom_hash) == "1"
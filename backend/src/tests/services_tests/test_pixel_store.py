@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from services.dicom.pixel_store import open_pixel_store, read_region, save_native_pixels
+
+# ------------------------------------------------------------
+# Abschnitt: Hilfsfunktionen
+
+# Graustufen-Multi-Frame mit 3 Spalten – an der Form nicht von einem RGB-Einzelbild zu unterscheiden
+FRAMES = np.arange(5 * 4 * 3, dtype=np.int16).reshape(5, 4, 3)
+
+@pytest.fixture(params=["none", "zlib"])
+def multi_frame_file(request, tmp_path):
+    return save_native_pixels(FRAMES, str(tmp_path / "frames_anon"), compression=request.param, number_of_frames=5)
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für die Frame-Anzahl im Header
+
+def test_number_of_frames_is_stored_in_header(multi_frame_file):
+    assert open_pixel_store(multi_frame_file).number_of_frames == 5
+
+def test_multi_frame_with_three_columns_selects_frame(multi_frame_file):
+    np.testing.assert_array_equal(read_region(multi_frame_file, frame=2), FRAMES[2:3])
+    with pytest.raises(IndexError):
+        read_region(multi_frame_file, frame=5)
+
+def test_rgb_single_frame_rejects_frame_index(tmp_path):
+    path = save_native_pixels(FRAMES, str(tmp_path / "rgb_anon"), number_of_frames=1)
+    np.testing.assert_array_equal(read_region(path, rows=slice(1, 3)), FRAMES[1:3])
+    with pytest.raises(IndexError):
+        read_region(path, frame=1)
+
+def test_legacy_file_uses_passed_number_of_frames(tmp_path):
+    path = str(tmp_path / "legacy_anon.npy")
+    np.save(path, FRAMES.astype(np.float32))
+    assert open_pixel_store(path).number_of_frames is None
+    np.testing.assert_array_equal(read_region(path, frame=4, number_of_frames=5), FRAMES[4:5])
@@ -0,0 +1,53 @@
+import pydicom
+from pydicom.data import get_testdata_file
+
+from services.dicom.pixeldata_check import check_pixel_data_structure
+from services.dicom.validation import validate_datasets
+
+PRIVATE_TRANSFER_SYNTAX = "1.2.840.99999.1"
+
+# ------------------------------------------------------------
+# Abschnitt: Hilfsfunktionen
+
+def read_testdata(name: str):
+    return pydicom.dcmread(get_testdata_file(name))
+
+def pixel_violations(ds):
+    report = validate_datasets([(ds, "test.dcm")], phase="pixel")[0]
+    return [v for v in report.violations if v.rule == "pixel_data"]
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für native und gekapselte PixelData
+
+def test_native_pixel_data_is_consistent():
+    assert check_pixel_data_structure(read_testdata("CT_small.dcm")) == []
+
+def test_native_pixel_data_with_wrong_length_is_reported():
+    ds = read_testdata("CT_small.dcm")
+    ds.PixelData = ds.PixelData[:-2]
+    issues = check_pixel_data_structure(ds)
+    assert len(issues) == 1 and "PixelData-Länge inkonsistent" in issues[0]
+
+def test_encapsulated_pixel_data_is_consistent():
+    assert check_pixel_data_structure(read_testdata("JPEG2000.dcm")) == []
+
+# ------------------------------------------------------------
+# Abschnitt: Tests für private bzw. unbekannte Transfer Syntax
+
+def test_private_transfer_syntax_native_does_not_raise():
+    ds = read_testdata("CT_small.dcm")
+    ds.file_meta.TransferSyntaxUID = PRIVATE_TRANSFER_SYNTAX
+    assert check_pixel_data_structure(ds) == []
+    assert pixel_violations(ds) == []
+
+def test_private_transfer_syntax_encapsulated_is_detected_by_undefined_length():
+    ds = read_testdata("JPEG2000.dcm")
+    ds.file_meta.TransferSyntaxUID = PRIVATE_TRANSFER_SYNTAX
+    assert check_pixel_data_structure(ds) == []
+    assert pixel_violations(ds) == []
+
+def test_private_transfer_syntax_full_phase_does_not_raise():
+    ds = read_testdata("CT_small.dcm")
+    ds.file_meta.TransferSyntaxUID = PRIVATE_TRANSFER_SYNTAX
+    report = validate_datasets([(ds, "test.dcm")], phase="full")[0]
+    assert any(v.rule == "transfer_syntax" and v.severity == "warning" for v in report.violations)
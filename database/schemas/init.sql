@@ -10,7 +10,9 @@ CREATE TABLE IF NOT EXISTS ki_image_metadata (
     image_description VARCHAR(500),
     image_reference VARCHAR(255),
     image_provider_id INTEGER NOT NULL,
-    image_created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    image_created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    image_digest VARCHAR(80),
+    image_size BIGINT
 );
 
 -- =========================
@@ -19,5 +21,47 @@ CREATE TABLE IF NOT EXISTS ki_image_metadata (
 CREATE TABLE IF NOT EXISTS dicom_metadata (
     dicom_id SERIAL PRIMARY KEY,
     dicom_uuid VARCHAR(128) UNIQUE NOT NULL,
-    dicom_modality VARCHAR(50)
-);
\ No newline at end of file
+    dicom_modality VARCHAR(50),
+    dicom_pixel_array_file VARCHAR(512),
+    dicom_anonymized_file VARCHAR(512),
+    dicom_content_hash VARCHAR(80),
+    dicom_study_uid VARCHAR(128),
+    dicom_series_uid VARCHAR(128),
+    dicom_study_date DATE,
+    dicom_instance_number INTEGER,
+    dicom_rows INTEGER,
+    dicom_columns INTEGER,
+    dicom_frames INTEGER
+);
+
+-- Nachrüsten bestehender Datenbanken
+ALTER TABLE ki_image_metadata ADD COLUMN IF NOT EXISTS image_digest VARCHAR(80);
+ALTER TABLE ki_image_metadata ADD COLUMN IF NOT EXISTS image_size BIGINT;
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_pixel_array_file VARCHAR(512);
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_anonymized_file VARCHAR(512);
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_content_hash VARCHAR(80);
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_study_uid VARCHAR(128);
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_series_uid VARCHAR(128);
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_study_date DATE;
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_instance_number INTEGER;
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_rows INTEGER;
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_columns INTEGER;
+ALTER TABLE dicom_metadata ADD COLUMN IF NOT EXISTS dicom_frames INTEGER;
+
+-- Indizes für gefilterte Keyset-Pagination (WHERE <Filter> AND <id> > :cursor ORDER BY <id>)
+CREATE INDEX IF NOT EXISTS ix_ki_image_name_tag_id ON ki_image_metadata (image_name, image_tag, image_id);
+CREATE INDEX IF NOT EXISTS ix_ki_image_tag_id ON ki_image_metadata (image_tag, image_id);
+CREATE INDEX IF NOT EXISTS ix_ki_image_provider_id ON ki_image_metadata (image_provider_id, image_id);
+CREATE INDEX IF NOT EXISTS ix_dicom_modality_id ON dicom_metadata (dicom_modality, dicom_id);
+
+-- Indizes für Abfragen Studie → Serie → Instanz, nach Datum und nach Inhalts-Hash
+-- (bestehende Zeilen werden mit "python -m services.dicom.backfill" nachgetragen)
+CREATE INDEX IF NOT EXISTS ix_dicom_study_series_instance ON dicom_metadata (dicom_study_uid, dicom_series_uid, dicom_instance_number);
+CREATE INDEX IF NOT EXISTS ix_dicom_series_instance ON dicom_metadata (dicom_series_uid, dicom_instance_number);
+CREATE INDEX IF NOT EXISTS ix_dicom_study_date_id ON dicom_metadata (dicom_study_date, dicom_id);
+CREATE INDEX IF NOT EXISTS ix_dicom_content_hash ON dicom_metadata (dicom_content_hash);
+
+
+-- Ein Docker-Image (Image-ID) wird pro Name:Tag nur einmal gespeichert; ältere Zeilen ohne Digest bleiben erlaubt
+DROP INDEX IF EXISTS ux_ki_image_digest;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_ki_image_digest_name_tag ON ki_image_metadata (image_digest, image_name, image_tag);